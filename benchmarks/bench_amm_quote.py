@@ -0,0 +1,75 @@
+"""QuoteEngine 基準測試: 向量化報價吞吐量與整數參考實作的誤差
+
+用法: python benchmarks/bench_amm_quote.py --pools 5000 --sizes 20
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from solana_bot.amm_quote import QuoteEngine, quote_exact
+
+
+def timed(label, func, repeat=1, quotes=None):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    rate = f"{quotes / elapsed:>14,.0f} quotes/s" if quotes else ""
+    print(f"{label:<44} {elapsed * 1000:>10.2f} ms {rate}")
+    return result
+
+
+def populate(engine, pool_count, rng):
+    """模擬新池子: SOL 端 5~5000 SOL，代幣端 1e6~1e10 個 (6 或 9 位小數)"""
+    pools = []
+    for index in range(pool_count):
+        coin_decimals = rng.choice((6, 9))
+        pool = f"pool{index:06d}"
+        engine.update(pool, rng.randrange(10 ** 6, 10 ** 10) * 10 ** coin_decimals,
+                      rng.randrange(5, 5000) * 10 ** 9 + rng.randrange(10 ** 9), coin_decimals, 9)
+        pools.append(pool)
+    return pools
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pools', type=int, default=5_000)
+    parser.add_argument('--sizes', type=int, default=20)
+    parser.add_argument('--check', type=int, default=20_000, help="與整數實作比對的報價數")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    engine = QuoteEngine()
+    pools = populate(engine, args.pools, rng)
+    slots = engine.slots(pools)
+    # 0.01 ~ 100 SOL 的買入數量 (pc -> coin)
+    sizes = np.geomspace(0.01, 100, args.sizes) * 1e9
+    amounts = np.broadcast_to(np.floor(sizes), (len(pools), args.sizes))
+    total = amounts.size
+
+    timed(f"vectorized {len(pools):,} pools x {args.sizes} sizes", lambda: engine.quote(slots, amounts, False),
+          repeat=10, quotes=total)
+    timed("vectorized (pool addresses -> slots)", lambda: engine.quote(pools, amounts, False),
+          repeat=10, quotes=total)
+
+    reserves = [(int(engine.pc[slot]), int(engine.coin[slot])) for slot in slots]
+    check = min(args.check, total)
+    cases = [(rng.randrange(len(pools)), rng.randrange(args.sizes)) for _ in range(check)]
+    exact = timed("python integer reference (loop)",
+                  lambda: [quote_exact(*reserves[row], int(amounts[row, column]))[0] for row, column in cases],
+                  quotes=check)
+
+    vectorized = engine.quote(slots, amounts, False)['amount_out']
+    errors = np.array([abs(int(vectorized[row, column]) - expected)
+                       for (row, column), expected in zip(cases, exact)])
+    print(f"max |vectorized - exact| = {errors.max()} units "
+          f"({(errors > 0).mean() * 100:.2f}% of {check:,} quotes differ)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""RaydiumMonitor 壓測: 替身 RPC 以不同速率推送日誌通知
+
+對每個速率 (以及可選的突發、斷線、RPC 延遲) 各跑一輪，量測:
+
+- 實際處理的通知數 / 送出的通知數 / 佇列滿時丟棄的通知數，以及處理完
+  積壓所需的時間
+- 注入的 initialize2 中被偵測到的比例 (漏掉的池子)
+- 偵測延遲: 替身送出通知 -> RaydiumMonitor 發布 pool.created 的 p50 / p95 / p99
+
+送出結束時積壓不超過 1 秒的流量 (跟上送出速率)、積壓在 --grace 秒內
+處理完且沒有漏掉池子的最高速率視為可持續的最大通知速率。每輪使用新的
+資料庫與 RPC 快取: 各輪流量的簽名相同 (固定種子)，沿用會讓後面幾輪
+直接命中上一輪的快取或因池子已存在而略過。
+
+用法:
+    python benchmarks/bench_raydium_monitor.py --rates 100,500,1000,2000 --duration 20 --pool-every 200
+    python benchmarks/bench_raydium_monitor.py --rates 500 --burst-every 5 --burst-size 5000 --rpc-latency 0.05
+    python benchmarks/bench_raydium_monitor.py --rates 200 --replay logs.jsonl --replay-transactions txs.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# solana_bot 在 repo 根目錄；standin_rpc 與本腳本同目錄
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from standin_rpc import StandinRpc, TrafficProfile, add_arguments, load_replay, load_transactions
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def load_monitor(args, workdir: str):
+    """設定環境變數後載入 day3 (模組層級讀取設定)"""
+    os.environ.update({
+        "RPC_ENDPOINTS": f"http://{args.host}:{args.rpc_port}",
+        "WS_ENDPOINTS": f"ws://{args.host}:{args.ws_port}",
+        "DB_PATH": os.path.join(workdir, "pools.db"),
+        "RPC_CACHE_PATH": os.path.join(workdir, "rpc_cache.db"),
+        "METRICS_PORT": "0",
+        "DASHBOARD": "False",
+        "DEBUG_MODE": "False",
+        "RECONNECT_INTERVAL": "1",
+        "MAX_RECONNECT_ATTEMPTS": "0",
+    })
+    cwd = os.getcwd()
+    # 日誌檔寫在暫存目錄
+    os.chdir(workdir)
+    try:
+        from solana_bot.host import load_script
+        module = load_script('pools')
+    finally:
+        os.chdir(cwd)
+    logging.getLogger().setLevel(logging.WARNING)
+    return module
+
+
+async def run_case(module, args, rate: float, replay, transactions, workdir: str) -> Dict:
+    from solana_bot.bus import POOL_CREATED, EventBus
+    from solana_bot.rpc_cache import RpcResponseCache
+
+    module.DB_PATH = os.path.join(workdir, f"pools-{rate:g}.db")
+
+    standin = StandinRpc(args.host, args.rpc_port, args.ws_port, args.rpc_latency, replay, transactions)
+    await standin.start()
+    bus = EventBus()
+    detected: Dict[str, float] = {}
+    bus.subscribe(POOL_CREATED, lambda event: detected.setdefault(event['signature'], time.time()))
+    await bus.start()
+
+    # 丟棄數是模組層級的計數器，取本輪的增量
+    dropped = module.LOG_QUEUE_DROPPED.labels()
+    dropped_before = dropped.value
+    monitor = module.RaydiumMonitor(bus=bus)
+    monitor.rpc_cache.close()
+    monitor.rpc_cache = RpcResponseCache(os.path.join(workdir, f"rpc_cache-{rate:g}.db"))
+    monitor.is_running = True
+    consumer = asyncio.create_task(monitor.subscribe_to_program_logs())
+    try:
+        await asyncio.wait_for(standin.subscribed.wait(), timeout=10)
+        profile = TrafficProfile(rate, args.duration, args.pool_every, args.burst_every, args.burst_size,
+                                 args.disconnect_every)
+        started = time.perf_counter()
+        await standin.play(profile)
+        sent_done = time.perf_counter()
+        # 送出結束時仍在佇列中的通知 (丟棄的另計)
+        behind = standin.sent - monitor.total_notifications - int(dropped.value - dropped_before)
+        # 等待積壓處理完
+        while time.perf_counter() - sent_done < args.grace:
+            handled = monitor.total_notifications + dropped.value - dropped_before
+            if handled >= standin.sent and len(detected) >= len(standin.injected):
+                break
+            await asyncio.sleep(0.05)
+        drained = time.perf_counter()
+    finally:
+        await monitor.unsubscribe()
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await bus.stop()
+        await standin.stop()
+        monitor.rpc_cache.close()
+
+    latencies = [detected[signature] - pool.sent_at
+                 for signature, pool in standin.injected.items() if signature in detected]
+    processed = monitor.total_notifications
+    missed = len(standin.injected) - len(latencies)
+    backlog_seconds = drained - sent_done
+    return {
+        'rate': rate,
+        'sent': standin.sent,
+        'processed': processed,
+        'throughput': round(processed / (drained - started), 1),
+        'dropped': int(dropped.value - dropped_before),
+        'behind': behind,
+        'backlog_s': round(backlog_seconds, 2),
+        'pools': len(standin.injected),
+        'missed': missed,
+        'p50_ms': _ms(percentile(latencies, 50)),
+        'p95_ms': _ms(percentile(latencies, 95)),
+        'p99_ms': _ms(percentile(latencies, 99)),
+        'sustained': (missed == 0 and processed >= standin.sent and behind <= rate
+                      and backlog_seconds < args.grace),
+        'rpc_requests': dict(standin.requests),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+async def run(args) -> List[Dict]:
+    replay = load_replay(args.replay)
+    transactions = load_transactions(args.replay_transactions)
+    with tempfile.TemporaryDirectory() as workdir:
+        module = load_monitor(args, workdir)
+        results = []
+        for rate in (float(rate) for rate in args.rates.split(",") if rate.strip()):
+            result = await run_case(module, args, rate, replay, transactions, workdir)
+            results.append(result)
+            if not args.json:
+                print(f"{result['rate']:>8.0f}/s  sent {result['sent']:>8}  processed {result['processed']:>8}  "
+                      f"{result['throughput']:>9.1f}/s  dropped {result['dropped']:>6}  behind {result['behind']:>7}  "
+                      f"backlog {result['backlog_s']:>6.2f}s  "
+                      f"pools {result['pools']:>4}  missed {result['missed']:>4}  "
+                      f"p50 {result['p50_ms']} p95 {result['p95_ms']} p99 {result['p99_ms']} ms  "
+                      f"{'ok' if result['sustained'] else 'FALLING BEHIND'}")
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test RaydiumMonitor against the stand-in RPC")
+    add_arguments(parser)
+    parser.add_argument("--rates", default="100,250,500,1000,2000", help="comma separated notifications/s")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per rate")
+    parser.add_argument("--grace", type=float, default=10, help="seconds allowed to drain the backlog")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    sustained = [result['rate'] for result in results if result['sustained']]
+    if args.json:
+        print(json.dumps({'results': results, 'max_sustained_rate': max(sustained, default=None)}, indent=2))
+    else:
+        print(f"max sustained rate: {max(sustained, default=0):.0f} notifications/s")
+
+
+if __name__ == "__main__":
+    main()
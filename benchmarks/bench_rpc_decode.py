@@ -0,0 +1,188 @@
+"""RPC 響應解碼基準測試: json.loads + dict 走訪 vs msgspec 型別化解碼
+
+用法:
+    python benchmarks/bench_rpc_decode.py
+    python benchmarks/bench_rpc_decode.py --transaction tx.json --block block.json --logs logs.jsonl
+
+可傳入實際抓取的原始響應 (getTransaction jsonParsed / getBlock json /
+每行一則 logsNotification)；未提供時使用結構相同的合成資料。
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from solana_bot.rpc_types import (
+    block_decoder, logs_params_decoder, transaction_decoder, ws_message_decoder
+)
+
+RAYDIUM_PROGRAM_ID = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+rng = random.Random(7)
+
+
+def fake_pubkey():
+    return ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(44))
+
+
+def fake_token_balance(index):
+    return {
+        "accountIndex": index, "mint": fake_pubkey(), "owner": fake_pubkey(), "programId": fake_pubkey(),
+        "uiTokenAmount": {"amount": "123456789", "decimals": 6, "uiAmount": 123.456789, "uiAmountString": "123.456789"},
+    }
+
+
+def synthetic_transaction(instruction_count=12, inner_count=60, log_count=80):
+    keys = [fake_pubkey() for _ in range(40)]
+    instructions = [
+        {"programId": RAYDIUM_PROGRAM_ID if i == 3 else fake_pubkey(),
+         "accounts": keys[:21], "data": fake_pubkey() * 2, "stackHeight": None}
+        for i in range(instruction_count)
+    ]
+    inner = [{"index": i, "instructions": [
+        {"program": "spl-token", "programId": fake_pubkey(), "stackHeight": 2,
+         "parsed": {"type": "transfer", "info": {"source": fake_pubkey(), "destination": fake_pubkey(),
+                                                 "authority": fake_pubkey(), "amount": "1000"}}}
+        for _ in range(inner_count // instruction_count)
+    ]} for i in range(instruction_count)]
+    return {"jsonrpc": "2.0", "id": 1, "result": {
+        "slot": 300000000, "blockTime": 1735689600, "version": 0,
+        "transaction": {"signatures": [fake_pubkey() * 2], "message": {
+            "accountKeys": [{"pubkey": k, "signer": i == 0, "writable": i < 10, "source": "transaction"}
+                            for i, k in enumerate(keys)],
+            "recentBlockhash": fake_pubkey(), "instructions": instructions, "addressTableLookups": []}},
+        "meta": {"err": None, "fee": 5000, "computeUnitsConsumed": 120000,
+                 "preBalances": [rng.randrange(10 ** 12) for _ in keys],
+                 "postBalances": [rng.randrange(10 ** 12) for _ in keys],
+                 "innerInstructions": inner,
+                 "logMessages": [f"Program log: {fake_pubkey()}" for _ in range(log_count - 1)] + ["Program log: initialize2: InitializeInstruction2"],
+                 "preTokenBalances": [fake_token_balance(i) for i in range(6)],
+                 "postTokenBalances": [fake_token_balance(i) for i in range(6)],
+                 "rewards": [], "status": {"Ok": None}}}}
+
+
+def synthetic_block(tx_count=1200):
+    transactions = []
+    for _ in range(tx_count):
+        keys = [fake_pubkey() for _ in range(rng.randrange(8, 30))]
+        transactions.append({
+            "transaction": {"signatures": [fake_pubkey() * 2], "message": {
+                "header": {"numRequiredSignatures": 1, "numReadonlySignedAccounts": 0, "numReadonlyUnsignedAccounts": 5},
+                "accountKeys": keys, "recentBlockhash": fake_pubkey(),
+                "instructions": [{"programIdIndex": rng.randrange(len(keys)), "accounts": list(range(len(keys) // 2)),
+                                  "data": fake_pubkey(), "stackHeight": None} for _ in range(4)],
+                "addressTableLookups": [{"accountKey": fake_pubkey(), "writableIndexes": [1, 2], "readonlyIndexes": [3]}]}},
+            "meta": {"err": None, "fee": 5000,
+                     "preBalances": [rng.randrange(10 ** 12) for _ in keys],
+                     "postBalances": [rng.randrange(10 ** 12) for _ in keys],
+                     "innerInstructions": [{"index": 0, "instructions": [
+                         {"programIdIndex": 2, "accounts": [1, 2, 3], "data": fake_pubkey(), "stackHeight": 2}] * 6}],
+                     "logMessages": [f"Program log: {fake_pubkey()}" for _ in range(20)],
+                     "preTokenBalances": [fake_token_balance(i) for i in range(2)],
+                     "postTokenBalances": [fake_token_balance(i) for i in range(2)],
+                     "loadedAddresses": {"writable": [fake_pubkey(), fake_pubkey()], "readonly": [fake_pubkey()]},
+                     "rewards": None, "status": {"Ok": None}},
+            "version": 0,
+        })
+    return {"jsonrpc": "2.0", "id": 1, "result": {
+        "blockHeight": 280000000, "blockTime": 1735689600, "blockhash": fake_pubkey(),
+        "parentSlot": 299999999, "previousBlockhash": fake_pubkey(), "transactions": transactions}}
+
+
+def synthetic_logs_notification():
+    return {"jsonrpc": "2.0", "method": "logsNotification", "params": {
+        "result": {"context": {"slot": 300000000}, "value": {
+            "signature": fake_pubkey() * 2, "err": None,
+            "logs": [f"Program log: {fake_pubkey()}" for _ in range(40)]}},
+        "subscription": 42}}
+
+
+# ---------- 兩種走訪方式，取出相同欄位 ----------
+
+def walk_transaction_dict(raw):
+    tx = json.loads(raw)["result"]
+    logs = tx["meta"]["logMessages"]
+    found = any("initialize2" in log for log in logs)
+    accounts = [ix["accounts"] for ix in tx["transaction"]["message"]["instructions"] if ix.get("programId") == RAYDIUM_PROGRAM_ID]
+    return found, accounts, tx["slot"], tx["blockTime"]
+
+
+def walk_transaction_typed(raw):
+    tx = transaction_decoder.decode(raw).result
+    found = any("initialize2" in log for log in tx.meta.log_messages)
+    accounts = [ix.accounts for ix in tx.transaction.message.instructions if ix.program_id == RAYDIUM_PROGRAM_ID]
+    return found, accounts, tx.slot, tx.block_time
+
+
+def walk_block_dict(raw):
+    block = json.loads(raw)["result"]
+    total = 0
+    for tx in block["transactions"]:
+        keys = tx["transaction"]["message"]["accountKeys"] + tx["meta"]["loadedAddresses"]["writable"]
+        total += max(abs(post - pre) for pre, post in zip(tx["meta"]["preBalances"], tx["meta"]["postBalances"]))
+        total += len(keys) + len(tx["meta"]["postTokenBalances"])
+    return total
+
+
+def walk_block_typed(raw):
+    block = block_decoder.decode(raw).result
+    total = 0
+    for tx in block.transactions:
+        keys = tx.transaction.message.account_keys + tx.meta.loaded_addresses.writable
+        total += max(abs(post - pre) for pre, post in zip(tx.meta.pre_balances, tx.meta.post_balances))
+        total += len(keys) + len(tx.meta.post_token_balances)
+    return total
+
+
+def walk_logs_dict(raw):
+    notification = json.loads(raw)
+    value = notification["params"]["result"]["value"]
+    return value["signature"], any("initialize2" in log for log in value["logs"])
+
+
+def walk_logs_typed(raw):
+    message = ws_message_decoder.decode(raw)
+    value = logs_params_decoder.decode(message.params).result.value
+    return value.signature, any("initialize2" in log for log in value.logs)
+
+
+def bench(label, func, payload, iterations):
+    func(payload)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(payload)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {elapsed / iterations * 1e6:>10.1f} us/op  {iterations / elapsed:>10.0f} ops/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--transaction', help="getTransaction (jsonParsed) 原始響應檔")
+    parser.add_argument('--block', help="getBlock (json) 原始響應檔")
+    parser.add_argument('--logs', help="logsNotification 原始訊息，每行一則")
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    tx_raw = Path(args.transaction).read_bytes() if args.transaction else json.dumps(synthetic_transaction()).encode()
+    block_raw = Path(args.block).read_bytes() if args.block else json.dumps(synthetic_block()).encode()
+    logs_raw = (Path(args.logs).read_bytes().splitlines()[0] if args.logs
+                else json.dumps(synthetic_logs_notification()).encode())
+
+    print(f"getTransaction payload: {len(tx_raw) / 1024:.1f} KB, getBlock payload: {len(block_raw) / 1024 / 1024:.2f} MB")
+    for name, dict_walk, typed_walk, payload, iterations in (
+        ("getTransaction", walk_transaction_dict, walk_transaction_typed, tx_raw, args.iterations),
+        ("getBlock", walk_block_dict, walk_block_typed, block_raw, max(args.iterations // 200, 5)),
+        ("logsNotification", walk_logs_dict, walk_logs_typed, logs_raw, args.iterations * 10),
+    ):
+        assert dict_walk(payload) == typed_walk(payload), f"{name}: 兩種解碼結果不一致"
+        baseline = bench(f"{name} json.loads + dict", dict_walk, payload, iterations)
+        typed = bench(f"{name} msgspec typed", typed_walk, payload, iterations)
+        print(f"{'':<36} speedup x{baseline / typed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
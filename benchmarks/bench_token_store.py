@@ -0,0 +1,106 @@
+"""solana_tokens.db 基準測試: 索引 (有 / 無) / 批量寫入 / 集合式報告查詢
+
+用法: python benchmarks/bench_token_store.py --tokens 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from solana_bot.token_store import TokenStore
+
+
+def timed(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<48} {elapsed * 1000:>10.2f} ms")
+    return result
+
+
+def populate(store, token_count, analyzed_ratio=0.98):
+    base = datetime(2025, 1, 1)
+    rng = random.Random(42)
+    with store.conn:
+        store.conn.executemany(
+            "INSERT INTO tokens (mint_address, first_seen, social_analyzed) VALUES (?, ?, ?)",
+            ((f"mint{i:09d}", base + timedelta(seconds=i), 1 if rng.random() < analyzed_ratio else 0)
+             for i in range(token_count))
+        )
+        store.conn.executemany(
+            "INSERT INTO social_data (mint_address, timestamp, mentions, sentiment) VALUES (?, ?, ?, ?)",
+            ((f"mint{rng.randrange(token_count):09d}", base, rng.randrange(50), rng.random())
+             for _ in range(token_count))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tokens', type=int, default=1_000_000)
+    parser.add_argument('--writes', type=int, default=5_000)
+    parser.add_argument('--report-mints', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_tokens.db")
+        store = TokenStore(db_path)
+        print(f"populating {args.tokens:,} tokens ...")
+        timed("populate", lambda: populate(store, args.tokens))
+        store.conn.execute("ANALYZE")
+
+        unanalyzed_sql = "SELECT mint_address FROM tokens {} WHERE social_analyzed = 0 ORDER BY first_seen DESC"
+        timed("unanalyzed tokens (full scan, NOT INDEXED)",
+              lambda: store.conn.execute(unanalyzed_sql.format("NOT INDEXED")).fetchall(), repeat=3)
+        timed("unanalyzed tokens (idx social_analyzed,first_seen)",
+              lambda: store.unanalyzed_tokens(), repeat=3)
+
+        mints = [f"mint{random.randrange(args.tokens):09d}" for _ in range(args.report_mints)]
+
+        def per_mint_report():
+            for mint in mints:
+                store.conn.execute("""
+                    SELECT SUM(s.mentions), AVG(s.sentiment)
+                    FROM tokens t LEFT JOIN social_data s ON t.mint_address = s.mint_address
+                    WHERE t.mint_address = ?
+                """, (mint,)).fetchone()
+
+        def report(label):
+            timed(f"report, one query per mint ({len(mints)}, {label})", per_mint_report, repeat=3)
+            timed(f"report, set-based query ({len(mints)}, {label})", lambda: store.social_summary(mints), repeat=3)
+
+        # 報告查詢先在沒有 social_data(mint_address, timestamp) 索引時量一次，建回索引後再量一次
+        store.conn.execute("DROP INDEX idx_social_data_mint_timestamp")
+        store.conn.execute("ANALYZE")
+        report("no index")
+        timed("create idx_social_data_mint_timestamp", lambda: store.conn.execute(
+            "CREATE INDEX idx_social_data_mint_timestamp ON social_data(mint_address, timestamp)"))
+        store.conn.execute("ANALYZE")
+        report("indexed")
+
+        def per_row_commits():
+            for i in range(args.writes):
+                with store.conn:
+                    store.conn.execute(
+                        "INSERT INTO social_data (mint_address, timestamp, mentions, sentiment) VALUES (?, ?, ?, ?)",
+                        (mints[i % len(mints)], datetime.now(), 1, 0.5))
+                    store.conn.execute("UPDATE tokens SET social_analyzed = 1 WHERE mint_address = ?",
+                                       (mints[i % len(mints)],))
+
+        def batched_writes():
+            for i in range(args.writes):
+                store.record_social_data(mints[i % len(mints)], 1, 0.5)
+            store.flush()
+
+        timed(f"social_data writes, commit per row ({args.writes:,})", per_row_commits)
+        timed(f"social_data writes, batched ({args.writes:,})", batched_writes)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
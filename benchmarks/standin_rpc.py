@@ -0,0 +1,460 @@
+"""RaydiumMonitor 的本機替身 RPC / WebSocket 服務
+
+沒有主網也能壓測 RaydiumMonitor:
+
+- WebSocket: 接受 logsSubscribe / accountSubscribe / signatureSubscribe
+  (及對應的 Unsubscribe)，按 TrafficProfile 的速率向所有 mentions Raydium
+  AMM v4 (或不帶 mentions) 的 logsSubscribe
+  推送 Raydium 日誌通知。通知可以是合成的 swap 日誌，也可以重放抓取的
+  logsNotification；可以設定週期性的突發與斷線
+- 每 pool_every 則通知注入一筆 initialize2，記錄簽名、池子與送出時間
+  (ground truth)，getTransaction 對這些簽名返回可被 parse_pool_info
+  解析的 jsonParsed 交易
+- 沒有訂閱者時 (斷線期間) 照常產生交易，getSignaturesForAddress 按
+  slot 由新到舊返回產生過的簽名 (程序 ID 為全部，建池費接收帳戶只有
+  initialize2)，斷線期間注入的池子只能經由回補找到
+- HTTP JSON-RPC: getTransaction、getAsset、getMultipleAccounts、getSlot、
+  getSignaturesForAddress，可加上固定延遲模擬 RPC 往返
+
+單獨運行 (把 day3 的 .env 指向它):
+    python benchmarks/standin_rpc.py --rate 500 --pool-every 200 --burst-every 10 --burst-size 5000
+    RPC_ENDPOINTS=http://127.0.0.1:18899 WS_ENDPOINTS=ws://127.0.0.1:18900 python day3/ws-raydiun-pool-non.py
+壓測見 bench_raydium_monitor.py。
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+
+from base58 import b58encode
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+RAYDIUM_PROGRAM_ID = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+WSOL = "So11111111111111111111111111111111111111112"
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+AMM_CONFIG = "9DCxsMizn3H1hprZ7xWe6LDzeUeZBksYFpBWBtSf1PQX"
+CREATE_FEE_DESTINATION = "7YttLkHDoNj9wyDur5pM1ejNaAvT9X4eqaYcHQqtj2G5"
+B58 = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+SLOTS_PER_SECOND = 2.5
+# getSignaturesForAddress 可查到的最近簽名數
+HISTORY_SIZE = 200_000
+
+SWAP_LOGS = [
+    f"Program {RAYDIUM_PROGRAM_ID} invoke [1]",
+    "Program log: ray_log: A0BCDwAAAAAAAAAAAAAAAAACAAAAAAAAAEBCDwAAAAAA",
+    f"Program {TOKEN_PROGRAM_ID} invoke [2]",
+    f"Program {TOKEN_PROGRAM_ID} success",
+    f"Program {RAYDIUM_PROGRAM_ID} consumed 31245 of 200000 compute units",
+    f"Program {RAYDIUM_PROGRAM_ID} success",
+]
+INIT_LOGS = [
+    f"Program {RAYDIUM_PROGRAM_ID} invoke [1]",
+    "Program log: initialize2: InitializeInstruction2 { nonce: 254, open_time: 0, "
+    "init_pc_amount: 85000000000, init_coin_amount: 206900000000000 }",
+    f"Program {RAYDIUM_PROGRAM_ID} consumed 88000 of 400000 compute units",
+    f"Program {RAYDIUM_PROGRAM_ID} success",
+]
+
+
+@dataclass
+class TrafficProfile:
+    rate: float = 200             # 穩定期每秒通知數
+    duration: float = 30          # 秒
+    pool_every: int = 500         # 每 N 則通知注入一筆 initialize2，0 為不注入
+    burst_every: float = 0        # 每隔幾秒一次突發，0 為無
+    burst_size: int = 0           # 突發時一次送出的通知數
+    disconnect_every: float = 0   # 每隔幾秒斷開所有 WebSocket 連線，0 為不斷線
+    seed: int = 7
+
+
+@dataclass
+class InjectedPool:
+    signature: str
+    pool: str
+    coin_mint: str
+    slot: int
+    sent_at: float
+
+
+class _Client:
+    __slots__ = ("websocket", "subscriptions", "logs")
+
+    def __init__(self, websocket: ServerConnection):
+        self.websocket = websocket
+        self.subscriptions: Dict[int, str] = {}
+        self.logs: Set[int] = set()
+
+
+class StandinRpc:
+    def __init__(self, host: str = "127.0.0.1", rpc_port: int = 18899, ws_port: int = 18900,
+                 rpc_latency: float = 0.0, replay: Optional[List[Dict]] = None,
+                 replay_transactions: Optional[Dict[str, Dict]] = None):
+        self.host = host
+        self.rpc_port = rpc_port
+        self.ws_port = ws_port
+        self.rpc_latency = rpc_latency
+        # 重放: logsNotification 的 result.value 列表，與簽名 -> getTransaction result
+        self.replay = replay or []
+        self.transactions: Dict[str, Dict] = dict(replay_transactions or {})
+        self.injected: Dict[str, InjectedPool] = {}
+        self.clients: Set[_Client] = set()
+        self.subscribed = asyncio.Event()
+        self.sent = 0
+        self.requests: Dict[str, int] = {}
+        # 產生過的簽名 -> slot，按產生順序 (由舊到新)；pool_history 只有 initialize2
+        self.history: "OrderedDict[str, int]" = OrderedDict()
+        self.pool_history: "OrderedDict[str, int]" = OrderedDict()
+        self.started = time.time()
+        self._sub_ids = itertools.count(1)
+        self._rng = random.Random(7)
+        self._http_server: Optional[asyncio.AbstractServer] = None
+        self._ws_server = None
+
+    @property
+    def rpc_url(self) -> str:
+        return f"http://{self.host}:{self.rpc_port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}"
+
+    @property
+    def slot(self) -> int:
+        return 300_000_000 + int((time.time() - self.started) * SLOTS_PER_SECOND)
+
+    def _key(self, length: int = 44) -> str:
+        return "".join(self._rng.choices(B58, k=length))
+
+    async def start(self) -> None:
+        self._http_server = await asyncio.start_server(self._handle_http, self.host, self.rpc_port)
+        self._ws_server = await serve(self._handle_ws, self.host, self.ws_port, max_size=None)
+
+    async def stop(self) -> None:
+        if self._ws_server is not None:
+            self._ws_server.close()
+            await self._ws_server.wait_closed()
+        if self._http_server is not None:
+            self._http_server.close()
+            await self._http_server.wait_closed()
+
+    # ---------- WebSocket ----------
+
+    async def _handle_ws(self, websocket: ServerConnection) -> None:
+        client = _Client(websocket)
+        self.clients.add(client)
+        try:
+            async for message in websocket:
+                request = json.loads(message)
+                method = request.get("method", "")
+                self.requests[method] = self.requests.get(method, 0) + 1
+                if method.endswith("Unsubscribe"):
+                    subscription = request["params"][0]
+                    client.subscriptions.pop(subscription, None)
+                    client.logs.discard(subscription)
+                    result = True
+                elif method.endswith("Subscribe"):
+                    result = next(self._sub_ids)
+                    client.subscriptions[result] = method
+                    if method == "logsSubscribe" and self._mentions_raydium(request.get("params")):
+                        # 其他建池程序的訂閱只回覆，不推送
+                        client.logs.add(result)
+                        self.subscribed.set()
+                else:
+                    await websocket.send(json.dumps({"jsonrpc": "2.0", "id": request.get("id"),
+                                                     "error": {"code": -32601, "message": "Method not found"}}))
+                    continue
+                await websocket.send(json.dumps({"jsonrpc": "2.0", "result": result, "id": request.get("id")}))
+        except ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(client)
+            if not any(other.logs for other in self.clients):
+                self.subscribed.clear()
+
+    @staticmethod
+    def _mentions_raydium(params) -> bool:
+        log_filter = params[0] if params else "all"
+        return not isinstance(log_filter, dict) or RAYDIUM_PROGRAM_ID in log_filter.get("mentions", [])
+
+    async def _broadcast_logs(self, value: Dict) -> None:
+        context = {"slot": self.slot}
+        self.history[value["signature"]] = context["slot"]
+        if len(self.history) > HISTORY_SIZE:
+            self.history.popitem(last=False)
+        if value["signature"] in self.injected:
+            self.pool_history[value["signature"]] = context["slot"]
+            if len(self.pool_history) > HISTORY_SIZE:
+                self.pool_history.popitem(last=False)
+        for client in list(self.clients):
+            for subscription in list(client.logs):
+                message = json.dumps({"jsonrpc": "2.0", "method": "logsNotification", "params": {
+                    "result": {"context": context, "value": value}, "subscription": subscription,
+                }})
+                try:
+                    await client.websocket.send(message)
+                    self.sent += 1
+                except ConnectionClosed:
+                    self.clients.discard(client)
+                    break
+
+    async def disconnect_all(self) -> None:
+        for client in list(self.clients):
+            await client.websocket.close(code=1012, reason="stand-in restart")
+
+    # ---------- 流量 ----------
+
+    def _inject_pool(self) -> Dict:
+        signature = self._key(88)
+        pool = InjectedPool(signature, self._key(), self._key(), self.slot, time.time())
+        self.injected[signature] = pool
+        self.transactions[signature] = self._pool_transaction(pool)
+        return {"signature": signature, "err": None, "logs": INIT_LOGS}
+
+    def _next_value(self, index: int, profile: TrafficProfile) -> Dict:
+        if profile.pool_every and index % profile.pool_every == profile.pool_every - 1:
+            return self._inject_pool()
+        if self.replay:
+            value = self.replay[index % len(self.replay)]
+            signature = value.get("signature")
+            # 重放資料中有對應交易的 initialize2 才算 ground truth
+            if signature in self.transactions and any("initialize2" in log for log in value.get("logs") or []):
+                self.injected.setdefault(signature, InjectedPool(signature, "", "", self.slot, time.time()))
+            return value
+        return {"signature": self._key(88), "err": None, "logs": SWAP_LOGS}
+
+    async def play(self, profile: TrafficProfile) -> None:
+        """按設定推送通知，duration 秒後返回"""
+        self._rng = random.Random(profile.seed)
+        start = last = time.perf_counter()
+        next_burst = profile.burst_every or float("inf")
+        next_disconnect = profile.disconnect_every or float("inf")
+        credit = 0.0
+        index = 0
+        while True:
+            now = time.perf_counter()
+            elapsed = now - start
+            if elapsed >= profile.duration:
+                break
+            credit += (now - last) * profile.rate
+            last = now
+            count = int(credit)
+            credit -= count
+            if elapsed >= next_burst:
+                count += profile.burst_size
+                next_burst += profile.burst_every
+            if elapsed >= next_disconnect:
+                next_disconnect += profile.disconnect_every
+                await self.disconnect_all()
+            for _ in range(count):
+                await self._broadcast_logs(self._next_value(index, profile))
+                index += 1
+            await asyncio.sleep(0.005)
+
+    # ---------- HTTP JSON-RPC ----------
+
+    def _initialize2_data(self) -> str:
+        """指令 tag 1 (initialize2) 加上隨機的 nonce / open_time / 數量"""
+        return b58encode(bytes([1]) + bytes(self._rng.getrandbits(8) for _ in range(25))).decode()
+
+    def _pool_transaction(self, pool: InjectedPool) -> Dict:
+        """initialize2 的 jsonParsed 交易 (帳戶順序同 Raydium AMM v4)"""
+        lp_mint, coin_vault, pc_vault = self._key(), self._key(), self._key()
+        accounts = [
+            TOKEN_PROGRAM_ID, self._key(), "11111111111111111111111111111111", self._key(),
+            pool.pool, self._key(), self._key(), lp_mint, pool.coin_mint, WSOL,
+            coin_vault, pc_vault, self._key(), AMM_CONFIG, CREATE_FEE_DESTINATION, self._key(),
+            self._key(), self._key(), self._key(), self._key(), self._key(),
+        ]
+        signer = accounts[17]
+        keys = [signer, coin_vault, pc_vault, lp_mint, pool.pool, RAYDIUM_PROGRAM_ID]
+        return {
+            "slot": pool.slot,
+            "blockTime": int(pool.sent_at),
+            "transaction": {
+                "signatures": [pool.signature],
+                "message": {
+                    "accountKeys": [{"pubkey": key, "signer": i == 0, "writable": i < 5, "source": "transaction"}
+                                    for i, key in enumerate(keys)],
+                    "instructions": [{"programId": RAYDIUM_PROGRAM_ID, "accounts": accounts,
+                                      "data": self._initialize2_data(), "stackHeight": None}],
+                },
+            },
+            "meta": {
+                "err": None,
+                "logMessages": INIT_LOGS,
+                "preTokenBalances": [],
+                "postTokenBalances": [
+                    {"accountIndex": 1, "mint": pool.coin_mint,
+                     "uiTokenAmount": {"amount": "206900000000000", "decimals": 6}},
+                    {"accountIndex": 2, "mint": WSOL,
+                     "uiTokenAmount": {"amount": "85000000000", "decimals": 9}},
+                ],
+            },
+        }
+
+    def _swap_transaction(self, signature: str, slot: int) -> Dict:
+        return {
+            "slot": slot,
+            "blockTime": int(self.started + (slot - 300_000_000) / SLOTS_PER_SECOND),
+            "transaction": {"signatures": [signature], "message": {"accountKeys": [], "instructions": []}},
+            "meta": {"err": None, "logMessages": SWAP_LOGS},
+        }
+
+    def signatures_for_address(self, address: str, options: Dict) -> List[Dict]:
+        if address == RAYDIUM_PROGRAM_ID:
+            history = self.history
+        elif address == CREATE_FEE_DESTINATION:
+            history = self.pool_history
+        else:
+            return []
+        limit = min(options.get("limit", 1000), 1000)
+        before = options.get("before")
+        until = options.get("until")
+        result = []
+        started = before is None
+        for signature in reversed(history):
+            if not started:
+                started = signature == before
+                continue
+            if signature == until:
+                break
+            slot = history[signature]
+            result.append({"signature": signature, "slot": slot, "err": None, "memo": None,
+                           "blockTime": int(self.started + (slot - 300_000_000) / SLOTS_PER_SECOND),
+                           "confirmationStatus": "finalized"})
+            if len(result) >= limit:
+                break
+        return result
+
+    def rpc_result(self, method: str, params):
+        if method == "getTransaction":
+            signature = params[0]
+            if signature in self.transactions:
+                return self.transactions[signature]
+            if signature in self.history:
+                return self._swap_transaction(signature, self.history[signature])
+            return None
+        if method == "getSignaturesForAddress":
+            return self.signatures_for_address(params[0], params[1] if len(params) > 1 else {})
+        if method == "getAsset":
+            return {"content": {"metadata": {"symbol": "SYN" + params["id"][:4]}}}
+        if method == "getMultipleAccounts":
+            return {"context": {"slot": self.slot}, "value": [None] * len(params[0])}
+        if method == "getSlot":
+            return self.slot
+        raise KeyError(method)
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # HTTP/1.1 keep-alive: 同一條連線上連續處理請求
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                request = json.loads(body)
+                method = request.get("method", "")
+                self.requests[method] = self.requests.get(method, 0) + 1
+                if self.rpc_latency:
+                    await asyncio.sleep(self.rpc_latency)
+                try:
+                    response = {"jsonrpc": "2.0", "id": request.get("id"),
+                                "result": self.rpc_result(method, request.get("params"))}
+                except KeyError:
+                    response = {"jsonrpc": "2.0", "id": request.get("id"),
+                                "error": {"code": -32601, "message": "Method not found"}}
+                payload = json.dumps(response).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n" % len(payload) + payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def load_replay(path: Optional[str]) -> List[Dict]:
+    """每行一則 logsNotification (完整訊息或只有 params.result.value)"""
+    if not path:
+        return []
+    values = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                message = json.loads(line)
+                values.append(message.get("params", {}).get("result", {}).get("value", message))
+    return values
+
+
+def load_transactions(path: Optional[str]) -> Dict[str, Dict]:
+    """每行一個 getTransaction (jsonParsed) 響應"""
+    if not path:
+        return {}
+    transactions = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                result = json.loads(line).get("result")
+                if result:
+                    transactions[result["transaction"]["signatures"][0]] = result
+    return transactions
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--rpc-port", type=int, default=18899)
+    parser.add_argument("--ws-port", type=int, default=18900)
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="seconds added to every HTTP RPC call")
+    parser.add_argument("--pool-every", type=int, default=500, help="inject initialize2 every N notifications")
+    parser.add_argument("--burst-every", type=float, default=0, help="seconds between bursts (0 = none)")
+    parser.add_argument("--burst-size", type=int, default=0, help="notifications per burst")
+    parser.add_argument("--disconnect-every", type=float, default=0, help="seconds between forced disconnects")
+    parser.add_argument("--replay", help="JSONL of captured logsNotification messages")
+    parser.add_argument("--replay-transactions", help="JSONL of getTransaction responses for replayed signatures")
+
+
+async def _serve(args) -> None:
+    standin = StandinRpc(args.host, args.rpc_port, args.ws_port, args.rpc_latency,
+                         load_replay(args.replay), load_transactions(args.replay_transactions))
+    await standin.start()
+    print(f"stand-in RPC {standin.rpc_url}  WebSocket {standin.ws_url}")
+    profile = TrafficProfile(args.rate, args.duration, args.pool_every, args.burst_every, args.burst_size,
+                             args.disconnect_every)
+    try:
+        while True:
+            await standin.subscribed.wait()
+            print("logsSubscribe received, streaming")
+            await standin.play(profile)
+            print(f"sent {standin.sent} notifications, {len(standin.injected)} pools injected")
+            if not args.loop:
+                break
+    finally:
+        await standin.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in Solana RPC / WebSocket for RaydiumMonitor")
+    add_arguments(parser)
+    parser.add_argument("--rate", type=float, default=200, help="notifications per second")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--loop", action="store_true", help="keep streaming after duration")
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,21 +4,40 @@ os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 
 from dotenv import load_dotenv
 import asyncio
-import sqlite3
 import logging
 import traceback
 from datetime import datetime
 import random
 import json
+import struct
 import sys
+import time
+import heapq
+import argparse
+import re
+from pathlib import Path
+import base58
+import msgspec
 from transformers import pipeline
 from transformers import logging as transformers_logging
 from playwright.async_api import async_playwright
-from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
 from httpx import HTTPStatusError
 import warnings
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from solana_bot.backfill import GapBackfill
+from solana_bot.bus import TOKEN_CREATED
+from solana_bot.http_server import LocalHttpServer, json_response
+from solana_bot.logging_utils import setup_logging
+from solana_bot.metrics import add_metrics_route, counter, gauge, histogram
+from solana_bot.rpc_pool import RpcPool
+from solana_bot.rpc_types import logs_params_decoder, signatures_decoder, transaction_with_inner_decoder
+from solana_bot.sentiment_cache import SentimentCache
+from solana_bot.text_utils import text_hash
+from solana_bot.token_store import TokenStore
+from solana_bot.ws_mux import WsMultiplexer
+
 # 設置警告和日誌
 warnings.filterwarnings('ignore')
 
@@ -34,15 +53,38 @@ logging.getLogger("solana.rpc.async_api").setLevel(logging.WARNING)
 
 load_dotenv()
 
-# Solana RPC endpoint
-RPC_ENDPOINTS = os.getenv('RPC_ENDPOINTS')
+# Solana RPC 端點，逗號分隔，失敗時依序切換
+RPC_ENDPOINTS = [endpoint.strip() for endpoint in os.getenv('RPC_ENDPOINTS', '').split(',') if endpoint.strip()]
+# 常駐模式以 logsSubscribe 接收 Pump.fun 日誌；未設定時從 RPC 地址推斷
+WS_ENDPOINTS = [endpoint.strip() for endpoint in os.getenv('WS_ENDPOINTS', '').split(',') if endpoint.strip()] or [
+    "ws" + endpoint[4:] for endpoint in RPC_ENDPOINTS if endpoint.startswith("http")
+]
 PUMP_FUN_PROGRAM_IDS = [
     Pubkey.from_string(os.getenv('PUMP_FUN_PROGRAM_ID')),
 ]
+PUMP_FUN_PROGRAM_ID_STRS = {str(program_id) for program_id in PUMP_FUN_PROGRAM_IDS}
 TWITTER_USERNAME = os.getenv('TWITTER_USERNAME')
 TWITTER_PASSWORD = os.getenv('TWITTER_PASSWORD')
 TWITTER_EMAIL = os.getenv('TWITTER_EMAIL')
 
+# 常駐模式設定
+DAEMON_POLL_INTERVAL = int(os.getenv('DAEMON_POLL_INTERVAL', '15'))  # 沒有 WebSocket 時掃描 Pump.fun 間隔(秒)
+PUMPFUN_SCAN_MAX_SIGNATURES = int(os.getenv('PUMPFUN_SCAN_MAX_SIGNATURES', '5000'))  # 每輪掃描/回補的簽名上限
+PUMPFUN_SCAN_CONCURRENCY = int(os.getenv('PUMPFUN_SCAN_CONCURRENCY', '8'))  # 掃描時同時拉取的交易數
+# 代幣創建後的重新分析時間點(秒)，用於建立提及量時間序列
+REANALYSIS_SCHEDULE = [int(x) for x in os.getenv('REANALYSIS_SCHEDULE', '60,300,1800').split(',') if x.strip()]
+STATUS_PORT = int(os.getenv('STATUS_PORT', '8765'))  # 本機狀態端點 (/status 與 /metrics)
+
+# 運行指標
+INFERENCE_LATENCY = histogram("sentiment_inference_seconds", "Sentiment model call latency per batch")
+INFERENCE_TEXTS = counter("sentiment_inference_texts_total", "Texts scored by the sentiment model")
+TOKENS_DISCOVERED = counter("pumpfun_tokens_discovered_total", "New Pump.fun tokens written to the database")
+ANALYSES = counter("pumpfun_social_analyses_total", "Completed social analyses", ["result"])
+LOG_NOTIFICATIONS = counter("pumpfun_log_notifications_total", "Pump.fun logsNotification messages received")
+CREATE_NOTIFICATIONS = counter("pumpfun_create_notifications_total",
+                               "Pump.fun log notifications carrying a create instruction")
+LOG_DECODE_ERRORS = counter("pumpfun_log_decode_errors_total", "Pump.fun log notifications that did not decode")
+
 # 檢查必要的環境變量
 required_env_vars = ['RPC_ENDPOINTS', 'PUMP_FUN_PROGRAM_ID', 'TWITTER_USERNAME', 'TWITTER_PASSWORD', 'TWITTER_EMAIL']
 missing_env_vars = [var for var in required_env_vars if not os.getenv(var)]
@@ -50,65 +92,120 @@ if missing_env_vars:
     raise EnvironmentError(f"Missing required environment variables: {', '.join(missing_env_vars)}")
 
 # 配置日誌
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('token_detector.log', encoding='utf-8')
-    ]
-)
+setup_logging('token_detector.log', level=logging.INFO, console_handler=logging.StreamHandler(sys.stdout))
 logger = logging.getLogger(__name__)
 
 
-def adapt_datetime(ts):
-    return ts.isoformat()
+# 一次從頁面取出所有推文的連結、時間與內容，避免逐個元素往返
+EXTRACT_TWEETS_JS = """
+() => Array.from(document.querySelectorAll("[data-testid='tweet']")).map(tweet => {
+    const time = tweet.querySelector("a[href*='/status/'] time");
+    const link = time ? time.closest('a') : null;
+    const text = tweet.querySelector("[data-testid='tweetText']");
+    return {
+        href: link ? link.getAttribute('href') : null,
+        time: time ? time.getAttribute('datetime') : null,
+        text: text ? text.innerText : null
+    };
+})
+"""
+TWEET_URL_RE = re.compile(r"/([^/]+)/status/(\d+)")
+
+# Pump.fun create 指令: Anchor discriminator = sha256("global:create")[:8]
+PUMP_FUN_CREATE_DISCRIMINATOR = bytes([24, 30, 200, 40, 5, 28, 7, 119])
+# 只有 create 指令會輸出這行日誌，可在解碼前快速過濾買賣交易
+PUMP_FUN_CREATE_LOG = "Program log: Instruction: Create"
+# create 指令帳戶順序: mint, mint_authority, bonding_curve, associated_bonding_curve,
+# global, mpl_token_metadata, metadata, user, ...
+PUMP_FUN_CREATE_ACCOUNT_INDEX = {'mint': 0, 'bonding_curve': 2, 'user': 7}
+
+
+def _read_borsh_string(data, offset):
+    (length,) = struct.unpack_from('<I', data, offset)
+    offset += 4
+    if offset + length > len(data):
+        raise ValueError("borsh string 長度超出指令資料")
+    return data[offset:offset + length].decode('utf-8', errors='replace'), offset + length
+
+
+def decode_pump_fun_create(data, accounts):
+    """解碼 Pump.fun create 指令，非 create 指令返回 None"""
+    if len(data) < 8 or data[:8] != PUMP_FUN_CREATE_DISCRIMINATOR:
+        return None
+    if len(accounts) <= PUMP_FUN_CREATE_ACCOUNT_INDEX['user']:
+        return None
+
+    try:
+        offset = 8
+        name, offset = _read_borsh_string(data, offset)
+        symbol, offset = _read_borsh_string(data, offset)
+        uri, offset = _read_borsh_string(data, offset)
+    except (struct.error, ValueError):
+        return None
 
+    # 新版 IDL 在 uri 之後多了 creator 參數，舊版以簽名者 (user) 為創建者
+    if len(data) >= offset + 32:
+        creator = str(Pubkey.from_bytes(data[offset:offset + 32]))
+    else:
+        creator = str(accounts[PUMP_FUN_CREATE_ACCOUNT_INDEX['user']])
 
-sqlite3.register_adapter(datetime, adapt_datetime)
+    return {
+        'mint_address': str(accounts[PUMP_FUN_CREATE_ACCOUNT_INDEX['mint']]),
+        'bonding_curve': str(accounts[PUMP_FUN_CREATE_ACCOUNT_INDEX['bonding_curve']]),
+        'creator': creator,
+        'name': name,
+        'symbol': symbol,
+        'uri': uri,
+    }
+
+
+def _iter_program_instructions(tx):
+    """依序產生交易中 (含 CPI 內部指令) 未被 RPC 解析的指令: (program_id, accounts, data)"""
+    instructions = list(tx.transaction.message.instructions)
+    meta = tx.meta
+    if meta and meta.inner_instructions:
+        for inner in meta.inner_instructions:
+            instructions.extend(inner.instructions)
+
+    for instruction in instructions:
+        # jsonParsed 編碼下，未知程序的指令帶 base58 data，已解析的指令沒有
+        if not instruction.data:
+            continue
+        yield instruction.program_id, instruction.accounts, base58.b58decode(instruction.data)
 
 
 class SolanaTokenDetector:
-    def __init__(self, search_limit: int = 100):
+    def __init__(self, search_limit: int = 100, rpc=None, bus=None, ws=None):
+        # rpc (RpcPool) / bus (EventBus) / ws (WsMultiplexer) 由 solana_bot.host 傳入時，
+        # RPC 請求走共用連線池、日誌訂閱走共用連線，新代幣發布到事件匯流排；
+        # 單獨運行時自建連線池，WebSocket 只在常駐模式建立
         self.search_limit = search_limit
-        self.conn = sqlite3.connect("solana_tokens.db")
-        self._init_db()
+        self._owns_rpc = rpc is None
+        self.rpc = rpc or RpcPool(RPC_ENDPOINTS)
+        self.ws = ws
+        self.bus = bus
+        self.store = TokenStore()
         logger.info("Loading NLP model...")
         self.sentiment_analyzer = pipeline(
             "sentiment-analysis",
             model="distilbert-base-uncased-finetuned-sst-2-english"
         )
+        # 重複的喊單推文只需查雜湊，不必重新推論
+        self.sentiment_cache = SentimentCache(self._run_sentiment_model, self.store.conn)
         self.max_retries = 5
         self.retry_delay = 3
         self.cookie_file = "twitter_cookies.json"
-
-    def _init_db(self):
-        with self.conn:
-            table_check = self.conn.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name='tokens'
-            """).fetchone()
-
-            if not table_check:
-                self.conn.execute("""
-                    CREATE TABLE tokens (
-                        mint_address TEXT PRIMARY KEY,
-                        program_id TEXT DEFAULT '',
-                        first_seen DATETIME,
-                        transaction_signature TEXT DEFAULT '',
-                        social_analyzed INTEGER DEFAULT 0
-                    )
-                """)
-
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS social_data (
-                    mint_address TEXT,
-                    timestamp DATETIME,
-                    mentions INTEGER,
-                    sentiment REAL,
-                    FOREIGN KEY(mint_address) REFERENCES tokens(mint_address)
-                )
-            """)
+        self._playwright = None
+        self.browser = None
+        self.page = None
+        # 程序 -> 已掃描到的最新 slot；之後的掃描往回翻頁到這裡
+        self.last_slots = {}
+        # 翻頁、單輪上限與截斷後的續掃由 GapBackfill 處理，處理函數把找到的代幣收進 _found
+        self.scanner = GapBackfill(self._rpc_post, self._scan_signature, commitment="confirmed",
+                                   concurrency=PUMPFUN_SCAN_CONCURRENCY, max_signatures=PUMPFUN_SCAN_MAX_SIGNATURES)
+        self._found = []
+        self._newest_slot = 0
+        self._scan_lock = asyncio.Lock()
 
     async def save_cookies(self, context):
         cookies = await context.cookies()
@@ -172,14 +269,120 @@ class SolanaTokenDetector:
             return False
 
     def get_unanalyzed_tokens(self):
-        with self.conn:
-            cur = self.conn.execute("""
-                SELECT mint_address 
-                FROM tokens 
-                WHERE social_analyzed = 0
-                ORDER BY first_seen DESC
+        return self.store.unanalyzed_tokens()
+
+    async def start_browser(self):
+        """啟動瀏覽器並登入 Twitter，返回可重複使用的頁面"""
+        if self.page is not None:
+            return self.page
+
+        self._playwright = await async_playwright().start()
+        try:
+            self.browser = await self._playwright.chromium.launch(headless=True)
+            context = await self.browser.new_context(
+                viewport={'width': 720, 'height': 480},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            )
+
+            await context.add_init_script("""
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                });
             """)
-            return [row[0] for row in cur.fetchall()]
+
+            page = await context.new_page()
+
+            if not await self.login_twitter(page):
+                logger.error("Twitter 登錄失敗")
+                await self.close_browser()
+                return None
+
+            self.page = page
+            return page
+        except Exception:
+            await self.close_browser()
+            raise
+
+    async def close_browser(self):
+        self.page = None
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logger.warning(f"關閉瀏覽器出錯: {str(e)}")
+            self.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def _run_sentiment_model(self, contents):
+        with INFERENCE_LATENCY.time():
+            results = self.sentiment_analyzer([content[:512] for content in contents])
+        INFERENCE_TEXTS.inc(len(contents))
+        return [
+            sentiment["score"] if sentiment["label"] == "POSITIVE" else 1 - sentiment["score"]
+            for sentiment in results
+        ]
+
+    async def analyze_mint(self, page, mint_address):
+        """搜索單個代幣的推文，只對沒見過的推文做情感分析並寫入一筆 social_data 記錄"""
+        logger.info(f"分析代幣: {mint_address}")
+        seen_ids = self.store.seen_tweet_ids(mint_address)
+        collected = {}
+
+        await page.goto(f"https://x.com/search?q={mint_address}&src=typed_query&f=live")
+        await asyncio.sleep(3)
+
+        await page.wait_for_selector('[data-testid="primaryColumn"]', timeout=10000)
+
+        # 「最新」排序下由新到舊，遇到已處理過的推文代表之後的都看過了
+        scroll_attempts = 10
+        for _ in range(scroll_attempts):
+            reached_seen = False
+            added = 0
+            for item in await page.evaluate(EXTRACT_TWEETS_JS):
+                match = TWEET_URL_RE.search(item.get('href') or '')
+                if not match or not item.get('text'):
+                    continue
+                author, tweet_id = match.groups()
+                if tweet_id in seen_ids:
+                    reached_seen = True
+                    continue
+                if tweet_id not in collected:
+                    collected[tweet_id] = {
+                        'tweet_id': tweet_id,
+                        'author': author,
+                        'text': item['text'],
+                        'tweet_time': item.get('time') or '',
+                    }
+                    added += 1
+
+            if reached_seen or added == 0 or len(collected) >= self.search_limit:
+                break
+
+            await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+            await asyncio.sleep(2)
+
+        new_tweets = list(collected.values())[:self.search_limit]
+        logger.info(f"找到 {len(new_tweets)} 條新推文 (已處理過 {len(seen_ids)} 條)")
+
+        scored = []
+        try:
+            scores = self.sentiment_cache.score_batch([tweet['text'] for tweet in new_tweets])
+            for tweet, score in zip(new_tweets, scores):
+                tweet['sentiment'] = score
+                tweet['text_hash'] = text_hash(tweet['text'])
+                scored.append(tweet)
+        except Exception as e:
+            logger.warning(f"處理推文出錯: {str(e)}")
+
+        total_tweets, avg_sentiment = self.store.add_tweets(mint_address, scored)
+
+        # mentions 記錄本次新增的推文數，sentiment 為累計平均
+        self.store.record_social_data(mint_address, len(scored), avg_sentiment)
+
+        logger.info(f"完成代幣 {mint_address} 的分析 (累計 {total_tweets} 條推文)")
+        return len(scored), avg_sentiment
 
     async def analyze_social_data_batch(self, mint_addresses):
         if not mint_addresses:
@@ -188,133 +391,75 @@ class SolanaTokenDetector:
 
         logger.info(f"開始批量分析 {len(mint_addresses)} 個代幣的社交數據")
 
+        # 常駐模式下瀏覽器已經登入，這裡只在單次運行時負責啟動與關閉
+        owns_browser = self.page is None
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    viewport={'width': 720, 'height': 480},
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
-
-                await context.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    });
-                """)
-
-                page = await context.new_page()
-
-                if not await self.login_twitter(page):
-                    logger.error("Twitter 登錄失敗，退出分析")
-                    await browser.close()
-                    return
-
-                for mint_address in mint_addresses:
-                    try:
-                        logger.info(f"分析代幣: {mint_address}")
-                        results = []
-
-                        await page.goto(f"https://x.com/search?q={mint_address}&src=typed_query&f=live")
-                        await asyncio.sleep(3)
-
-                        try:
-                            await page.wait_for_selector('[data-testid="primaryColumn"]', timeout=10000)
-
-                            scroll_attempts = 10
-                            last_tweet_count = 0
-                            for _ in range(scroll_attempts):
-                                await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                                await asyncio.sleep(2)
-
-                                tweets = await page.query_selector_all("[data-testid='tweet']")
-                                if len(tweets) == last_tweet_count:
-                                    break
-
-                                last_tweet_count = len(tweets)
-
-                            tweets = await page.query_selector_all("[data-testid='tweet']")
-                            logger.info(f"找到 {len(tweets)} 條推文")
-
-                            for tweet in tweets[:self.search_limit]:
-                                try:
-                                    tweet_text_element = await tweet.query_selector("[data-testid='tweetText']")
-                                    if tweet_text_element:
-                                        content = await tweet_text_element.inner_text()
-                                        sentiment = self.sentiment_analyzer(content[:512])[0]
-                                        sentiment_score = sentiment["score"] if sentiment["label"] == "POSITIVE" else 1 - sentiment["score"]
-                                        results.append({
-                                            "sentiment": sentiment_score
-                                        })
-                                except Exception as e:
-                                    logger.warning(f"處理推文出錯: {str(e)}")
-                                    continue
-
-                            total_mentions = len(results)
-                            avg_sentiment = sum(r["sentiment"] for r in results) / total_mentions if total_mentions else 0
-
-                            with self.conn:
-                                self.conn.execute("""
-                                    INSERT INTO social_data 
-                                    (mint_address, timestamp, mentions, sentiment)
-                                    VALUES (?, ?, ?, ?)
-                                """, (mint_address, datetime.now(), total_mentions, avg_sentiment))
-
-                                self.conn.execute("""
-                                    UPDATE tokens 
-                                    SET social_analyzed = 1 
-                                    WHERE mint_address = ?
-                                """, (mint_address,))
-
-                            logger.info(f"完成代幣 {mint_address} 的分析")
-
-                        except Exception as e:
-                            logger.error(f"搜索代幣 {mint_address} 時出錯: {str(e)}")
-                            continue
-
-                        await asyncio.sleep(2)
-
-                    except Exception as e:
-                        logger.error(f"處理代幣 {mint_address} 時出錯: {str(e)}")
-                        continue
+            page = await self.start_browser()
+            if page is None:
+                logger.error("Twitter 登錄失敗，退出分析")
+                return
+
+            for mint_address in mint_addresses:
+                try:
+                    await self.analyze_mint(page, mint_address)
+                except Exception as e:
+                    logger.error(f"搜索代幣 {mint_address} 時出錯: {str(e)}")
+                    continue
+
+                await asyncio.sleep(2)
 
-                await browser.close()
-                logger.info("完成所有代幣的社交分析")
+            logger.info("完成所有代幣的社交分析")
 
         except Exception as e:
             logger.error(f"批量社交分析過程中出錯: {str(e)}")
             logger.error(traceback.format_exc())
+        finally:
+            self.store.flush()
+            self.sentiment_cache.flush()
+            cache_stats = self.sentiment_cache.stats()
+            logger.info(
+                f"情感快取命中率: {cache_stats['hit_rate']:.1%} "
+                f"({cache_stats['memory_hits'] + cache_stats['disk_hits']}/{cache_stats['lookups']})"
+            )
+            if owns_browser:
+                await self.close_browser()
 
-    async def get_transaction_details(self, client: AsyncClient, sig: str):
+    async def get_transaction_details(self, sig: str):
         try:
-            tx_details = await client.get_transaction(
-                sig,
-                encoding="jsonParsed",
-                max_supported_transaction_version=0,
-                commitment="confirmed"
-            )
+            tx_params = [
+                str(sig),
+                {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"}
+            ]
+            # confirmed 的結果可能因分叉回滾改變，不寫入 RpcResponseCache
+            raw = await self._retry_with_backoff(self._rpc_post, "getTransaction", tx_params)
+
+            # 直接從 bytes 解碼需要的欄位，不經過 dict / solders 物件
+            tx = transaction_with_inner_decoder.decode(raw).result
+            if not tx:
+                return None
 
-            if not tx_details or not tx_details.value:
+            meta = tx.meta
+            if not meta or not meta.log_messages:
+                return None
+
+            # 大部分交易是既有代幣的買賣，沒有 create 日誌就不必解碼
+            if PUMP_FUN_CREATE_LOG not in meta.log_messages:
                 return None
 
-            tx_value = tx_details.value
             logger.info(f"=== 分析交易 {sig} ===")
 
-            if hasattr(tx_value, 'transaction'):
-                encoded_tx = tx_value.transaction
-                if hasattr(encoded_tx, 'meta'):
-                    meta = encoded_tx.meta
-                    if hasattr(meta, 'pre_token_balances'):
-                        pre_balances = meta.pre_token_balances
-                        if pre_balances:
-                            for balance in pre_balances:
-                                if hasattr(balance, 'mint'):
-                                    mint_address = balance.mint
-                                    logger.info(f"找到 Mint 地址: {mint_address}")
-                                    return {
-                                        'mint_address': mint_address,
-                                        'program_id': str(PUMP_FUN_PROGRAM_IDS[0]),
-                                        'signature': sig
-                                    }
+            for program_id, accounts, data in _iter_program_instructions(tx):
+                if program_id not in PUMP_FUN_PROGRAM_ID_STRS:
+                    continue
+                token_info = decode_pump_fun_create(data, accounts)
+                if token_info:
+                    logger.info(
+                        f"找到新代幣: {token_info['name']} ({token_info['symbol']}) "
+                        f"Mint 地址: {token_info['mint_address']}"
+                    )
+                    token_info['program_id'] = program_id
+                    token_info['signature'] = str(sig)
+                    return token_info
             return None
 
         except Exception as e:
@@ -322,59 +467,87 @@ class SolanaTokenDetector:
             logger.error(traceback.format_exc())
             return None
 
+    async def _rpc_post(self, method, params):
+        """發送 JSON-RPC 請求，返回原始響應 bytes"""
+        return await self.rpc.post(method, params)
+
+    async def close(self):
+        if self._owns_rpc:
+            await self.rpc.aclose()
+
     async def fetch_pumpfun_new_tokens(self):
-        self.latest_mints = []
-        async with AsyncClient(RPC_ENDPOINTS) as client:
+        self.latest_mints = await self.scan_pumpfun_signatures()
+
+    async def scan_pumpfun_signatures(self, limit: int = 10):
+        """掃描 Pump.fun 的交易，返回本次新寫入資料庫的 Mint 地址
+
+        第一次只看每個程序最新的 limit 筆；之後從最新的簽名往回翻頁到上次
+        掃描的 slot，單輪最多 PUMPFUN_SCAN_MAX_SIGNATURES 筆，超過時較舊的
+        區間留到下一輪 (GapBackfill.pending)。
+        """
+        found_tokens = []
+        logger.info("開始獲取 Pump.fun 最近的交易...")
+        for program_id in PUMP_FUN_PROGRAM_IDS:
+            address = str(program_id)
+            logger.info(f"正在檢查程序 ID: {program_id}")
             try:
-                logger.info("開始獲取 Pump.fun 最近的交易...")
-                for program_id in PUMP_FUN_PROGRAM_IDS:
-                    logger.info(f"正在檢查程序 ID: {program_id}")
-                    try:
-                        response = await self._retry_with_backoff(
-                            client.get_signatures_for_address,
-                            program_id,
-                            limit=10
-                        )
-
-                        if not response or not response.value:
-                            logger.info("未找到任何交易")
-                            continue
-
-                        logger.info(f"找到 {len(response.value)} 筆交易")
-
-                        for tx in response.value:
-                            try:
-                                token_info = await self.get_transaction_details(client, tx.signature)
-                                if token_info:
-                                    mint_address = str(token_info['mint_address'])
-                                    logger.info(f"處理 Mint 地址: {mint_address}")
-
-                                    with self.conn:
-                                        self.conn.execute("""
-                                            INSERT OR IGNORE INTO tokens 
-                                            (mint_address, program_id, first_seen, transaction_signature) 
-                                            VALUES (?, ?, ?, ?)
-                                        """, (
-                                            mint_address,
-                                            str(token_info['program_id']),
-                                            datetime.now(),
-                                            str(token_info['signature'])
-                                        ))
-                                    
-                                    self.latest_mints.append(mint_address)
-                                    logger.info("已保存到數據庫")
-
-                            except Exception as e:
-                                logger.error(f"處理交易時出錯: {str(e)}")
-                                continue
-
-                    except Exception as e:
-                        logger.error(f"獲取程序交易時出錯: {str(e)}")
-                        continue
-
+                if address in self.last_slots:
+                    found_tokens.extend(await self.scan_since(address, self.last_slots[address] + 1))
+                else:
+                    found_tokens.extend(await self._scan_latest(address, limit))
             except Exception as e:
-                logger.error(f"處理 Pump.fun 交易時出錯: {str(e)}")
-                traceback.print_exc()
+                logger.error(f"獲取程序交易時出錯: {str(e)}")
+        return self.save_tokens(found_tokens)
+
+    async def _scan_latest(self, address: str, limit: int):
+        raw = await self._retry_with_backoff(self._rpc_post, "getSignaturesForAddress", [address, {"limit": limit}])
+        response = signatures_decoder.decode(raw)
+        if response.error is not None:
+            raise RuntimeError(f"getSignaturesForAddress: {response.error}")
+        if not response.result:
+            logger.info("未找到任何交易")
+            return []
+        logger.info(f"找到 {len(response.result)} 筆交易")
+        self.last_slots[address] = response.result[0].slot
+        found_tokens = []
+        for info in response.result:
+            if info.err:
+                continue
+            token_info = await self.get_transaction_details(info.signature)
+            if token_info:
+                logger.info(f"處理 Mint 地址: {token_info['mint_address']}")
+                found_tokens.append(token_info)
+        return found_tokens
+
+    async def scan_since(self, address: str, from_slot: int, to_slot=None):
+        """翻頁掃描 address 在 from_slot 之後 (含) 的交易，返回找到的代幣資料"""
+        async with self._scan_lock:
+            self._found, self._newest_slot = [], 0
+            count = await self.scanner.run([address], from_slot, to_slot)
+            found_tokens, self._found = self._found, []
+            if self._newest_slot:
+                self.last_slots[address] = max(self.last_slots.get(address, 0), self._newest_slot)
+        logger.info(f"掃描 {count} 筆交易，找到 {len(found_tokens)} 個新代幣")
+        return found_tokens
+
+    async def _scan_signature(self, info) -> None:
+        """GapBackfill 的處理函數: getSignaturesForAddress 沒有日誌，只能逐筆拉取交易判斷"""
+        self._newest_slot = max(self._newest_slot, info.slot)
+        token_info = await self.get_transaction_details(info.signature)
+        if token_info:
+            logger.info(f"處理 Mint 地址: {token_info['mint_address']}")
+            self._found.append(token_info)
+
+    def save_tokens(self, found_tokens):
+        """寫入資料庫 (同一個交易) 並發布新代幣事件，返回新寫入的 Mint 地址"""
+        new_mints = self.store.add_tokens(found_tokens)
+        TOKENS_DISCOVERED.inc(len(new_mints))
+        if new_mints:
+            logger.info(f"已保存 {len(new_mints)} 個新代幣到數據庫")
+            if self.bus:
+                for mint_address in new_mints:
+                    self.bus.publish(TOKEN_CREATED, {'mint': mint_address})
+        return new_mints
 
     async def _retry_with_backoff(self, func, *args, **kwargs):
         for attempt in range(self.max_retries):
@@ -398,28 +571,250 @@ class SolanaTokenDetector:
 
         print("\n=== 本次新找到的 Mint 地址 ===")
 
-        with self.conn:
-            for mint_address in self.latest_mints:
-                mint_address = str(mint_address)  
-                cur = self.conn.execute("""
-                    SELECT 
-                        SUM(s.mentions) as total_mentions, 
-                        AVG(s.sentiment) as avg_sentiment
-                    FROM tokens t
-                    LEFT JOIN social_data s ON t.mint_address = s.mint_address
-                    WHERE t.mint_address = ?
-                """, (mint_address,))
-                
-                result = cur.fetchone()
-                total_mentions = result[0] if result[0] is not None else 0
-                avg_sentiment = result[1] if result[1] is not None else 0.00
-
-                print(f"\nMint 地址: {mint_address}")
-                print(f"社交提及: {total_mentions}")
-                print(f"情感指數: {avg_sentiment:.2f}/1.0")
+        for mint_address, name, symbol, total_mentions, avg_sentiment in self.store.social_summary(self.latest_mints):
+            print(f"\nMint 地址: {mint_address}")
+            if symbol:
+                print(f"代幣: {name} ({symbol})")
+            print(f"社交提及: {total_mentions}")
+            print(f"情感指數: {avg_sentiment:.2f}/1.0")
+
+
+class TokenDetectorDaemon:
+    """常駐模式: 保持模型與已登入的瀏覽器，持續發現新代幣並按衰減節奏重新分析
+
+    detector 有 WsMultiplexer 時以 logsSubscribe 接收 Pump.fun 日誌，只對帶
+    create 日誌的交易拉取詳情，重連後翻頁回補斷線期間的交易；否則每
+    poll_interval 秒翻頁掃描一次。owns_ws 為 True 時由本物件運行連線
+    (單獨運行)，solana_bot.host 傳入的共用連線由 host 運行。
+    """
+
+    def __init__(self, detector: SolanaTokenDetector, poll_interval: int = DAEMON_POLL_INTERVAL,
+                 schedule=None, status_port: int = STATUS_PORT, owns_ws: bool = False):
+        self.detector = detector
+        self.poll_interval = poll_interval
+        self.owns_ws = owns_ws
+        # 帶 create 日誌的簽名，由 stream_loop 逐筆拉取交易
+        self.creates: asyncio.Queue = asyncio.Queue()
+        self.last_slot = 0
+        self.schedule = schedule or REANALYSIS_SCHEDULE
+        self.status_server = LocalHttpServer(port=status_port)
+        self.status_server.route('/status', lambda query: json_response(self.status()))
+        add_metrics_route(self.status_server)
+        gauge("pumpfun_pending_analyses", "Analyses waiting in the schedule queue", callback=lambda: len(self.queue))
+        gauge("pumpfun_tracked_mints", "Mints still on the re-analysis schedule", callback=lambda: len(self.queued_mints))
+        # (到期時間, mint 地址, 第幾次分析)
+        self.queue = []
+        self.queued_mints = set()
+        self.wakeup = asyncio.Event()
+        self.is_running = False
+        self.started_at = time.time()
+        self.stats = {
+            'polls': 0,
+            'tokens_discovered': 0,
+            'analyses': 0,
+            'analysis_errors': 0,
+            'browser_restarts': 0,
+            'last_poll': None,
+            'last_analysis': None,
+            'last_error': None,
+        }
+
+    def schedule_mint(self, mint_address, created_at, stage=0):
+        if stage >= len(self.schedule):
+            self.queued_mints.discard(mint_address)
+            return
+        heapq.heappush(self.queue, (created_at + self.schedule[stage], mint_address, stage))
+        self.queued_mints.add(mint_address)
+        self.wakeup.set()
+
+    def on_pool_created(self, event):
+        """新池子事件 (solana_bot.host): 代幣寫入資料庫並立即排入第一次分析"""
+        mint_address = event['mint']
+        self.detector.store.add_tokens([{
+            'mint_address': mint_address,
+            'program_id': event.get('program_id', ''),
+            'transaction_signature': event.get('signature', ''),
+            'symbol': event.get('token_symbol', ''),
+        }])
+        if mint_address not in self.queued_mints:
+            self.schedule_mint(mint_address, time.time() - self.schedule[0])
+
+    def status(self):
+        next_due = self.queue[0][0] - time.time() if self.queue else None
+        return {
+            'running': self.is_running,
+            'uptime_seconds': round(time.time() - self.started_at),
+            'browser_ready': self.detector.page is not None,
+            'pending_analyses': len(self.queue),
+            'tracked_mints': len(self.queued_mints),
+            'next_analysis_in_seconds': round(next_due, 1) if next_due is not None else None,
+            'mode': 'stream' if self.detector.ws else 'poll',
+            'poll_interval': self.poll_interval,
+            'last_slot': self.last_slot,
+            'pending_creates': self.creates.qsize(),
+            'scan_pending_slots': self.detector.scanner.pending_slots,
+            'schedule': self.schedule,
+            'sentiment_cache': self.detector.sentiment_cache.stats(),
+            **self.stats,
+        }
+
+    def add_new_mints(self, new_mints):
+        now = time.time()
+        for mint_address in new_mints:
+            if mint_address not in self.queued_mints:
+                self.schedule_mint(mint_address, now)
+        self.stats['tokens_discovered'] += len(new_mints)
+
+    def on_logs(self, params):
+        """logsSubscribe 的通知回調 (在連線讀取循環中)，只把帶 create 日誌的簽名排入佇列"""
+        try:
+            notification = logs_params_decoder.decode(params)
+        except msgspec.DecodeError as e:
+            LOG_DECODE_ERRORS.inc()
+            logger.warning(f"無法解碼 Pump.fun 日誌通知: {str(e)}")
+            return
+        LOG_NOTIFICATIONS.inc()
+        self.last_slot = max(self.last_slot, notification.result.context.slot)
+        value = notification.result.value
+        if value.err is not None or PUMP_FUN_CREATE_LOG not in value.logs:
+            return
+        CREATE_NOTIFICATIONS.inc()
+        self.creates.put_nowait(value.signature)
+
+    async def on_ws_connect(self):
+        """重連後回補斷線期間的交易 (getSignaturesForAddress 沒有日誌，只能逐筆拉取)"""
+        gap_start = self.last_slot
+        if self.detector.ws.connects <= 1 or not gap_start:
+            return
+        logger.warning(f"WebSocket 重連，回補 slot {gap_start} 之後的 Pump.fun 交易")
+        try:
+            found_tokens = []
+            for program_id in PUMP_FUN_PROGRAM_IDS:
+                found_tokens.extend(await self.detector.scan_since(str(program_id), gap_start))
+            self.add_new_mints(self.detector.save_tokens(found_tokens))
+        except Exception as e:
+            self.stats['last_error'] = f"backfill: {str(e)}"
+            logger.error(f"回補 Pump.fun 交易出錯: {str(e)}")
+
+    async def stream_loop(self):
+        ws = self.detector.ws
+        ws.add_connect_hook(self.on_ws_connect)
+        subscriptions = [
+            await ws.subscribe("logsSubscribe", [{"mentions": [str(program_id)]}, {"commitment": "confirmed"}],
+                               handler=self.on_logs)
+            for program_id in PUMP_FUN_PROGRAM_IDS
+        ]
+        ws_task = asyncio.create_task(ws.run()) if self.owns_ws else None
+        try:
+            while self.is_running:
+                signature = await self.creates.get()
+                try:
+                    token_info = await self.detector.get_transaction_details(signature)
+                    self.add_new_mints(self.detector.save_tokens([token_info] if token_info else []))
+                    self.stats['last_poll'] = datetime.now()
+                    self.detector.store.flush()
+                except Exception as e:
+                    self.stats['last_error'] = f"stream: {str(e)}"
+                    logger.error(f"處理 Pump.fun 新代幣 {signature} 出錯: {str(e)}")
+        finally:
+            for subscription in subscriptions:
+                await ws.unsubscribe(subscription)
+            if ws_task is not None:
+                await ws.stop()
+                ws_task.cancel()
+
+    async def poll_loop(self):
+        while self.is_running:
+            try:
+                new_mints = await self.detector.scan_pumpfun_signatures(limit=100)
+                self.add_new_mints(new_mints)
+                self.stats['polls'] += 1
+                self.stats['last_poll'] = datetime.now()
+                self.detector.store.flush()
+                self.detector.sentiment_cache.flush()
+            except Exception as e:
+                self.stats['last_error'] = f"poll: {str(e)}"
+                logger.error(f"掃描 Pump.fun 出錯: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def analysis_loop(self):
+        while self.is_running:
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            due, mint_address, stage = self.queue[0]
+            delay = due - time.time()
+            if delay > 0:
+                # 有更早到期的新代幣加入時會提前喚醒
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.queue)
+            created_at = due - self.schedule[stage]
+            try:
+                page = await self.detector.start_browser()
+                if page is None:
+                    raise RuntimeError("Twitter 登錄失敗")
+                mentions, sentiment = await self.detector.analyze_mint(page, mint_address)
+                self.stats['analyses'] += 1
+                ANALYSES.labels("ok").inc()
+                self.stats['last_analysis'] = datetime.now()
+                logger.info(f"{mint_address} 第 {stage + 1} 次分析: 提及 {mentions}, 情感 {sentiment:.2f}")
+            except Exception as e:
+                self.stats['analysis_errors'] += 1
+                ANALYSES.labels("error").inc()
+                self.stats['last_error'] = f"analysis {mint_address}: {str(e)}"
+                logger.error(f"分析代幣 {mint_address} 時出錯: {str(e)}")
+                # 頁面崩潰或登入失效時重啟瀏覽器，下一個任務會重新登入
+                await self.detector.close_browser()
+                self.stats['browser_restarts'] += 1
+            self.schedule_mint(mint_address, created_at, stage + 1)
+            await asyncio.sleep(2)
+
+    async def run(self):
+        self.is_running = True
+        await self.status_server.start()
+
+        # 啟動前累積的未分析代幣立即排入第一次分析
+        now = time.time()
+        for mint_address in self.detector.get_unanalyzed_tokens():
+            self.schedule_mint(mint_address, now - self.schedule[0])
+
+        try:
+            await self.detector.start_browser()
+            discover = self.stream_loop() if self.detector.ws else self.poll_loop()
+            await asyncio.gather(discover, self.analysis_loop())
+        finally:
+            self.is_running = False
+            self.detector.store.flush()
+            self.detector.sentiment_cache.flush()
+            await self.detector.close_browser()
+            await self.detector.close()
+            await self.status_server.stop()
+
 
 async def main():
-    detector = SolanaTokenDetector(search_limit=50)
+    parser = argparse.ArgumentParser(description="Pump.fun 新代幣 Twitter 熱度分析")
+    parser.add_argument('--daemon', action='store_true', help="常駐運行，持續掃描並定期重新分析")
+    parser.add_argument('--interval', type=int, default=DAEMON_POLL_INTERVAL, help="常駐模式掃描間隔(秒)")
+    parser.add_argument('--status-port', type=int, default=STATUS_PORT, help="常駐模式狀態端點埠號")
+    args = parser.parse_args()
+
+    # 只有常駐模式訂閱日誌；沒有 WebSocket 端點時退回輪詢
+    ws = WsMultiplexer(WS_ENDPOINTS) if args.daemon and WS_ENDPOINTS else None
+    detector = SolanaTokenDetector(search_limit=50, ws=ws)
+
+    if args.daemon:
+        daemon = TokenDetectorDaemon(detector, poll_interval=args.interval, status_port=args.status_port,
+                                     owns_ws=True)
+        await daemon.run()
+        return
 
     # 獲取新代幣
     await detector.fetch_pumpfun_new_tokens()
@@ -436,6 +831,7 @@ async def main():
 
     # 生成報告
     detector.generate_report()
+    await detector.close()
 
 
 if __name__ == "__main__":
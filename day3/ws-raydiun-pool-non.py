@@ -1,7 +1,6 @@
 import asyncio
 import json
 import requests
-import websockets
 import time
 from datetime import datetime, timedelta
 import pytz
@@ -10,14 +9,37 @@ import logging
 from typing import List, Dict, Optional, Any, Set, Tuple
 from dataclasses import dataclass
 from pathlib import Path
-from rich.console import Console
+from collections import deque
+import numpy as np
+from rich.console import Console, Group
 from rich.table import Table
 from rich.logging import RichHandler
 import os
-import uuid
 from dotenv import load_dotenv
 import signal
 import sqlite3
+import sys
+from functools import partial
+import msgspec
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from solana_bot.amm_quote import QuoteEngine
+from solana_bot.backfill import GapBackfill
+from solana_bot.bus import POOL_CREATED, EventBus
+from solana_bot.dashboard import LiveDashboard
+from solana_bot.diagnostics import Diagnostics
+from solana_bot.http_server import LocalHttpServer, json_response
+from solana_bot.logging_utils import setup_logging
+from solana_bot.metrics import RPC_ERRORS, RPC_LATENCY, add_metrics_route, counter, endpoint_label, gauge, histogram
+from solana_bot.pool_programs import LAUNCH_DECODER_NAMES, LaunchRegistry, decoders_for
+from solana_bot.reserve_tracker import PoolReserves, ReserveTracker
+from solana_bot.rpc_cache import RpcResponseCache
+from solana_bot.rpc_pool import RpcPool
+from solana_bot.ws_mux import Subscription, WsMultiplexer
+from solana_bot.safety import SafetyCheck, SafetyChecker, decode_account_data
+from solana_bot.rpc_types import (
+    LogsParams, SignatureInfo, TransactionWithInnerResult, logs_params_decoder, transaction_with_inner_decoder
+)
 
 # 加載.env配置文件
 load_dotenv()
@@ -29,15 +51,18 @@ CURRENT_TIME = datetime.now(pytz.UTC)
 # 初始化Rich console用於美化輸出
 console = Console()
 
-# 配置日誌系統
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(message)s",
-    datefmt="[%X]",
-    handlers=[
-        RichHandler(rich_tracebacks=True, console=console),
-        logging.FileHandler('raydium_monitor.log', encoding='utf-8')
-    ]
+# 調試模式會輸出每筆候選交易的完整日誌 (經取樣限流)
+DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() in ("true", "1", "t")
+# 終端即時面板 (非終端環境自動關閉)
+DASHBOARD = os.getenv("DASHBOARD", "True").lower() in ("true", "1", "t")
+
+# 配置日誌系統: 事件迴圈只入佇列，終端與檔案輸出在背景線程完成
+rich_handler = RichHandler(rich_tracebacks=True, console=console)
+rich_handler.setFormatter(logging.Formatter("%(message)s", datefmt="[%X]"))
+log_listener = setup_logging(
+    'raydium_monitor.log',
+    level=logging.DEBUG if DEBUG_MODE else logging.INFO,
+    console_handler=rich_handler,
 )
 
 logger = logging.getLogger("raydium")
@@ -62,10 +87,54 @@ if not WS_ENDPOINTS:
 
 # 系統配置參數
 RAYDIUM_PROGRAM_ID = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+# 監聽的建池程序 (solana_bot.pool_programs 中的名稱，逗號分隔)，每個程序一個 logsSubscribe
+POOL_PROGRAMS = [
+    name.strip() for name in os.getenv("POOL_PROGRAMS", ",".join(LAUNCH_DECODER_NAMES)).split(",") if name.strip()
+]
 RECONNECT_INTERVAL = int(os.getenv("RECONNECT_INTERVAL", "5"))  # WebSocket重連間隔(秒)
 MAX_RECONNECT_ATTEMPTS = int(os.getenv("MAX_RECONNECT_ATTEMPTS", "10"))  # 最大重連嘗試次數
 HEARTBEAT_INTERVAL = int(os.getenv("HEARTBEAT_INTERVAL", "30"))  # 心跳間隔(秒)
 DB_PATH = os.getenv("DB_PATH", "raydium_pools.db")  # 資料庫路徑
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9103"))  # /metrics 端口，0 為關閉
+RESERVE_TRACK_WINDOW = int(os.getenv("RESERVE_TRACK_WINDOW", "3600"))  # 新池子儲備追蹤時長(秒)
+RESERVE_TRACK_MAX_POOLS = int(os.getenv("RESERVE_TRACK_MAX_POOLS", "200"))  # 同時追蹤的池子上限 (每個池子 2 個訂閱)
+BACKFILL_CONCURRENCY = int(os.getenv("BACKFILL_CONCURRENCY", "8"))  # 重連回補時同時拉取的交易數
+BACKFILL_MAX_SIGNATURES = int(os.getenv("BACKFILL_MAX_SIGNATURES", "5000"))  # 單次回補的簽名上限，0 為不回補
+
+# 運行指標
+NOTIFICATIONS = counter("raydium_log_notifications_total", "logsNotification messages received")
+POOLS_DETECTED = counter("raydium_pools_detected_total", "New pool initializations detected")
+PROGRAM_NOTIFICATIONS = counter("raydium_program_notifications_total", "Log notifications per watched program",
+                                ["program"])
+PROGRAM_POOLS_DETECTED = counter("raydium_program_pools_detected_total", "New pools detected per program",
+                                 ["program"])
+LOG_QUEUE_DROPPED = counter("raydium_log_notifications_dropped_total",
+                            "Log notifications dropped because the processing queue was full")
+LOG_DECODE_ERRORS = counter("raydium_log_notification_decode_errors_total",
+                            "Log notifications skipped because the payload did not decode")
+DROPPED_BACKFILLS = counter("raydium_dropped_backfills_total",
+                            "Backfills started for slots whose notifications were dropped from the queue")
+LAST_NOTIFICATION_SLOT = gauge("raydium_last_notification_slot", "Slot of the latest log notification")
+DB_WRITE_LATENCY = histogram("raydium_db_write_seconds", "Pool insert latency")
+SAFETY_BATCH_LATENCY = histogram("raydium_safety_batch_seconds", "Safety check latency per batch of pools")
+SAFETY_BATCH_SIZE = histogram("raydium_safety_batch_pools", "Pools per safety check batch",
+                              buckets=(1, 2, 5, 10, 20, 50, 100))
+BACKFILLED_POOLS = counter("raydium_backfilled_pools_total", "Pool initializations recovered by reconnect backfill")
+DETECTION_DELAY = histogram("raydium_detection_delay_seconds", "Time from block time to pool detection",
+                            buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300))
+
+# pools 表後來加入的欄位: 建池程序與安全檢查結果
+ADDED_COLUMNS = [
+    ("program", "TEXT"),
+    ("lp_mint", "TEXT"),
+    ("mint_authority", "TEXT"),
+    ("freeze_authority", "TEXT"),
+    ("supply", "TEXT"),
+    ("decimals", "INTEGER"),
+    ("lp_burn_pct", "REAL"),
+    ("risk_score", "INTEGER"),
+    ("safety_checked_at", "TEXT"),
+]
 
 # 已知token符號的快取
 token_symbol_cache = {}
@@ -85,27 +154,83 @@ class PoolInfo:
     signature: str
     timestamp: datetime
     slot: int
-    raw_data: Dict
+    raw_data: TransactionWithInnerResult
     coin_mint: str = ""
     token_symbol: str = ""  # 代幣符號
+    # 建池指令中的原始 base / quote (coin / pc) mint 與金庫、LP mint
+    base_mint: str = ""
+    quote_mint: str = ""
+    coin_vault: str = ""
+    pc_vault: str = ""
+    lp_mint: str = ""
+    # 建池程序 (solana_bot.pool_programs 中的名稱) 與程序 ID
+    program: str = "raydium_amm_v4"
+    program_id: str = RAYDIUM_PROGRAM_ID
+    # 金庫餘額可否當作恆定乘積儲備 (集中流動性池不行)
+    constant_product: bool = True
 
 class RaydiumMonitor:
-    """Raydium池子監控器主類"""
-    def __init__(self):
+    """Raydium池子監控器主類
+
+    rpc / bus / ws 由 solana_bot.host 傳入時，RPC 請求走共用連線池，
+    WebSocket 訂閱與其他元件共用連線，新池子同時發布到事件匯流排。
+    """
+    def __init__(self, rpc: Optional[RpcPool] = None, bus: Optional[EventBus] = None,
+                 ws: Optional[WsMultiplexer] = None):
+        self.rpc = rpc
+        self.bus = bus
+        # 日誌與所有金庫的訂閱共用一條連線，斷線重連後自動重新訂閱
+        self._owns_ws = ws is None
+        self.ws = ws or WsMultiplexer(WS_ENDPOINTS, RECONNECT_INTERVAL, MAX_RECONNECT_ATTEMPTS)
+        self.ws.add_connect_hook(self.on_ws_connect)
+        # 每個建池程序一個 logsSubscribe，通知匯入同一個佇列依序處理
+        self.launches = LaunchRegistry(decoders_for(POOL_PROGRAMS))
+        self.log_subscriptions: Dict[str, Subscription] = {}
+        self.log_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+        # 佇列滿時被丟棄通知的 (最低, 最高) slot，追上後回補
+        self.dropped_slots: Optional[Tuple[int, int]] = None
+        self.dropped_backfill_task: Optional[asyncio.Task] = None
         self.current_rpc_index = 0
-        self.current_ws_index = 0
         self.last_check_time = CURRENT_TIME
         self.pools_found: List[PoolInfo] = []
         self.start_time = CURRENT_TIME
-        self.debug_mode = os.getenv("DEBUG_MODE", "True").lower() in ("true", "1", "t")
+        self.debug_mode = DEBUG_MODE
         self._current_rpc = RPC_ENDPOINTS[self.current_rpc_index]
-        self._current_ws = WS_ENDPOINTS[self.current_ws_index]
         self.processed_signatures: Set[str] = set()
-        self.websocket = None
-        self.subscription_id = None
         self.is_running = False
         self.notification_count = 0
+        self.total_notifications = 0
         self.last_heartbeat = time.time()
+        self.last_slot = 0
+        self.recent_pools = deque(maxlen=10)
+        self._rate_sample = (time.time(), 0)
+        self._notification_rate = 0.0
+        self.dashboard = LiveDashboard(self.render_dashboard, console) if DASHBOARD else None
+        # 新池子金庫的 accountSubscribe 與 logsSubscribe 共用同一條連線
+        # 追蹤中池子的儲備同步到向量化報價引擎
+        self.quotes = QuoteEngine()
+        self.reserve_tracker = ReserveTracker(
+            self.ws, RESERVE_TRACK_MAX_POOLS, RESERVE_TRACK_WINDOW,
+            on_update=self.quotes.update_from_reserves, on_remove=self.quotes.remove
+        )
+        self.last_reserve_expiry = time.time()
+        # 重連後回補斷線期間的簽名，與直播串流以 processed_signatures 去重
+        self.backfill = GapBackfill(self.rpc_post, self.backfill_signature, commitment="finalized",
+                                    concurrency=BACKFILL_CONCURRENCY, max_signatures=BACKFILL_MAX_SIGNATURES)
+        gauge("raydium_backfill_pending_slots", "Slots left unfinished by a truncated backfill",
+              callback=lambda: self.backfill.pending_slots)
+        gauge("raydium_tracked_pools", "Pools whose vault reserves are being tracked",
+              callback=lambda: len(self.reserve_tracker.pools))
+        # 新池子排隊做安全檢查，同一時間排隊的池子合併成一次 getMultipleAccounts
+        self.safety_checker = SafetyChecker(self.fetch_account_data)
+        self.safety_queue: asyncio.Queue = asyncio.Queue()
+        self.safety_task: Optional[asyncio.Task] = None
+        self.rpc_cache = RpcResponseCache()
+        self.metrics_server: Optional[LocalHttpServer] = None
+        # SIGUSR1 或 /debug/* 端點觸發 profile 與記憶體快照
+        self.diagnostics = Diagnostics()
+        gauge("raydium_processed_signatures", "Signatures held in the dedup set",
+              callback=lambda: len(self.processed_signatures))
         
         # 初始化資料庫
         self.init_database()
@@ -127,19 +252,30 @@ class RaydiumMonitor:
                 pair_symbol TEXT,
                 timestamp TEXT,
                 discovery_time TEXT,
-                slot INTEGER
+                slot INTEGER,
+                program TEXT
             )
             ''')
             
+            # 匯出 Parquet 時按天範圍讀取
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_pools_timestamp ON pools (timestamp)")
+            
+            # 建池程序與安全檢查欄位 (舊資料庫補上缺少的欄位)
+            existing_columns = {row[1] for row in cursor.execute("PRAGMA table_info(pools)")}
+            for column, column_type in ADDED_COLUMNS:
+                if column not in existing_columns:
+                    cursor.execute(f"ALTER TABLE pools ADD COLUMN {column} {column_type}")
+            
             conn.commit()
             conn.close()
-            console.print(f"[green]Database initialized: {DB_PATH}[/green]")
+            logger.info(f"Database initialized: {DB_PATH}")
         except Exception as e:
-            console.print(f"[bold red]Error initializing database: {str(e)}[/bold red]")
+            logger.error(f"Error initializing database: {str(e)}")
     
     def save_pool_to_db(self, pool_info: PoolInfo, token_symbol: str, pair_symbol: str):
         """將池子信息保存到資料庫"""
         try:
+            write_start = time.perf_counter()
             conn = sqlite3.connect(DB_PATH)
             cursor = conn.cursor()
             
@@ -150,8 +286,8 @@ class RaydiumMonitor:
             if not existing:
                 # 插入新記錄
                 cursor.execute('''
-                INSERT INTO pools (pool_address, signature, coin_mint, token_symbol, pair_symbol, timestamp, discovery_time, slot)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO pools (pool_address, signature, coin_mint, token_symbol, pair_symbol, timestamp, discovery_time, slot, program)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     pool_info.address, 
                     pool_info.signature, 
@@ -160,16 +296,18 @@ class RaydiumMonitor:
                     pair_symbol,
                     pool_info.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC'),
                     datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S UTC'),
-                    pool_info.slot
+                    pool_info.slot,
+                    pool_info.program
                 ))
                 conn.commit()
-                console.print("[green]Pool saved to database[/green]")
+                logger.info("Pool saved to database")
             else:
-                console.print("[yellow]Pool already exists in database, skipping...[/yellow]")
+                logger.warning("Pool already exists in database, skipping...")
                 
             conn.close()
+            DB_WRITE_LATENCY.observe(time.perf_counter() - write_start)
         except Exception as e:
-            console.print(f"[bold red]Error saving pool to database: {str(e)}[/bold red]")
+            logger.error(f"Error saving pool to database: {str(e)}")
 
     @property
     def current_rpc(self) -> str:
@@ -177,113 +315,109 @@ class RaydiumMonitor:
     
     @property
     def current_ws(self) -> str:
-        return self._current_ws
+        return self.ws.endpoint
+    
+    @property
+    def connected_since(self) -> Optional[float]:
+        return self.ws.connected_since
     
     def rotate_endpoints(self):
-        """輪換RPC和WebSocket端點"""
+        """輪換RPC端點 (WebSocket 端點由 WsMultiplexer 在重連時輪換)"""
         if len(RPC_ENDPOINTS) > 1:
             self.current_rpc_index = (self.current_rpc_index + 1) % len(RPC_ENDPOINTS)
             self._current_rpc = RPC_ENDPOINTS[self.current_rpc_index]
         
-        if len(WS_ENDPOINTS) > 1:
-            self.current_ws_index = (self.current_ws_index + 1) % len(WS_ENDPOINTS)
-            self._current_ws = WS_ENDPOINTS[self.current_ws_index]
-        
-        console.print(f"[yellow]Rotated to RPC: {self._current_rpc}")
-        console.print(f"[yellow]Rotated to WebSocket: {self._current_ws}")
+        logger.warning(f"Rotated to RPC: {self._current_rpc}")
 
     async def rate_limit(self):
         """API請求的速率限制"""
         await asyncio.sleep(0.2)
 
-    async def get_transaction(self, signature: str, max_retries=3) -> Optional[Dict]:
-        """獲取交易詳情，帶重試機制"""
+    async def rpc_post(self, method: str, params) -> bytes:
+        """非同步 RPC 請求，返回響應 bytes (未使用共用連線池時在線程中執行 requests)"""
+        if self.rpc:
+            return await self.rpc.post(method, params)
+        api_url = self.current_rpc
+        rpc_labels = (method, endpoint_label(api_url))
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        try:
+            with RPC_LATENCY.labels(*rpc_labels).time():
+                response = await asyncio.to_thread(requests.post, api_url, json=payload, timeout=30)
+            response.raise_for_status()
+        except Exception:
+            RPC_ERRORS.labels(*rpc_labels).inc()
+            raise
+        return response.content
+
+    async def get_transaction(self, signature: str, max_retries=3) -> Optional[TransactionWithInnerResult]:
+        """獲取交易詳情，帶重試機制 (含 innerInstructions: 經由 CPI 的建池指令)"""
+        tx_params = [signature, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}]
+        cached = self.rpc_cache.get("getTransaction", tx_params, "finalized")
+        if cached is not None:
+            return transaction_with_inner_decoder.decode(cached).result
+
         for retry in range(max_retries):
             try:
-                console.print(f"[cyan]Fetching transaction details for {signature} (attempt {retry+1}/{max_retries})[/cyan]")
-                
-                headers = {'Content-Type': 'application/json', 'User-Agent': 'Mozilla/5.0'}
-                tx_payload = {
-                    "jsonrpc": "2.0",
-                    "id": 1,
-                    "method": "getTransaction",
-                    "params": [signature, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}]
-                }
+                logger.debug(f"Fetching transaction details for {signature} (attempt {retry+1}/{max_retries})")
                 
                 await self.rate_limit()
-                response = requests.post(self.current_rpc, headers=headers, json=tx_payload, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                tx_data = data.get("result", None)
+                # 不能在事件循環中同步請求: 會卡住 WebSocket 接收與其他協程
+                content = await self.rpc_post("getTransaction", tx_params)
+                # 直接從 bytes 解碼需要的欄位，跳過 rewards 等子樹
+                tx_data = transaction_with_inner_decoder.decode(content).result
                 if tx_data:
+                    self.rpc_cache.put("getTransaction", tx_params, "finalized", content)
                     return tx_data
                 
-                console.print(f"[yellow]No result found, waiting for 5 seconds before retry...[/yellow]")
+                logger.warning(f"No result found, waiting for 5 seconds before retry...")
                 await asyncio.sleep(5)
                 
             except Exception as e:
-                console.print(f"[bold red]Error on attempt {retry+1}: {str(e)}[/bold red]")
+                logger.error(f"Error on attempt {retry+1}: {str(e)}")
                 if retry < max_retries - 1:
                     await asyncio.sleep(2)
                 else:
-                    console.print(f"[bold red]Failed to fetch transaction after {max_retries} attempts[/bold red]")
+                    logger.error(f"Failed to fetch transaction after {max_retries} attempts")
                     return None
         
         return None
 
-    def is_pool_initialization(self, tx_data: Dict) -> bool:
+    def is_pool_initialization(self, tx_data: TransactionWithInnerResult) -> bool:
         """檢查交易是否為池子初始化"""
         try:
-            if 'meta' not in tx_data or 'logMessages' not in tx_data['meta']:
+            if not tx_data.meta or not tx_data.meta.log_messages:
                 return False
 
-            logs = tx_data['meta']['logMessages']
+            logs = tx_data.meta.log_messages
             
             if self.debug_mode:
-                console.print("\n[bold yellow]Transaction logs:[/bold yellow]")
-                for log in logs:
-                    console.print(f"  {log}")
+                # 以參數傳入，被取樣丟棄時不會拼接字串
+                logger.debug("Transaction logs:\n  %s", "\n  ".join(logs))
 
-            return any("initialize2" in log for log in logs)
+            # 以指令判別碼確認，不只看日誌
+            return self.launches.find(tx_data) is not None
 
         except Exception as e:
-            console.print(f"[bold red]Error checking initialization: {str(e)}[/bold red]")
+            logger.error(f"Error checking initialization: {str(e)}")
             return False
 
-    def parse_pool_info(self, tx_data: Dict) -> Tuple[Optional[PoolInfo], str, str]:
-        """解析交易數據提取池子信息"""
+    def parse_pool_info(self, tx_data: TransactionWithInnerResult) -> Tuple[Optional[PoolInfo], str, str]:
+        """解析交易數據提取池子信息 (按 solana_bot.pool_programs 的解碼表)"""
         try:
-            if not tx_data or 'transaction' not in tx_data:
+            if not tx_data:
                 return None, "", ""
 
             if self.debug_mode:
-                console.print("\n[bold yellow]Parsing transaction[/bold yellow]")
-                console.print(f"Slot: {tx_data.get('slot')}")
-                console.print(f"Block Time: {tx_data.get('blockTime')}")
-
-            instructions = tx_data['transaction']['message']['instructions']
-            raydium_instructions = [
-                ix for ix in instructions
-                if ix.get('programId') == RAYDIUM_PROGRAM_ID
-            ]
-
-            if not raydium_instructions:
-                return None, "", ""
-
-            # 處理第一個Raydium指令
-            instruction = raydium_instructions[0]
-            accounts = instruction.get('accounts', [])
+                logger.debug("Parsing transaction: slot %s, block time %s", tx_data.slot, tx_data.block_time)
 
-            # 確認accounts列表長度足夠
-            if len(accounts) <= 9:
-                console.print("[bold red]accounts[] length insufficient, unable to parse pool info[/bold red]")
+            # 第一個可解碼的建池指令 (頂層優先，其次 CPI)
+            launch = self.launches.find(tx_data)
+            if launch is None:
+                logger.error("No decodable pool initialization instruction, unable to parse pool info")
                 return None, "", ""
 
-            # 提取池子地址和代幣地址
-            pool_address = accounts[4]
-            coin_mint = accounts[8]
-            pc_mint = accounts[9]
+            coin_mint = launch.base_mint
+            pc_mint = launch.quote_mint
             
             # WSOL地址常量
             WSOL_ADDRESS = "So11111111111111111111111111111111111111112"
@@ -300,18 +434,26 @@ class RaydiumMonitor:
                 
             # 建立池子信息對象
             pool_info = PoolInfo(
-                address    = pool_address,
-                signature  = tx_data.get('transaction', {}).get('signatures', [''])[0],
-                timestamp  = datetime.fromtimestamp(tx_data['blockTime'], tz=pytz.UTC),
-                slot       = tx_data['slot'],
+                address    = launch.pool,
+                signature  = (tx_data.transaction.signatures or [''])[0],
+                timestamp  = datetime.fromtimestamp(tx_data.block_time, tz=pytz.UTC),
+                slot       = tx_data.slot,
                 raw_data   = tx_data,
-                coin_mint  = target_mint
+                coin_mint  = target_mint,
+                base_mint  = coin_mint,
+                quote_mint = pc_mint,
+                coin_vault = launch.base_vault,
+                pc_vault   = launch.quote_vault,
+                lp_mint    = launch.lp_mint,
+                program    = launch.program,
+                program_id = launch.program_id,
+                constant_product = launch.decoder.constant_product
             )
             
             return pool_info, target_mint, pair_mint
 
         except Exception as e:
-            console.print(f"[bold red]Error parsing pool info: {str(e)}[/bold red]")
+            logger.error(f"Error parsing pool info: {str(e)}")
             return None, "", ""
 
     async def get_token_symbol(self, mint_address: str) -> str:
@@ -327,19 +469,7 @@ class RaydiumMonitor:
         
         # 使用RPC API獲取代幣信息
         try:
-            headers = {"Content-Type": "application/json"}
-            payload = {
-                "jsonrpc": "2.0",
-                "id": "token-info",
-                "method": "getAsset",
-                "params": {"id": mint_address}
-            }
-            
-            api_url = self.current_rpc
-            
-            response = requests.post(api_url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            data = json.loads(await self.rpc_post("getAsset", {"id": mint_address}))
             
             # 解析響應獲取符號
             symbol = "Unknown"
@@ -358,50 +488,70 @@ class RaydiumMonitor:
             return symbol
             
         except Exception as e:
-            console.print(f"[bold red]Error fetching token symbol: {str(e)}[/bold red]")
+            logger.error(f"Error fetching token symbol: {str(e)}")
             # 使用地址前缀作為臨時標識
             symbol = mint_address[:4] + "..."
             token_symbol_cache[mint_address] = symbol
             return symbol
 
-    async def process_log_notification(self, notification: Dict) -> None:
-        """處理WebSocket日誌通知"""
+    async def process_log_notification(self, notification: LogsParams, program_id: str = RAYDIUM_PROGRAM_ID) -> None:
+        """處理WebSocket日誌通知 (program_id 為該通知所屬訂閱的程序)"""
         # 增加通知計數
         self.notification_count += 1
+        self.total_notifications += 1
+        self.last_slot = notification.result.context.slot
+        NOTIFICATIONS.inc()
+        PROGRAM_NOTIFICATIONS.labels(self.launches.name(program_id)).inc()
+        LAST_NOTIFICATION_SLOT.set(self.last_slot)
         
         # 心跳檢查
         current_time = time.time()
         if current_time - self.last_heartbeat > HEARTBEAT_INTERVAL:
-            console.print(f"[dim cyan]{datetime.now().strftime('%H:%M:%S')} - Processed {self.notification_count} notifications in last {HEARTBEAT_INTERVAL}s. Total pools found: {len(self.pools_found)}[/dim cyan]")
+            logger.info(f"Processed {self.notification_count} notifications in last {HEARTBEAT_INTERVAL}s. Total pools found: {len(self.pools_found)}. RPC cache hit rate: {self.rpc_cache.stats()['hit_rate']:.0%}")
             self.notification_count = 0
             self.last_heartbeat = current_time
         
         try:
-            # 快速檢查通知結構
-            if 'params' not in notification or 'result' not in notification['params'] or 'value' not in notification['params']['result']:
-                return
+            value = notification.result.value
+            logs = value.logs
             
-            value = notification['params']['result']['value']
-            logs = value.get('logs', [])
-            
-            # 檢查日誌中是否包含池子初始化關鍵詞
-            initialize_keywords = ["initialize2", "initializepool", "createpool", "initpool"]
-            if not logs or not any(any(keyword in log.lower() for keyword in initialize_keywords) for log in logs):
-                return
-            
-            signature = value.get('signature')
-            if not signature or signature in self.processed_signatures:
+            # 檢查日誌中是否有該程序建池指令的標記
+            if not logs or not self.launches.log_matches(program_id, logs):
                 return
             
-            self.processed_signatures.add(signature)
-            
+            await self.process_signature(value.signature)
+        
+        except Exception as e:
+            logger.error(f"Error processing log notification: {str(e)}")
+
+    async def backfill_signature(self, info: SignatureInfo) -> None:
+        """處理回補取回的簽名: 沒有日誌可篩選，先取交易再判斷是否為池子初始化"""
+        if info.signature in self.processed_signatures:
+            return
+        tx_data = await self.get_transaction(info.signature)
+        if not (tx_data and self.is_pool_initialization(tx_data)):
+            return
+        if info.signature not in self.processed_signatures:
+            # 拉取交易期間直播串流可能已處理過
+            BACKFILLED_POOLS.inc()
+        await self.process_signature(info.signature, tx_data)
+
+    async def process_signature(self, signature: str, tx_data: Optional[TransactionWithInnerResult] = None) -> None:
+        """處理候選的池子初始化交易 (直播通知與回補共用，以簽名去重)"""
+        if not signature or signature in self.processed_signatures:
+            return
+        
+        self.processed_signatures.add(signature)
+        
+        try:
             # 發現潛在新池子
-            console.print(f"\n[bold green]Potential new pool detected in transaction: {signature}[/bold green]")
+            logger.info(f"Potential new pool detected in transaction: {signature}")
             
             # 獲取完整交易詳情
-            tx_data = await self.get_transaction(signature)
+            if tx_data is None:
+                tx_data = await self.get_transaction(signature)
             if not tx_data:
-                console.print(f"[yellow]Could not fetch transaction details for {signature}[/yellow]")
+                logger.warning(f"Could not fetch transaction details for {signature}")
                 return
             
             # 確認並解析池子初始化交易
@@ -417,144 +567,408 @@ class RaydiumMonitor:
                     
                     # 添加到發現的池子列表
                     self.pools_found.append(pool_info)
+                    POOLS_DETECTED.inc()
+                    PROGRAM_POOLS_DETECTED.labels(pool_info.program).inc()
+                    if tx_data.block_time:
+                        DETECTION_DELAY.observe(max(time.time() - tx_data.block_time, 0))
                     
                     # 保存到資料庫
                     self.save_pool_to_db(pool_info, token_symbol, pair_symbol)
+                    if self.bus:
+                        self.bus.publish(POOL_CREATED, {
+                            'pool': pool_info.address,
+                            'program_id': pool_info.program_id,
+                            'program': pool_info.program,
+                            'mint': target_mint,
+                            'pair_mint': pair_mint,
+                            'token_symbol': token_symbol,
+                            'pair_symbol': pair_symbol,
+                            'signature': pool_info.signature,
+                            'slot': pool_info.slot,
+                        })
                     
                     # 打印新池子信息
-                    console.print(f"\n[bold green]New Pool Found:[/bold green]")
-                    console.print(f"Address: {pool_info.address}")
-                    console.print(f"Transaction: {pool_info.signature}")
-                    console.print(f"Coin Mint: {pool_info.coin_mint}")
-                    console.print(f"Token Symbol: {token_symbol}")
-                    console.print(f"Pair: {token_symbol}-{pair_symbol}")
-                    console.print(f"Time: {pool_info.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}")
+                    self.recent_pools.appendleft((pool_info, pair_symbol))
+                    await self.track_reserves(pool_info)
+                    self.safety_queue.put_nowait(SafetyCheck(
+                        pool_info.address, pool_info.coin_mint, pool_info.lp_mint,
+                        self.initial_lp_amount(pool_info)
+                    ))
+                    logger.info(
+                        f"New Pool Found ({pool_info.program}): {token_symbol}-{pair_symbol} "
+                        f"address={pool_info.address} coin_mint={pool_info.coin_mint} "
+                        f"tx={pool_info.signature} time={pool_info.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    )
         
         except Exception as e:
-            console.print(f"[bold red]Error processing log notification: {str(e)}[/bold red]")
+            logger.error(f"Error processing pool transaction {signature}: {str(e)}")
 
-    async def subscribe_to_program_logs(self):
-        """訂閱程序日誌的WebSocket連接"""
-        reconnect_attempts = 0
-        while reconnect_attempts < MAX_RECONNECT_ATTEMPTS and self.is_running:
+    async def on_ws_connect(self) -> None:
+        """每次 (重新) 連線後由 WsMultiplexer 調用"""
+        # 在任何 await 之前讀取: 新連線的通知還沒有被處理
+        gap_start = self.last_slot
+        self.last_heartbeat = time.time()  # 重置心跳計時器
+        if self.ws.connects <= 1:
+            return
+        # 與舊行為一致: WebSocket 斷線時一併換 RPC 端點
+        self.rotate_endpoints()
+        if gap_start and BACKFILL_MAX_SIGNATURES > 0:
+            await self.backfill_gap(gap_start)
+
+    async def backfill_gap(self, gap_start: int, gap_end: Optional[int] = None) -> None:
+        """回補 [gap_start, gap_end] 內各建池程序的交易，gap_end 預設為目前 finalized slot
+
+        翻頁的是各程序只在建池時出現的帳戶 (LaunchRegistry.backfill_addresses)；
+        上次被截斷的區間由 GapBackfill 一併回補
+        """
+        if gap_end is None:
             try:
-                console.print(f"\n[bold cyan]Connecting to WebSocket......[/bold cyan]")
-                async with websockets.connect(self.current_ws, ping_interval=20, ping_timeout=20, close_timeout=5) as websocket:
-                    self.websocket = websocket
-                    reconnect_attempts = 0  # 重置重連計數器
-                    self.last_heartbeat = time.time()  # 重置心跳計時器
-                    
-                    # 訂閱Raydium程序的日誌
-                    subscribe_message = {
-                        "jsonrpc": "2.0",
-                        "id": str(uuid.uuid4()),
-                        "method": "logsSubscribe",
-                        "params": [
-                            {"mentions": [RAYDIUM_PROGRAM_ID]},  # 監聽指定程序ID
-                            {"commitment": "finalized"}
-                        ]
-                    }
-                    
-                    await websocket.send(json.dumps(subscribe_message))
-                    response = await websocket.recv()
-                    response_data = json.loads(response)
-                    
-                    if 'result' in response_data:
-                        self.subscription_id = response_data['result']
-                        console.print(f"[bold green]Successfully subscribed to logs. Subscription ID: {self.subscription_id}[/bold green]")
-                        
-                        # 打印訂閱信息摘要
-                        console.print("\n[bold cyan]===== WebSocket Subscription =====[/bold cyan]")
-                        console.print(f"Program ID: {RAYDIUM_PROGRAM_ID}")
-                        console.print(f"Listening for 'initialize2' in logs")
-                        console.print(f"Total Pools Found: {len(self.pools_found)}")
-                        console.print(f"Heartbeat Interval: {HEARTBEAT_INTERVAL} seconds")
-                        
-                        # 持續接收通知
-                        while self.is_running:
-                            try:
-                                # 使用超時機制以便更好地響應停止請求
-                                message = await asyncio.wait_for(websocket.recv(), timeout=2.0)
-                                notification = json.loads(message)
-                                
-                                if 'method' in notification and notification['method'] == 'logsNotification':
-                                    await self.process_log_notification(notification)
-                            except asyncio.TimeoutError:
-                                # 超時只是表示沒有收到消息，非錯誤狀態
-                                if not self.is_running:
-                                    console.print("[yellow]Received stop signal while waiting for messages.[/yellow]")
-                                    break
-                                continue
-                            except websockets.exceptions.ConnectionClosedError:
-                                console.print("[bold yellow]WebSocket connection closed. Reconnecting...[/bold yellow]")
-                                break
-                            except asyncio.CancelledError:
-                                console.print("[yellow]Async task was cancelled. Stopping gracefully...[/yellow]")
-                                self.is_running = False
-                                break
-                    else:
-                        console.print(f"[bold red]Failed to subscribe: {response_data}[/bold red]")
-                        
-            except (websockets.exceptions.ConnectionClosedError, 
-                    websockets.exceptions.InvalidStatusCode,
-                    ConnectionRefusedError,
-                    asyncio.exceptions.TimeoutError) as e:
-                reconnect_attempts += 1
-                console.print(f"[bold red]WebSocket connection error: {str(e)}[/bold red]")
-                console.print(f"[yellow]Reconnect attempt {reconnect_attempts}/{MAX_RECONNECT_ATTEMPTS}. Waiting {RECONNECT_INTERVAL} seconds...[/yellow]")
-                self.rotate_endpoints()  # 切換到另一個端點
-                await asyncio.sleep(RECONNECT_INTERVAL)
-            except asyncio.CancelledError:
-                console.print("[yellow]Async operation was cancelled. Stopping gracefully...[/yellow]")
-                self.is_running = False
-                break
+                gap_end = json.loads(await self.rpc_post("getSlot", [{"commitment": "finalized"}])).get('result')
             except Exception as e:
-                if self.is_running:
-                    console.print(f"[bold red]Unexpected error: {str(e)}[/bold red]")
-                    reconnect_attempts += 1
-                    await asyncio.sleep(RECONNECT_INTERVAL)
-                else:
+                # 取不到上界時回補到最新，與直播串流重疊的部分由簽名去重
+                logger.warning(f"getSlot failed before backfill: {str(e)}")
+        logger.warning(f"Backfilling slots {gap_start}-{gap_end or 'latest'}")
+        await self.backfill.run(self.launches.backfill_addresses, gap_start, gap_end)
+
+    def queue_log_notification(self, program_id: str, params) -> None:
+        """WsMultiplexer 的通知回調: 各程序的通知匯入同一個佇列
+
+        回調在連線的接收循環中同步執行，等待佇列會卡住所有訂閱，所以滿了
+        丟棄最舊的一則並記下其 slot，處理循環追上後回補 (backfill_dropped)
+        """
+        if self.log_queue.full():
+            item = self.log_queue.get_nowait()
+            LOG_QUEUE_DROPPED.inc()
+            if item is not None:
+                self.note_dropped(item[1])
+        self.log_queue.put_nowait((program_id, params))
+
+    def note_dropped(self, params) -> None:
+        try:
+            slot = logs_params_decoder.decode(params).result.context.slot
+        except msgspec.DecodeError:
+            return
+        low, high = self.dropped_slots or (slot, slot)
+        self.dropped_slots = (min(low, slot), max(high, slot))
+
+    def backfill_dropped(self) -> None:
+        """佇列清空後在背景回補被丟棄通知的 slot 區間，同一時間只跑一個"""
+        if self.dropped_slots is None or BACKFILL_MAX_SIGNATURES <= 0:
+            return
+        if self.dropped_backfill_task is not None and not self.dropped_backfill_task.done():
+            return
+        low, high = self.dropped_slots
+        self.dropped_slots = None
+        DROPPED_BACKFILLS.inc()
+        logger.warning(f"Log queue overflowed, notifications in slots {low}-{high} were dropped")
+        self.dropped_backfill_task = asyncio.create_task(self.backfill_gap(low, high))
+
+    async def subscribe_to_program_logs(self):
+        """訂閱各建池程序的日誌並逐筆處理通知 (連線與重連由 WsMultiplexer 負責)"""
+        for program_id in self.launches.program_ids:
+            self.log_subscriptions[program_id] = await self.ws.subscribe("logsSubscribe", [
+                {"mentions": [program_id]},  # 監聽指定程序ID (每個訂閱只能指定一個)
+                {"commitment": "finalized"}
+            ], handler=partial(self.queue_log_notification, program_id))
+        logger.info(f"Watching pool launches on: {', '.join(decoder.name for decoder in self.launches.decoders)}")
+        logger.info("Connecting to WebSocket......")
+        ws_task = asyncio.create_task(self.ws.run()) if self._owns_ws else None
+        try:
+            while self.is_running:
+                # 過期的池子取消訂閱
+                if time.time() - self.last_reserve_expiry > 30:
+                    self.last_reserve_expiry = time.time()
+                    await self.reserve_tracker.expire()
+                try:
+                    # 使用超時機制以便更好地響應停止請求
+                    item = await asyncio.wait_for(self.log_queue.get(), timeout=2.0)
+                except asyncio.TimeoutError:
+                    # 超時只是表示沒有收到消息，非錯誤狀態
+                    self.backfill_dropped()
+                    if ws_task is not None and ws_task.done():
+                        # 重連失敗次數達到 MAX_RECONNECT_ATTEMPTS
+                        logger.error("Max reconnection attempts reached. Exiting...")
+                        break
+                    continue
+                if item is None:
                     break
-        
-        # 重連失敗時顯示錯誤
-        if reconnect_attempts >= MAX_RECONNECT_ATTEMPTS and self.is_running:
-            console.print("[bold red]Max reconnection attempts reached. Exiting...[/bold red]")
+                program_id, params = item
+                try:
+                    notification = logs_params_decoder.decode(params)
+                except msgspec.DecodeError as e:
+                    # 多工器只驗證外層，result 內容不符 (例如 logs 為 null) 時跳過這一則
+                    LOG_DECODE_ERRORS.inc()
+                    logger.warning(f"Undecodable log notification for {program_id}: {str(e)}")
+                    continue
+                await self.process_log_notification(notification, program_id)
+                if self.dropped_slots is not None and self.log_queue.empty():
+                    self.backfill_dropped()
+        except asyncio.CancelledError:
+            logger.warning("Async operation was cancelled. Stopping gracefully...")
+            self.is_running = False
+        finally:
+            if ws_task is not None:
+                await self.ws.stop()
+                ws_task.cancel()
 
     async def unsubscribe(self):
         """取消訂閱"""
-        if self.websocket and self.subscription_id:
-            try:
-                if self.websocket.open:
-                    unsubscribe_message = {
-                        "jsonrpc": "2.0",
-                        "id": str(uuid.uuid4()),
-                        "method": "logsUnsubscribe",
-                        "params": [self.subscription_id]
-                    }
-                    await self.websocket.send(json.dumps(unsubscribe_message))
-                    console.print("[yellow]Unsubscribed from logs[/yellow]")
-                else:
-                    console.print("[yellow]WebSocket already closed, no need to unsubscribe[/yellow]")
-            except Exception as e:
-                console.print(f"[bold red]Error unsubscribing: {str(e)}[/bold red]")
+        try:
+            if self.log_subscriptions:
+                for subscription in self.log_subscriptions.values():
+                    await self.ws.unsubscribe(subscription)
+                self.log_subscriptions.clear()
+                # 喚醒正在等待通知的處理循環
+                if self.log_queue.full():
+                    self.log_queue.get_nowait()
+                self.log_queue.put_nowait(None)
+                logger.warning("Unsubscribed from logs")
+            for pool in list(self.reserve_tracker.pools):
+                await self.reserve_tracker.untrack(pool)
+        except Exception as e:
+            logger.error(f"Error unsubscribing: {str(e)}")
         
         self.is_running = False
 
+    def fetch_account_data(self, addresses: List[str]) -> List[Optional[bytes]]:
+        """批量獲取帳戶原始資料 (getMultipleAccounts，最多 100 個)"""
+        params = [addresses, {"encoding": "base64", "commitment": "confirmed"}]
+        if self.rpc:
+            # 在 safety_worker 的線程中執行，走共用的同步連線池
+            result = self.rpc.call_sync("getMultipleAccounts", params)
+            return [decode_account_data(value) for value in result['value']]
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getMultipleAccounts",
+            "params": params
+        }
+        rpc_labels = ("getMultipleAccounts", endpoint_label(self.current_rpc))
+        try:
+            with RPC_LATENCY.labels(*rpc_labels).time():
+                response = requests.post(self.current_rpc, json=payload, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+            if 'error' in data:
+                raise RuntimeError(data['error'])
+        except Exception:
+            RPC_ERRORS.labels(*rpc_labels).inc()
+            raise
+        return [decode_account_data(value) for value in data['result']['value']]
+
+    @staticmethod
+    def initial_lp_amount(pool_info: PoolInfo) -> Optional[int]:
+        """初始化交易中鑄造的 LP 數量 (postTokenBalances 中 LP mint 的總和)"""
+        meta = pool_info.raw_data.meta
+        if not (meta and meta.post_token_balances and pool_info.lp_mint):
+            return None
+        total = sum(int(balance.ui_token_amount.amount) for balance in meta.post_token_balances
+                    if balance.mint == pool_info.lp_mint)
+        return total or None
+
+    async def safety_worker(self) -> None:
+        """取出排隊中的所有池子，一次 RPC 完成整批安全檢查"""
+        while True:
+            batch = [await self.safety_queue.get()]
+            while not self.safety_queue.empty():
+                batch.append(self.safety_queue.get_nowait())
+            try:
+                with SAFETY_BATCH_LATENCY.time():
+                    # 同步 RPC 放到線程中執行，不阻塞 WebSocket 接收
+                    results = await asyncio.to_thread(self.safety_checker.check, batch)
+                SAFETY_BATCH_SIZE.observe(len(batch))
+                self.save_safety_to_db(results, {check.pool: check.lp_mint for check in batch})
+                for pool, result in results.items():
+                    logger.info(
+                        f"Safety {pool}: risk={result['risk_score']} "
+                        f"mint_authority={'yes' if result['mint_authority'] else 'no'} "
+                        f"freeze_authority={'yes' if result['freeze_authority'] else 'no'} "
+                        f"lp_burn={result['lp_burn_pct']}%"
+                    )
+            except Exception as e:
+                logger.error(f"Safety check failed for {len(batch)} pools: {str(e)}")
+
+    def save_safety_to_db(self, results: Dict[str, Dict], lp_mints: Dict[str, str]) -> None:
+        """把安全檢查結果寫回 pools 表"""
+        checked_at = datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S UTC')
+        rows = [
+            (lp_mints.get(pool), result['mint_authority'], result['freeze_authority'],
+             str(result['supply']) if result['supply'] is not None else None, result['decimals'],
+             result['lp_burn_pct'], result['risk_score'], checked_at, pool)
+            for pool, result in results.items()
+        ]
+        with DB_WRITE_LATENCY.time():
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                with conn:
+                    conn.executemany('''
+                    UPDATE pools SET lp_mint = ?, mint_authority = ?, freeze_authority = ?, supply = ?,
+                        decimals = ?, lp_burn_pct = ?, risk_score = ?, safety_checked_at = ?
+                    WHERE pool_address = ?
+                    ''', rows)
+            finally:
+                conn.close()
+
+    async def track_reserves(self, pool_info: PoolInfo) -> None:
+        """訂閱新池子的金庫帳戶，小數位與初始儲備取自初始化交易的 postTokenBalances"""
+        if not (pool_info.coin_vault and pool_info.pc_vault) or not pool_info.constant_product:
+            # 集中流動性池 (CLMM、DLMM) 的金庫餘額不能用恆定乘積報價
+            return
+        tx = pool_info.raw_data
+        account_keys = tx.transaction.message.account_keys
+        balances = {}
+        for balance in (tx.meta.post_token_balances if tx.meta else None) or []:
+            if balance.account_index < len(account_keys):
+                balances[account_keys[balance.account_index].pubkey] = balance.ui_token_amount
+
+        coin_balance = balances.get(pool_info.coin_vault)
+        pc_balance = balances.get(pool_info.pc_vault)
+        if coin_balance is None or pc_balance is None:
+            logger.debug(f"Vault balances not found in init transaction for {pool_info.address}")
+            return
+        await self.reserve_tracker.track(PoolReserves(
+            pool_info.address, pool_info.base_mint, pool_info.quote_mint,
+            pool_info.coin_vault, pool_info.pc_vault,
+            coin_balance.decimals, pc_balance.decimals,
+            int(coin_balance.amount), int(pc_balance.amount),
+        ))
+
+    def quote_response(self, query: Dict[str, str]):
+        """GET /quote?amount=0.5,1,5&side=buy|sell[&pool=...]
+
+        amount 為輸入代幣的 UI 數量；buy 為用 pc 買 coin，sell 為賣 coin 換 pc。
+        不指定 pool 時對所有追蹤中的池子報價。
+        """
+        try:
+            amounts = np.array([float(value) for value in query.get('amount', '1').split(',')])
+        except ValueError:
+            return json_response({'error': 'amount must be comma separated numbers'}, status=400)
+        side = query.get('side', 'buy')
+        if side not in ('buy', 'sell'):
+            return json_response({'error': 'side must be buy or sell'}, status=400)
+        pools = [query['pool']] if 'pool' in query else self.quotes.pools
+        if not pools:
+            return json_response([])
+        try:
+            slots = self.quotes.slots(pools)
+        except KeyError as e:
+            return json_response({'error': str(e)}, status=404)
+
+        coin_to_pc = side == 'sell'
+        in_scale = (self.quotes.coin_scale if coin_to_pc else self.quotes.pc_scale)[slots][:, None]
+        out_scale = (self.quotes.pc_scale if coin_to_pc else self.quotes.coin_scale)[slots][:, None]
+        result = self.quotes.quote(slots, amounts[None, :] * in_scale, coin_to_pc)
+        amount_out = result['amount_out'] / out_scale
+        return json_response([
+            {
+                'pool': pool,
+                'spot_price': float(result['spot_price'][row, 0]),
+                'quotes': [
+                    {
+                        'amount_in': float(amount),
+                        'amount_out': float(amount_out[row, column]),
+                        'price_impact_pct': round(float(result['price_impact'][row, column]) * 100, 4),
+                    }
+                    for column, amount in enumerate(amounts)
+                ],
+            }
+            for row, pool in enumerate(pools)
+        ])
+
+    def render_dashboard(self):
+        """面板內容，由 LiveDashboard 的刷新線程按固定頻率調用"""
+        now = time.time()
+        sample_time, sample_count = self._rate_sample
+        if now - sample_time >= 1:
+            # 每秒取樣一次，平滑後顯示
+            instant = (self.total_notifications - sample_count) / (now - sample_time)
+            self._notification_rate = 0.7 * self._notification_rate + 0.3 * instant
+            self._rate_sample = (now, self.total_notifications)
+
+        status = Table.grid(padding=(0, 2))
+        status.add_column(style="bold cyan")
+        status.add_column()
+        uptime = int(now - self.start_time.timestamp())
+        status.add_row("Uptime", str(timedelta(seconds=uptime)))
+        status.add_row(
+            "WebSocket",
+            f"[green]connected {int(now - self.connected_since)}s[/green]" if self.connected_since
+            else "[yellow]connecting[/yellow]"
+        )
+        status.add_row("Endpoint", endpoint_label(self.current_ws))
+        status.add_row("Notifications", f"{self.total_notifications}  ({self._notification_rate:.1f}/s)")
+        status.add_row("Last slot", str(self.last_slot))
+        status.add_row("Pools found", str(len(self.pools_found)))
+        status.add_row("RPC cache hit rate", f"{self.rpc_cache.stats()['hit_rate']:.0%}")
+
+        pools = Table(title="Recent pools", expand=True)
+        pools.add_column("Time (UTC)", style="dim")
+        pools.add_column("Pair", style="bold green")
+        pools.add_column("Program", style="dim")
+        pools.add_column("Pool")
+        pools.add_column("Mint")
+        for pool_info, pair_symbol in list(self.recent_pools):
+            pools.add_row(
+                pool_info.timestamp.strftime('%H:%M:%S'),
+                f"{pool_info.token_symbol}-{pair_symbol}",
+                pool_info.program,
+                pool_info.address,
+                pool_info.coin_mint,
+            )
+        reserves = Table(title="Tracked reserves", expand=True)
+        reserves.add_column("Pool")
+        reserves.add_column("Coin reserve", justify="right")
+        reserves.add_column("PC reserve", justify="right")
+        reserves.add_column("Price", justify="right")
+        reserves.add_column("Liquidity %/min", justify="right")
+        for row in self.reserve_tracker.snapshot(limit=5):
+            rate = row['liquidity_change_pct_per_min']
+            reserves.add_row(
+                row['pool'],
+                f"{row['coin_reserve']:,.2f}",
+                f"{row['pc_reserve']:,.4f}",
+                f"{row['price']:.10g}" if row['price'] else "-",
+                f"[{'red' if rate < 0 else 'green'}]{rate:+.2f}[/]" if rate is not None else "-",
+            )
+        return Group(status, pools, reserves)
+
     async def monitor_pools(self) -> None:
         """主監控循環"""
-        console.print("[bold green]Starting Raydium Pool Monitor with WebSocket...[/bold green]")
+        logger.info("Starting Raydium Pool Monitor with WebSocket...")
         self.is_running = True
+        if self.dashboard:
+            self.dashboard.start()
+        await self.diagnostics.start()
+        self.safety_task = asyncio.create_task(self.safety_worker())
+        if METRICS_PORT:
+            self.metrics_server = add_metrics_route(LocalHttpServer(port=METRICS_PORT))
+            self.metrics_server.route('/reserves', lambda query: json_response(
+                self.reserve_tracker.snapshot(int(query['limit']) if 'limit' in query else None)
+            ))
+            self.metrics_server.route('/quote', self.quote_response)
+            self.diagnostics.add_routes(self.metrics_server)
+            await self.metrics_server.start()
+            logger.info(f"Metrics available at http://127.0.0.1:{METRICS_PORT}/metrics")
         await self.subscribe_to_program_logs()
 
     async def stop(self):
         """停止監控"""
         self.is_running = False
-        console.print("\n[bold yellow]Stopping monitor...[/bold yellow]")
+        logger.warning("Stopping monitor...")
         try:
             await self.unsubscribe()
-            console.print("[green]Successfully shutdown the monitor.[/green]")
+            if self.safety_task:
+                self.safety_task.cancel()
+            if self.dropped_backfill_task:
+                self.dropped_backfill_task.cancel()
+            if self.metrics_server:
+                await self.metrics_server.stop()
+            await self.diagnostics.stop()
+            if self.dashboard:
+                self.dashboard.stop()
+            logger.info("Successfully shutdown the monitor.")
         except Exception as e:
-            console.print(f"[yellow]Shutdown completed with minor issues: {str(e)}[/yellow]")
+            logger.warning(f"Shutdown completed with minor issues: {str(e)}")
 
 # 全局變量，用於信號處理程序訪問監控器
 monitor = None
@@ -604,12 +1018,12 @@ if __name__ == "__main__":
     console.print(f"[bold blue]👤 User: {CURRENT_USER}")
     console.print(f"⏰ Start Time: {CURRENT_TIME.strftime('%Y-%m-%d %H:%M:%S UTC')}")
     console.print("\n[bold yellow]Monitor Settings:")
-    console.print(f"- Debug Mode: {os.getenv('DEBUG_MODE', 'True')}")
+    console.print(f"- Debug Mode: {DEBUG_MODE}")
     console.print(f"- RPC Endpoints: {len(RPC_ENDPOINTS)} configured")
     console.print(f"- WebSocket Endpoints: {len(WS_ENDPOINTS)} configured")
     console.print(f"- Reconnect Interval: {RECONNECT_INTERVAL} seconds")
     console.print(f"- Heartbeat Interval: {HEARTBEAT_INTERVAL} seconds")
-    console.print(f"- Program ID: {RAYDIUM_PROGRAM_ID}")
+    console.print(f"- Pool Programs: {', '.join(POOL_PROGRAMS)}")
     console.print(f"- Database: {DB_PATH}")
     console.print("="*50 + "\n")
 
@@ -0,0 +1 @@
+"""Solana Bot 共用元件 (各天的監控腳本共用)"""
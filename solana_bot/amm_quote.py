@@ -0,0 +1,243 @@
+"""Raydium AMM v4 的本地恆定乘積報價
+
+儲備由 ReserveTracker 的 accountSubscribe 即時更新，存放在 NumPy
+陣列中 (每個池子一格)，一次調用即可對數千個池子 x 多個數量計算
+輸出數量、手續費與價格影響，不必逐筆調用外部報價 API。
+
+swapBaseIn 的鏈上算法 (整數):
+    fee        = ceil(amount_in * 25 / 10000)
+    amount_out = floor(reserve_out * (amount_in - fee) / (reserve_in + amount_in - fee))
+
+向量化版本以 float64 計算，相對誤差約 1e-15 (數量小於 2^53 時與整數
+結果最多差 1 個最小單位)；需要精確數值時用 quote_exact()。
+
+儲備取自金庫餘額，未扣除池子待提取的協議收益 (need_take_pnl)，與鏈上
+實際可用儲備會有微小差距。
+
+鏈上每筆 swapBaseIn 都會輸出 ray_log (SwapBaseIn 事件)，其中記錄了扣除
+待提取收益後的儲備與實際輸出量，可用來核對報價:
+
+    python -m solana_bot.amm_quote --rpc https://... <交易簽名> ...
+"""
+import argparse
+import base64
+import binascii
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+RAYDIUM_FEE_BPS = 25
+FEE_DENOMINATOR = 10_000
+
+RAY_LOG_PREFIX = "ray_log: "
+# raydium-amm log.rs: LogType::SwapBaseIn = 3，之後 7 個 u64 (小端)
+RAY_LOG_SWAP_BASE_IN = 3
+SWAP_BASE_IN_FIELDS = ("amount_in", "minimum_out", "direction", "user_source", "pool_coin", "pool_pc", "out_amount")
+_SWAP_BASE_IN = struct.Struct("<B7Q")
+# SwapBaseIn.direction: 1 為 pc 換 coin，2 為 coin 換 pc
+DIRECTION_PC2COIN = 1
+DIRECTION_COIN2PC = 2
+
+
+def quote_exact(reserve_in: int, reserve_out: int, amount_in: int, fee_bps: int = RAYDIUM_FEE_BPS) -> Tuple[int, int]:
+    """整數參考實作，返回 (amount_out, fee)"""
+    fee = -(-amount_in * fee_bps // FEE_DENOMINATOR)
+    amount_in_after_fee = amount_in - fee
+    if reserve_in + amount_in_after_fee == 0:
+        return 0, fee
+    return reserve_out * amount_in_after_fee // (reserve_in + amount_in_after_fee), fee
+
+
+def parse_swap_base_in(log: str) -> Optional[Dict[str, int]]:
+    """解析 SwapBaseIn 的 ray_log，其他事件或格式不符時返回 None
+
+    log 可為完整日誌行 ("Program log: ray_log: ...") 或其中的 base64。
+    pool_coin / pool_pc 為 swap 前扣除待提取收益後的儲備。
+    """
+    payload = log.rsplit(RAY_LOG_PREFIX, 1)[-1].strip()
+    try:
+        raw = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if len(raw) != _SWAP_BASE_IN.size or raw[0] != RAY_LOG_SWAP_BASE_IN:
+        return None
+    return dict(zip(SWAP_BASE_IN_FIELDS, _SWAP_BASE_IN.unpack(raw)[1:]))
+
+
+def swap_events(logs: Sequence[str]) -> List[Dict[str, int]]:
+    """交易日誌中所有 SwapBaseIn 事件"""
+    events = []
+    for line in logs:
+        if RAY_LOG_PREFIX in line:
+            event = parse_swap_base_in(line)
+            if event is not None:
+                events.append(event)
+    return events
+
+
+def quote_event(event: Dict[str, int], fee_bps: int = RAYDIUM_FEE_BPS) -> int:
+    """以事件中的儲備重算輸出量，應等於 event["out_amount"]"""
+    coin_to_pc = event["direction"] == DIRECTION_COIN2PC
+    reserve_in, reserve_out = ((event["pool_coin"], event["pool_pc"]) if coin_to_pc
+                               else (event["pool_pc"], event["pool_coin"]))
+    return quote_exact(reserve_in, reserve_out, event["amount_in"], fee_bps)[0]
+
+
+class QuoteEngine:
+    """多個池子的向量化報價
+
+    池子佔用的格子在移除後重複使用；容量不足時陣列加倍。
+    方向: coin_to_pc=True 為賣 coin 換 pc，False 為用 pc 買 coin。
+    """
+
+    def __init__(self, capacity: int = 1024, fee_bps: int = RAYDIUM_FEE_BPS):
+        self.fee_bps = fee_bps
+        self.coin = np.zeros(capacity, dtype=np.float64)
+        self.pc = np.zeros(capacity, dtype=np.float64)
+        self.coin_scale = np.ones(capacity, dtype=np.float64)
+        self.pc_scale = np.ones(capacity, dtype=np.float64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self._index: Dict[str, int] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, pool: str) -> bool:
+        return pool in self._index
+
+    @property
+    def pools(self) -> List[str]:
+        return list(self._index)
+
+    def _grow(self) -> None:
+        old = len(self.coin)
+        for name in ("coin", "pc", "coin_scale", "pc_scale", "active"):
+            array = getattr(self, name)
+            fill = np.ones if name.endswith("scale") else np.zeros
+            grown = fill(old * 2, dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        self._free.extend(range(old * 2 - 1, old - 1, -1))
+
+    def update(self, pool: str, coin_amount: int, pc_amount: int, coin_decimals: int, pc_decimals: int) -> None:
+        """寫入池子最新的金庫餘額 (最小單位)"""
+        slot = self._index.get(pool)
+        if slot is None:
+            if not self._free:
+                self._grow()
+            slot = self._index[pool] = self._free.pop()
+            self.coin_scale[slot] = 10.0 ** coin_decimals
+            self.pc_scale[slot] = 10.0 ** pc_decimals
+            self.active[slot] = True
+        self.coin[slot] = coin_amount
+        self.pc[slot] = pc_amount
+
+    def update_from_reserves(self, reserves) -> None:
+        """ReserveTracker 的 on_update 回調 (PoolReserves)"""
+        self.update(reserves.pool, reserves.coin_amount, reserves.pc_amount,
+                    reserves.coin_decimals, reserves.pc_decimals)
+
+    def remove(self, pool: str) -> None:
+        slot = self._index.pop(pool, None)
+        if slot is None:
+            return
+        self.active[slot] = False
+        self.coin[slot] = self.pc[slot] = 0.0
+        self._free.append(slot)
+
+    def slots(self, pools: Sequence[str]) -> np.ndarray:
+        missing = [pool for pool in pools if pool not in self._index]
+        if missing:
+            raise KeyError(f"pools not tracked: {', '.join(missing[:5])}")
+        return np.fromiter((self._index[pool] for pool in pools), dtype=np.int64, count=len(pools))
+
+    def quote(self, pools: Union[Sequence[str], np.ndarray], amounts_in, coin_to_pc=True) -> Dict[str, np.ndarray]:
+        """對一組池子報價
+
+        pools 為池子地址或 slots() 的結果；amounts_in 為輸入的最小單位數量，
+        形狀可為 (池子數,) 或 (池子數, 數量數)，也可以是單一數值；
+        coin_to_pc 可為布林值或每個池子一個的布林陣列。返回的陣列形狀與
+        amounts_in 廣播後一致:
+
+        - amount_out: 輸出數量 (最小單位，向下取整)
+        - fee: 手續費 (輸入代幣的最小單位)
+        - execution_price / spot_price: 每單位 coin 的 pc 價格 (已換算小數位)
+        - price_impact: 1 - 成交價 / 交易前中間價 (含手續費)
+        """
+        slots = pools if isinstance(pools, np.ndarray) else self.slots(pools)
+        amounts = np.asarray(amounts_in, dtype=np.float64)
+        direction = np.asarray(coin_to_pc, dtype=bool)
+        extra = (slice(None),) + (None,) * max(amounts.ndim - 1, 0)
+
+        coin, pc = self.coin[slots][extra], self.pc[slots][extra]
+        if direction.ndim:
+            direction = direction[extra]
+        reserve_in = np.where(direction, coin, pc)
+        reserve_out = np.where(direction, pc, coin)
+
+        fee = np.ceil(amounts * self.fee_bps / FEE_DENOMINATOR)
+        net = amounts - fee
+        with np.errstate(divide="ignore", invalid="ignore"):
+            amount_out = np.floor(reserve_out * net / (reserve_in + net))
+            amount_out = np.nan_to_num(amount_out, nan=0.0, posinf=0.0)
+
+            coin_scale, pc_scale = self.coin_scale[slots][extra], self.pc_scale[slots][extra]
+            spot = (pc / pc_scale) / (coin / coin_scale)
+            coin_amount = np.where(direction, amounts, amount_out) / coin_scale
+            pc_amount = np.where(direction, amount_out, amounts) / pc_scale
+            execution = pc_amount / coin_amount
+            # 賣出 coin: 成交價低於中間價；買入 coin: 成交價高於中間價
+            impact = np.where(direction, 1 - execution / spot, 1 - spot / execution)
+
+        return {
+            'amount_out': amount_out,
+            'fee': fee,
+            'execution_price': execution,
+            'spot_price': np.broadcast_to(spot, amount_out.shape),
+            'price_impact': impact,
+        }
+
+    def quote_all(self, amounts_in, coin_to_pc=True) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """所有追蹤中的池子 x amounts_in (一維) 的報價表"""
+        pools = self.pools
+        slots = self.slots(pools)
+        amounts = np.broadcast_to(np.asarray(amounts_in, dtype=np.float64), (len(pools), np.size(amounts_in)))
+        return pools, self.quote(slots, amounts, coin_to_pc)
+
+    def max_amount_in(self, pool: str, max_impact: float, coin_to_pc: bool = True) -> Optional[int]:
+        """價格影響不超過 max_impact 的最大輸入量 (最小單位)
+
+        恆定乘積下 impact = 1 - (1 - f) * R / (R + x (1 - f))，可直接反解。
+        """
+        slot = self._index.get(pool)
+        if slot is None:
+            return None
+        reserve_in = self.coin[slot] if coin_to_pc else self.pc[slot]
+        keep = 1 - self.fee_bps / FEE_DENOMINATOR
+        if max_impact <= 1 - keep:
+            return 0
+        return int(reserve_in * (keep / (1 - max_impact) - 1) / keep)
+
+
+def main() -> None:
+    """拉取交易的 ray_log，印出測試用的向量並與 quote_exact 核對"""
+    from solana_bot.rpc_pool import RpcPool
+
+    parser = argparse.ArgumentParser(description="Check Raydium swaps against quote_exact")
+    parser.add_argument("signatures", nargs="+", help="transaction signatures with a swapBaseIn")
+    parser.add_argument("--rpc", action="append", default=None, help="RPC endpoint (repeatable)")
+    args = parser.parse_args()
+    rpc = RpcPool(args.rpc or ["https://api.mainnet-beta.solana.com"])
+    for signature in args.signatures:
+        tx = rpc.call_sync("getTransaction", [signature, {"encoding": "json", "maxSupportedTransactionVersion": 0}])
+        logs = ((tx or {}).get("meta") or {}).get("logMessages") or []
+        for event in swap_events(logs):
+            fields = ", ".join(f"{event[name]}" for name in ("amount_in", "direction", "pool_coin", "pool_pc", "out_amount"))
+            status = "ok" if quote_event(event) == event["out_amount"] else f"MISMATCH quote={quote_event(event)}"
+            print(f"    ({fields}),  # {signature[:16]}... {status}")
+
+
+if __name__ == "__main__":
+    main()
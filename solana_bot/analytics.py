@@ -0,0 +1,95 @@
+"""在匯出的 Parquet 上用 DuckDB 查詢，不碰正在寫入的 SQLite
+
+匯出的每個表 (見 solana_bot.parquet_export) 註冊為同名的 view，
+date 分區欄位可直接用於過濾 (只讀需要的日期目錄)。
+
+用法:
+    python -m solana_bot.analytics --report volume-by-token-hour --since 2025-03-01
+    python -m solana_bot.analytics "SELECT date, count(*) FROM pools GROUP BY date ORDER BY date"
+"""
+import argparse
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+REPORTS = {
+    # 每小時各代幣的大額交易量 (以輸出代幣計)
+    'volume-by-token-hour': """
+        SELECT date_trunc('hour', to_timestamp(timestamp)) AS hour,
+               output_token_symbol AS token,
+               output_token_address AS mint,
+               count(*) AS swaps,
+               round(sum(swap_amount), 3) AS volume_sol
+        FROM swaps
+        WHERE date >= $since
+        GROUP BY ALL
+        ORDER BY hour DESC, volume_sol DESC
+    """,
+    # 每小時新池子數與其中 SOL 交易對的比例
+    'pool-launch-rate': """
+        SELECT date_trunc('hour', strptime(timestamp, '%Y-%m-%d %H:%M:%S UTC')) AS hour,
+               count(*) AS pools,
+               round(avg(CASE WHEN pair_symbol IN ('SOL', 'WSOL') THEN 1 ELSE 0 END), 3) AS sol_pair_ratio
+        FROM pools
+        WHERE date >= $since
+        GROUP BY ALL
+        ORDER BY hour DESC
+    """,
+    # 交易最活躍的錢包
+    'top-signers': """
+        SELECT signer, count(*) AS swaps, round(sum(swap_amount), 3) AS volume_sol,
+               count(DISTINCT output_token_address) AS tokens
+        FROM swaps
+        WHERE date >= $since AND signer IS NOT NULL
+        GROUP BY signer
+        ORDER BY volume_sol DESC
+        LIMIT 50
+    """,
+}
+
+
+def connect(parquet_dir: str) -> duckdb.DuckDBPyConnection:
+    """為每個已匯出的表建立 view"""
+    conn = duckdb.connect()
+    root = Path(parquet_dir)
+    table_dirs = sorted(path for path in root.iterdir() if path.is_dir()) if root.exists() else []
+    for table_dir in table_dirs:
+        if not any(table_dir.glob("date=*/*.parquet")):
+            continue
+        pattern = str(table_dir / "date=*" / "*.parquet").replace("'", "''")
+        conn.execute(
+            f"CREATE VIEW {table_dir.name} AS "
+            f"SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+        )
+    return conn
+
+
+def run(parquet_dir: str, sql: str, since: Optional[str] = None, csv: bool = False) -> None:
+    conn = connect(parquet_dir)
+    params = {'since': since or '1970-01-01'} if "$since" in sql else None
+    relation = conn.sql(sql, params=params) if params else conn.sql(sql)
+    if csv:
+        columns = relation.columns
+        print(",".join(columns))
+        for row in relation.fetchall():
+            print(",".join("" if value is None else str(value) for value in row))
+    else:
+        relation.show(max_rows=200)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query exported Parquet partitions with DuckDB")
+    parser.add_argument("sql", nargs="?", help="SQL over the swaps / pools views")
+    parser.add_argument("--report", choices=sorted(REPORTS), help="built-in report instead of SQL")
+    parser.add_argument("--since", help="YYYY-MM-DD, first partition date for reports")
+    parser.add_argument("--dir", default="data/parquet", help="parquet_export output directory")
+    parser.add_argument("--csv", action="store_true", help="print CSV instead of a table")
+    args = parser.parse_args()
+    if bool(args.sql) == bool(args.report):
+        parser.error("give either SQL or --report")
+    run(args.dir, REPORTS[args.report] if args.report else args.sql, args.since, args.csv)
+
+
+if __name__ == "__main__":
+    main()
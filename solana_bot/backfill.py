@@ -0,0 +1,174 @@
+"""WebSocket 斷線期間漏掉的交易回補
+
+斷線到重新訂閱之間的日誌通知不會補發。重連後用 getSignaturesForAddress
+取回地址 (建池專用帳戶或程序) 在這段 slot 區間內的簽名，交給處理函數補處理:
+
+- 簽名由新到舊排列，只能以 before 游標往回翻頁；每個地址的每個區間各自
+  一條翻頁任務，多個地址並行
+- 每頁取回後立即交給處理函數並行處理 (concurrency 限制同時處理的數量)，
+  不等翻頁結束；直播串流同時照常處理
+- 區間為 [from_slot, to_slot]: from_slot 為斷線前最後收到通知的 slot，
+  to_slot 為重連時的 slot (None 為不限)；邊界上與直播串流重疊的簽名由
+  處理函數去重
+- 失敗的交易 (err 不為空) 直接跳過
+- 單次回補最多 max_signatures 個簽名，長時間斷線不會無限制拉取；超過
+  上限或翻頁失敗時，沒翻到的較舊區間記在 pending，下次 run 一併回補
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from solana_bot.metrics import counter, histogram
+from solana_bot.rpc_types import SignatureInfo, signatures_decoder
+
+logger = logging.getLogger(__name__)
+
+# getSignaturesForAddress 單頁上限
+MAX_PAGE_SIZE = 1000
+
+# (method, params) -> 響應 bytes，例如 RpcPool.post
+PostFunc = Callable[[str, list], Awaitable[bytes]]
+# 處理一個漏掉的簽名
+SignatureHandler = Callable[[SignatureInfo], Awaitable[None]]
+# [from_slot, to_slot]，to_slot 為 None 表示不限
+SlotRange = Tuple[int, Optional[int]]
+
+BACKFILL_RUNS = counter("backfill_runs_total", "Reconnect gap backfills started")
+BACKFILL_PAGES = counter("backfill_pages_total", "getSignaturesForAddress pages fetched by backfill", ["address"])
+BACKFILL_SIGNATURES = counter("backfill_signatures_total", "Signatures handed to the handler by backfill", ["address"])
+BACKFILL_TRUNCATED = counter("backfill_truncated_total", "Backfills stopped at max_signatures")
+BACKFILL_SECONDS = histogram("backfill_seconds", "Time to page and process a reconnect gap",
+                             buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300))
+BACKFILL_GAP_SLOTS = histogram("backfill_gap_slots", "Slots between the last notification and the reconnect",
+                               buckets=(1, 5, 10, 25, 50, 100, 250, 1000, 5000))
+
+
+class GapBackfill:
+    def __init__(self, post: PostFunc, handler: SignatureHandler, commitment: str = "finalized",
+                 concurrency: int = 8, max_signatures: int = 5000, page_size: int = MAX_PAGE_SIZE):
+        self.post = post
+        self.handler = handler
+        self.commitment = commitment
+        self.max_signatures = max_signatures
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        # 多次回補 (連續斷線) 共用同一個並行上限
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # 地址 -> 尚未回補完的區間 (按起點排序、互不重疊)
+        self.pending: Dict[str, List[SlotRange]] = {}
+
+    @property
+    def pending_slots(self) -> int:
+        """pending 區間的 slot 總數 (不限上界的區間不計)"""
+        return sum(high - low + 1 for ranges in self.pending.values() for low, high in ranges if high is not None)
+
+    def keep_pending(self, address: str, from_slot: int, to_slot: Optional[int]) -> None:
+        """記下未完成的區間，與已有的重疊或相鄰區間合併"""
+        ranges = sorted(self.pending.get(address, []) + [(from_slot, to_slot)], key=lambda r: r[0])
+        merged = [ranges[0]]
+        for low, high in ranges[1:]:
+            last_low, last_high = merged[-1]
+            if last_high is None or low <= last_high + 1:
+                merged[-1] = (last_low, None if last_high is None or high is None else max(last_high, high))
+            else:
+                merged.append((low, high))
+        self.pending[address] = merged
+
+    async def fetch_page(self, address: str, before: Optional[str] = None) -> List[SignatureInfo]:
+        options = {"limit": self.page_size, "commitment": self.commitment}
+        if before:
+            options["before"] = before
+        response = signatures_decoder.decode(await self.post("getSignaturesForAddress", [address, options]))
+        if response.error is not None:
+            raise RuntimeError(f"getSignaturesForAddress: {response.error}")
+        BACKFILL_PAGES.labels(address).inc()
+        return response.result or []
+
+    async def run(self, addresses: Sequence[str], from_slot: int, to_slot: Optional[int] = None) -> int:
+        """回補各地址在 [from_slot, to_slot] 內的簽名與上次留下的 pending 區間，
+        返回交給處理函數的數量"""
+        BACKFILL_RUNS.inc()
+        if to_slot is not None:
+            BACKFILL_GAP_SLOTS.observe(max(to_slot - from_slot, 0))
+        started = time.perf_counter()
+        jobs: List[Tuple[str, int, Optional[int]]] = [(address, from_slot, to_slot) for address in addresses]
+        pending, self.pending = self.pending, {}
+        for address, ranges in pending.items():
+            jobs.extend((address, low, high) for low, high in ranges)
+        # 各區間共用的簽名額度
+        budget = [self.max_signatures]
+        counts = await asyncio.gather(
+            *(self._backfill_range(address, low, high, budget) for address, low, high in jobs),
+            return_exceptions=True
+        )
+        total = 0
+        for (address, low, high), count in zip(jobs, counts):
+            if isinstance(count, asyncio.CancelledError):
+                raise count
+            if isinstance(count, Exception):
+                logger.error(f"Backfill failed for {address}: {str(count)}")
+                self.keep_pending(address, low, high)
+            else:
+                total += count
+        elapsed = time.perf_counter() - started
+        BACKFILL_SECONDS.observe(elapsed)
+        logger.info(f"Backfilled {total} signatures in slots {from_slot}-{to_slot if to_slot is not None else 'latest'} "
+                    f"({elapsed:.1f}s)")
+        if self.pending:
+            logger.warning(f"Backfill pending for next run: {self.pending}")
+        return total
+
+    async def _backfill_range(self, address: str, from_slot: int, to_slot: Optional[int],
+                              budget: List[int]) -> int:
+        tasks: List[asyncio.Task] = []
+        try:
+            unfinished = await self._page(address, from_slot, to_slot, budget, tasks)
+            if unfinished is not None:
+                self.keep_pending(address, *unfinished)
+            # 已排入的簽名照常處理完
+            BACKFILL_SIGNATURES.labels(address).inc(len(tasks))
+            await asyncio.gather(*tasks)
+            return len(tasks)
+        finally:
+            # 被取消時不留下處理中的任務
+            for task in tasks:
+                task.cancel()
+
+    async def _page(self, address: str, from_slot: int, to_slot: Optional[int], budget: List[int],
+                    tasks: List[asyncio.Task]) -> Optional[SlotRange]:
+        """往回翻頁，每個區間內的簽名立即排入處理；返回沒翻到的區間，翻完為 None"""
+        before = None
+        # 已排入的最舊 slot: 同一 slot 可能還有沒翻到的簽名，未完成區間包含它
+        reached = to_slot
+        while True:
+            try:
+                page = await self.fetch_page(address, before)
+            except Exception as e:
+                logger.error(f"Backfill paging failed for {address}: {str(e)}")
+                return from_slot, reached
+            if not page:
+                return None
+            for info in page:
+                if info.slot < from_slot or info.err is not None:
+                    continue
+                if to_slot is not None and info.slot > to_slot:
+                    continue
+                if budget[0] <= 0:
+                    BACKFILL_TRUNCATED.inc()
+                    logger.warning(f"Backfill for {address} stopped at {self.max_signatures} signatures, "
+                                   f"slots {from_slot}-{info.slot} kept for the next run")
+                    return from_slot, info.slot
+                budget[0] -= 1
+                reached = info.slot
+                tasks.append(asyncio.create_task(self._handle(info)))
+            # 已翻過區間起點或沒有更舊的簽名
+            if page[-1].slot < from_slot or len(page) < self.page_size:
+                return None
+            before = page[-1].signature
+
+    async def _handle(self, info: SignatureInfo) -> None:
+        async with self._semaphore:
+            try:
+                await self.handler(info)
+            except Exception as e:
+                logger.error(f"Backfill handler failed for {info.signature}: {str(e)}")
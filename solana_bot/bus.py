@@ -0,0 +1,92 @@
+"""行程內的發布 / 訂閱事件匯流排
+
+多個監控元件跑在同一個事件迴圈時，用事件互相觸發 (例如新池子出現
+就立即排入社交分析)，不必等對方下一輪掃描資料庫。
+
+- publish() 不等待訂閱者，只把事件放進各訂閱者自己的佇列
+- 每個訂閱者一個消費 task，處理慢的訂閱者不會拖住發布者或其他訂閱者
+- 佇列有上限，滿了丟棄最舊的事件並計數
+"""
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from solana_bot.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+# 事件主題
+POOL_CREATED = "pool.created"      # RaydiumMonitor: 新池子 (pool, mint, pair_mint, signature, slot)
+TOKEN_CREATED = "token.created"    # SolanaTokenDetector: 新的 Pump.fun 代幣 (mint)
+LARGE_SWAP = "swap.large"          # SwapMonitor: 大額交易 (swaps 表的一行)
+
+Handler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+EVENTS_PUBLISHED = counter("bus_events_published_total", "Events published on the in-process bus", ["topic"])
+EVENTS_DROPPED = counter("bus_events_dropped_total", "Events dropped because a subscriber queue was full", ["topic"])
+
+
+class _Subscription:
+    __slots__ = ("topic", "handler", "queue", "task", "name")
+
+    def __init__(self, topic: str, handler: Handler, max_pending: int):
+        self.topic = topic
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.task: Optional[asyncio.Task] = None
+        self.name = getattr(handler, "__qualname__", repr(handler))
+
+
+class EventBus:
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._subscriptions: Dict[str, List[_Subscription]] = {}
+        self._running = False
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """註冊處理函數 (一般函數或 coroutine function)"""
+        subscription = _Subscription(topic, handler, self.max_pending)
+        self._subscriptions.setdefault(topic, []).append(subscription)
+        if self._running:
+            subscription.task = asyncio.create_task(self._consume(subscription))
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> None:
+        EVENTS_PUBLISHED.labels(topic).inc()
+        for subscription in self._subscriptions.get(topic, ()):
+            if subscription.queue.full():
+                subscription.queue.get_nowait()
+                EVENTS_DROPPED.labels(topic).inc()
+            subscription.queue.put_nowait(event)
+
+    async def _consume(self, subscription: _Subscription) -> None:
+        while True:
+            event = await subscription.queue.get()
+            try:
+                result = subscription.handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Event handler {subscription.name} failed on {subscription.topic}: {str(e)}")
+
+    async def start(self) -> None:
+        self._running = True
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                if subscription.task is None:
+                    subscription.task = asyncio.create_task(self._consume(subscription))
+
+    async def stop(self) -> None:
+        self._running = False
+        tasks = [
+            subscription.task
+            for subscriptions in self._subscriptions.values()
+            for subscription in subscriptions
+            if subscription.task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.task = None
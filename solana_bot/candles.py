@@ -0,0 +1,292 @@
+"""由 swap 串流增量聚合 OHLCV K 線
+
+每個 (代幣, 週期) 一個 NumPy 環形緩衝區，最新一根 K 線與最近 N 根
+歷史都能 O(1) 取得；收盤的 K 線累積後批量寫入 candles 表。
+
+- K 線只在有成交的週期產生 (稀疏)，空白週期不補
+- 晚到的成交若落在緩衝區內的舊 K 線，原地更新並重新寫入 (UPSERT)
+- 追蹤的代幣數有上限，超過時淘汰最久沒有成交的代幣
+
+記憶體: 每根 K 線 7 個 float64 (56 bytes)。緩衝區先配置 INITIAL_ROWS 列，
+寫滿後加倍直到該週期的容量上限 (DEFAULT_CAPACITY: 1 秒線 5 分鐘、1 分鐘線
+4 小時、5 分鐘線 24 小時，更早的 K 線在資料庫中)。上限為每個代幣
+56 * (300 + 240 + 288) ≈ 46 KB，5000 個代幣最多約 232 MB；多數新代幣
+成交稀少，只用到初始的 3 * 16 列 (約 2.7 KB)。
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+DEFAULT_RESOLUTIONS = (1, 60, 300)
+# 各週期保留在記憶體中的 K 線數上限
+DEFAULT_CAPACITY = {1: 300, 60: 240, 300: 288}
+# 未在 DEFAULT_CAPACITY 中的週期
+FALLBACK_CAPACITY = 720
+INITIAL_ROWS = 16
+# SOL 端低於此值 (SOL) 不視為兌換: lamports 變化還包含 ATA 租金 (約 0.002)、小費等
+SOL_DUST = 0.01
+
+# 緩衝區欄位
+START, OPEN, HIGH, LOW, CLOSE, VOLUME, TRADES = range(7)
+FIELDS = 7
+
+# (mint, resolution, start_ts, open, high, low, close, volume_sol, trades)
+CandleRow = Tuple[str, int, int, float, float, float, float, float, int]
+
+CANDLES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS candles (
+        mint_address TEXT NOT NULL,
+        resolution INTEGER NOT NULL,
+        start_ts INTEGER NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume_sol REAL,
+        trades INTEGER,
+        PRIMARY KEY (mint_address, resolution, start_ts)
+    ) WITHOUT ROWID
+"""
+
+UPSERT_CANDLE_SQL = """
+    INSERT OR REPLACE INTO candles
+    (mint_address, resolution, start_ts, open, high, low, close, volume_sol, trades)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _token_deltas(pre_balances, post_balances, owner: str) -> Dict[str, float]:
+    """owner 持有的各代幣餘額變化 (ui 單位)"""
+    deltas: Dict[str, float] = {}
+    for sign, balances in ((-1.0, pre_balances or ()), (1.0, post_balances or ())):
+        for balance in balances:
+            if balance.owner != owner:
+                continue
+            amount = balance.ui_token_amount.ui_amount or 0.0
+            deltas[balance.mint] = deltas.get(balance.mint, 0.0) + sign * amount
+    return deltas
+
+
+def swap_price(meta, signer: str, min_sol: float = SOL_DUST) -> Optional[Tuple[str, float, float, bool]]:
+    """從交易 meta 推出一筆以 SOL 計價的成交
+
+    返回 (代幣 mint, 價格 SOL/代幣, 成交額 SOL, 是否為買入)，非 SOL
+    交易對或無法判斷時返回 None。SOL 端優先取簽名者的 WSOL 餘額變化，
+    WSOL 變化不足 min_sol 時使用簽名者的 lamports 變化 (扣除手續費)；
+    兩者都不足 min_sol 時 (代幣對代幣的兌換，lamports 只剩租金與小費)
+    返回 None。
+    """
+    deltas = _token_deltas(meta.pre_token_balances, meta.post_token_balances, signer)
+    sol_delta = deltas.pop(WSOL_MINT, 0.0)
+    if abs(sol_delta) < min_sol and meta.pre_balances and meta.post_balances:
+        sol_delta = (meta.post_balances[0] - meta.pre_balances[0] + (meta.fee or 0)) / 1e9
+
+    changed = [(mint, delta) for mint, delta in deltas.items() if delta]
+    if not changed or abs(sol_delta) < min_sol:
+        return None
+    mint, token_delta = max(changed, key=lambda item: abs(item[1]))
+    # 買入: 付出 SOL 得到代幣；賣出相反。兩邊同號代表不是單純的兌換
+    if (token_delta > 0) == (sol_delta > 0):
+        return None
+    volume = abs(sol_delta)
+    return mint, volume / abs(token_delta), volume, token_delta > 0
+
+
+class CandleRing:
+    """單一代幣單一週期的 K 線環形緩衝區，按需加倍到 capacity 列"""
+
+    __slots__ = ("resolution", "capacity", "data", "head", "size")
+
+    def __init__(self, resolution: int, capacity: int, initial_rows: int = INITIAL_ROWS):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.data = np.zeros((min(initial_rows, capacity), FIELDS), dtype=np.float64)
+        self.head = -1  # 目前 (最新) K 線所在列
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def current_start(self) -> Optional[int]:
+        return int(self.data[self.head, START]) if self.size else None
+
+    def update(self, ts: float, price: float, volume: float) -> Optional[Tuple[Optional[np.ndarray], np.ndarray]]:
+        """寫入一筆成交，返回 (剛收盤的 K 線, 被更新的舊 K 線)，沒有時為 None"""
+        start = int(ts // self.resolution * self.resolution)
+        current = self.current_start()
+
+        if current is not None and start <= current:
+            offset = (current - start) // self.resolution
+            row = self._find(start, offset)
+            if row is None:
+                return None  # 太舊，已經不在緩衝區中
+            self._apply(row, price, volume)
+            return None if start == current else (None, self.data[row].copy())
+
+        closed = self.data[self.head].copy() if self.size else None
+        if self.size == len(self.data) < self.capacity:
+            self._grow()
+        self.head = (self.head + 1) % len(self.data)
+        self.size = min(self.size + 1, len(self.data))
+        self.data[self.head] = (start, price, price, price, price, volume, 1)
+        return (closed, None) if closed is not None else None
+
+    def _grow(self) -> None:
+        # 按時間順序搬到加倍的緩衝區，最新一根在 size - 1
+        data = np.zeros((min(len(self.data) * 2, self.capacity), FIELDS), dtype=np.float64)
+        data[:self.size] = self.history()
+        self.data = data
+        self.head = self.size - 1
+
+    def _find(self, start: int, offset: int) -> Optional[int]:
+        # 稀疏 K 線: 最多往回找 offset 根
+        for back in range(min(offset + 1, self.size)):
+            row = (self.head - back) % len(self.data)
+            row_start = int(self.data[row, START])
+            if row_start == start:
+                return row
+            if row_start < start:
+                return None
+        return None
+
+    def _apply(self, row: int, price: float, volume: float) -> None:
+        candle = self.data[row]
+        if price > candle[HIGH]:
+            candle[HIGH] = price
+        if price < candle[LOW]:
+            candle[LOW] = price
+        candle[CLOSE] = price
+        candle[VOLUME] += volume
+        candle[TRADES] += 1
+
+    def latest(self) -> Optional[np.ndarray]:
+        return self.data[self.head] if self.size else None
+
+    def history(self, count: Optional[int] = None) -> np.ndarray:
+        """最近 count 根 K 線，由舊到新"""
+        count = self.size if count is None else min(count, self.size)
+        if not count:
+            return np.empty((0, FIELDS))
+        rows = (self.head - np.arange(count - 1, -1, -1)) % len(self.data)
+        return self.data[rows]
+
+
+class CandleAggregator:
+    """多代幣、多週期的 K 線聚合器
+
+    capacity 為每個週期保留的 K 線數上限: 整數套用到所有週期，或
+    週期 -> 上限的字典 (未列出的週期用 FALLBACK_CAPACITY)，None 為 DEFAULT_CAPACITY。
+    """
+
+    def __init__(self, resolutions: Sequence[int] = DEFAULT_RESOLUTIONS,
+                 capacity: Union[int, Dict[int, int], None] = None, max_tokens: int = 5000):
+        self.resolutions = tuple(resolutions)
+        if capacity is None:
+            capacity = DEFAULT_CAPACITY
+        if isinstance(capacity, int):
+            self.capacity = {res: capacity for res in self.resolutions}
+        else:
+            self.capacity = {res: capacity.get(res, FALLBACK_CAPACITY) for res in self.resolutions}
+        self.max_tokens = max_tokens
+        self._rings: "OrderedDict[str, Tuple[CandleRing, ...]]" = OrderedDict()
+        self._pending: Dict[Tuple[str, int, int], CandleRow] = {}
+        self.trades = 0
+
+    def _rings_for(self, mint: str) -> Tuple[CandleRing, ...]:
+        rings = self._rings.get(mint)
+        if rings is None:
+            rings = self._rings[mint] = tuple(CandleRing(res, self.capacity[res]) for res in self.resolutions)
+            while len(self._rings) > self.max_tokens:
+                evicted, old_rings = self._rings.popitem(last=False)
+                # 被淘汰代幣的未收盤 K 線也要寫入
+                for ring in old_rings:
+                    latest = ring.latest()
+                    if latest is not None:
+                        self._queue(evicted, ring.resolution, latest)
+        else:
+            self._rings.move_to_end(mint)
+        return rings
+
+    def _queue(self, mint: str, resolution: int, candle: np.ndarray) -> None:
+        start = int(candle[START])
+        self._pending[(mint, resolution, start)] = (
+            mint, resolution, start,
+            float(candle[OPEN]), float(candle[HIGH]), float(candle[LOW]), float(candle[CLOSE]),
+            float(candle[VOLUME]), int(candle[TRADES]),
+        )
+
+    def add_trade(self, mint: str, price: float, volume: float, ts: Optional[float] = None) -> None:
+        if price <= 0 or not np.isfinite(price):
+            return
+        ts = time.time() if ts is None else ts
+        self.trades += 1
+        for ring in self._rings_for(mint):
+            result = ring.update(ts, price, volume)
+            if result is None:
+                continue
+            closed, revised = result
+            if closed is not None:
+                self._queue(mint, ring.resolution, closed)
+            if revised is not None:
+                self._queue(mint, ring.resolution, revised)
+
+    def latest(self, mint: str, resolution: int = DEFAULT_RESOLUTIONS[0]) -> Optional[Dict[str, float]]:
+        """最新一根 K 線 (含未收盤)"""
+        rings = self._rings.get(mint)
+        if rings is None:
+            return None
+        candle = rings[self.resolutions.index(resolution)].latest()
+        if candle is None:
+            return None
+        return {
+            'start_ts': int(candle[START]), 'open': float(candle[OPEN]), 'high': float(candle[HIGH]),
+            'low': float(candle[LOW]), 'close': float(candle[CLOSE]), 'volume_sol': float(candle[VOLUME]),
+            'trades': int(candle[TRADES]),
+        }
+
+    def last_price(self, mint: str) -> Optional[float]:
+        rings = self._rings.get(mint)
+        if rings is None:
+            return None
+        candle = rings[0].latest()
+        return float(candle[CLOSE]) if candle is not None else None
+
+    def history(self, mint: str, resolution: int, count: Optional[int] = None) -> np.ndarray:
+        """記憶體中的最近 K 線 (欄位順序見 START..TRADES)"""
+        rings = self._rings.get(mint)
+        if rings is None:
+            return np.empty((0, FIELDS))
+        return rings[self.resolutions.index(resolution)].history(count)
+
+    @property
+    def nbytes(self) -> int:
+        """緩衝區目前佔用的記憶體"""
+        return sum(ring.nbytes for rings in self._rings.values() for ring in rings)
+
+    @property
+    def max_nbytes(self) -> int:
+        """所有代幣的緩衝區都長到上限時的記憶體"""
+        return self.max_tokens * sum(self.capacity.values()) * FIELDS * 8
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def drain(self, include_open: bool = False) -> List[CandleRow]:
+        """取出待寫入的 K 線；include_open 時連同未收盤的一起 (停止前調用)"""
+        if include_open:
+            for mint, rings in self._rings.items():
+                for ring in rings:
+                    latest = ring.latest()
+                    if latest is not None:
+                        self._queue(mint, ring.resolution, latest)
+        rows = list(self._pending.values())
+        self._pending.clear()
+        return rows
+
+    def tokens(self) -> Iterable[str]:
+        return self._rings.keys()
@@ -0,0 +1,48 @@
+"""節流的 Rich 即時面板
+
+以固定頻率 (預設每秒 4 次) 在 Rich 的刷新線程中調用 render() 重繪，
+事件處理路徑只更新計數與狀態，不做任何終端輸出。日誌經由同一個
+Console 輸出時會顯示在面板上方。非終端環境 (重導向到檔案、systemd)
+不啟動面板，只保留日誌。
+"""
+import logging
+from typing import Callable, Optional
+
+from rich.console import Console, RenderableType
+from rich.live import Live
+from rich.text import Text
+
+logger = logging.getLogger(__name__)
+
+
+class LiveDashboard:
+    def __init__(self, render: Callable[[], RenderableType], console: Console, refresh_per_second: float = 4):
+        self.render = render
+        self.console = console
+        self.refresh_per_second = refresh_per_second
+        self._live: Optional[Live] = None
+
+    def _safe_render(self) -> RenderableType:
+        # 刷新線程中的例外會讓面板停止更新，這裡改為顯示錯誤
+        try:
+            return self.render()
+        except Exception as e:
+            return Text(f"dashboard render error: {str(e)}", style="red")
+
+    def start(self) -> bool:
+        if self._live is not None or not self.console.is_terminal:
+            return False
+        self._live = Live(
+            console=self.console,
+            get_renderable=self._safe_render,
+            refresh_per_second=self.refresh_per_second,
+            redirect_stdout=True,
+            redirect_stderr=True,
+        )
+        self._live.start()
+        return True
+
+    def stop(self) -> None:
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
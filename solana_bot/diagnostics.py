@@ -0,0 +1,301 @@
+"""長時間運行監控器的線上診斷
+
+不需重啟或掛上外部 profiler，就能在運行中的行程裡取得:
+
+- 取樣式 CPU profile: 背景線程按固定間隔讀取 sys._current_frames()，
+  累計呼叫堆疊，輸出 folded stacks 檔 (可直接給 flamegraph.pl /
+  speedscope 使用)。協程執行中時其 frame 就在事件迴圈線程的堆疊上，
+  所以能直接看到是哪個協程的哪一行在耗時。
+- tracemalloc 記憶體快照: 第一次觸發開始追蹤，之後每次觸發輸出
+  前 N 個分配位置，以及相對上一次快照的增長。
+- 事件迴圈延遲: 協程以固定間隔 sleep 並量測超時部分；看門狗線程在
+  迴圈超過門檻未回應時抓取迴圈線程的堆疊，直接指出卡住的程式碼。
+
+觸發方式: SIGUSR1 (profile + 記憶體快照) 或本機 HTTP 端點
+/debug/profile?seconds=N、/debug/memory?top=N、/debug/loop。
+"""
+import asyncio
+import linecache
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .http_server import LocalHttpServer, json_response
+from .metrics import counter, gauge, histogram
+
+logger = logging.getLogger(__name__)
+
+DIAGNOSTICS_DIR = os.getenv("DIAGNOSTICS_DIR", "diagnostics")
+PROFILE_SECONDS = float(os.getenv("PROFILE_SECONDS", "30"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))  # 取樣間隔(秒)
+LOOP_STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.5"))  # 迴圈無回應多久視為卡住(秒)
+
+LOOP_LAG = histogram("event_loop_lag_seconds", "Extra delay of a scheduled event loop wakeup",
+                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_STALLS = counter("event_loop_stalls_total", "Times the event loop stopped responding past the threshold")
+TRACED_MEMORY = gauge("tracemalloc_traced_bytes", "Memory currently traced by tracemalloc",
+                      callback=lambda: tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def format_stack(frame, limit: int = 64) -> List[str]:
+    """由外到內的呼叫鏈"""
+    labels = []
+    while frame is not None and len(labels) < limit:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime('%Y%m%d-%H%M%S')
+
+
+def _output_path(prefix: str, suffix: str) -> str:
+    os.makedirs(DIAGNOSTICS_DIR, exist_ok=True)
+    return os.path.join(DIAGNOSTICS_DIR, f"{prefix}-{_timestamp()}.{suffix}")
+
+
+class StackSampler:
+    """取樣式 profiler，只讀取其他線程的堆疊，不影響被取樣線程的執行"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, thread_ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """阻塞取樣 seconds 秒，返回 folded stack -> 次數；需在背景線程調用"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("profile already running")
+        try:
+            own_id = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id or (thread_ids and thread_id not in thread_ids):
+                        continue
+                    thread_name = names.get(thread_id, str(thread_id))
+                    stacks[";".join([thread_name] + format_stack(frame))] += 1
+                time.sleep(self.interval)
+            return dict(stacks)
+        finally:
+            self._lock.release()
+
+    def profile_to_file(self, seconds: float, thread_ids: Optional[List[int]] = None) -> Dict:
+        stacks = self.sample(seconds, thread_ids)
+        path = _output_path("profile", "folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+
+        # 以最內層 frame 統計 self time
+        leaf_counts: Counter = Counter()
+        for stack, count in stacks.items():
+            leaf_counts[stack.rsplit(";", 1)[-1]] += count
+        total = sum(stacks.values())
+        logger.info(f"Profile written to {path} ({total} samples over {seconds:.0f}s)")
+        return {
+            'path': path,
+            'samples': total,
+            'top_self': [
+                {'frame': frame, 'samples': count, 'share': round(count / total, 4) if total else 0}
+                for frame, count in leaf_counts.most_common(20)
+            ],
+        }
+
+
+class MemoryTracker:
+    """tracemalloc 快照，第一次調用時才開始追蹤 (追蹤本身會增加記憶體與 CPU 開銷)"""
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def snapshot(self, top: int = 25) -> Dict:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            logger.info("tracemalloc started; trigger again later to capture a snapshot")
+            return {'status': 'started', 'message': 'tracemalloc started, trigger again to capture a snapshot'}
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        top_stats = snapshot.statistics('lineno')[:top]
+        growth = snapshot.compare_to(self._previous, 'lineno')[:top] if self._previous else []
+        self._previous = snapshot
+
+        path = _output_path("memory", "txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"traced current={current} peak={peak}\n\n[top {top} by size]\n")
+            for stat in top_stats:
+                f.write(f"{stat}\n")
+            if growth:
+                f.write(f"\n[top {top} growth since previous snapshot]\n")
+                for stat in growth:
+                    f.write(f"{stat}\n")
+            if top_stats:
+                f.write("\n[largest allocation traceback]\n")
+                f.write("\n".join(top_stats[0].traceback.format()) + "\n")
+        logger.info(f"Memory snapshot written to {path} (traced {current / 1024 / 1024:.1f} MB)")
+        return {
+            'status': 'captured',
+            'path': path,
+            'traced_bytes': current,
+            'peak_bytes': peak,
+            'top': [str(stat) for stat in top_stats],
+            'growth': [str(stat) for stat in growth],
+        }
+
+
+class LoopLagMonitor:
+    """量測事件迴圈延遲，迴圈卡住時由看門狗線程抓取卡住位置的堆疊"""
+
+    def __init__(self, interval: float = 0.1, stall_threshold: float = LOOP_STALL_THRESHOLD):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stalls = 0
+        self.recent_stalls: List[Dict] = []
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._heartbeat = now
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG.observe(lag)
+
+    def _watch(self) -> None:
+        stalled = False
+        while not self._stopped.wait(self.stall_threshold / 2):
+            blocked_for = time.monotonic() - self._heartbeat
+            if blocked_for < self.stall_threshold + self.interval:
+                stalled = False
+                continue
+            if stalled:
+                # 同一次卡住只記錄一次
+                continue
+            stalled = True
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = format_stack(frame) if frame is not None else []
+            self.stalls += 1
+            LOOP_STALLS.inc()
+            self.recent_stalls = (self.recent_stalls + [{
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'blocked_seconds': round(blocked_for, 3),
+                'stack': stack,
+            }])[-10:]
+            logger.warning(
+                f"Event loop blocked for {blocked_for:.2f}s at:\n  " + "\n  ".join(stack[-12:])
+            )
+
+    def status(self) -> Dict:
+        return {
+            'last_lag_seconds': round(self.last_lag, 4),
+            'max_lag_seconds': round(self.max_lag, 4),
+            'stall_threshold_seconds': self.stall_threshold,
+            'stalls': self.stalls,
+            'recent_stalls': self.recent_stalls,
+        }
+
+
+class Diagnostics:
+    """把 profiler、記憶體快照與迴圈延遲組合起來，掛到信號與 HTTP 端點上"""
+
+    def __init__(self, stall_threshold: float = LOOP_STALL_THRESHOLD):
+        self.sampler = StackSampler()
+        self.memory = MemoryTracker()
+        self.loop_monitor = LoopLagMonitor(stall_threshold=stall_threshold)
+        if os.getenv("TRACEMALLOC", "").lower() in ("true", "1", "t"):
+            tracemalloc.start(self.memory.frames)
+
+    async def start(self) -> None:
+        """在事件迴圈中調用: 啟動延遲量測並註冊 SIGUSR1"""
+        self.loop_monitor.start()
+        if hasattr(signal, "SIGUSR1"):
+            try:
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGUSR1, lambda: asyncio.create_task(self.capture())
+                )
+            except (NotImplementedError, RuntimeError):
+                pass
+
+    async def stop(self) -> None:
+        await self.loop_monitor.stop()
+
+    async def profile(self, seconds: float = PROFILE_SECONDS) -> Dict:
+        # 取樣在背景線程進行，事件迴圈照常運行
+        return await asyncio.get_running_loop().run_in_executor(None, self.sampler.profile_to_file, seconds)
+
+    async def memory_snapshot(self, top: int = 25) -> Dict:
+        # 大量分配時統計需要數秒，同樣放到背景線程
+        return await asyncio.get_running_loop().run_in_executor(None, self.memory.snapshot, top)
+
+    async def capture(self, seconds: float = PROFILE_SECONDS) -> None:
+        """SIGUSR1: 記憶體快照 + 限時 profile"""
+        logger.info(f"Diagnostics triggered: memory snapshot and {seconds:.0f}s profile")
+        try:
+            await self.memory_snapshot()
+            await self.profile(seconds)
+        except Exception as e:
+            logger.error(f"Diagnostics capture failed: {str(e)}")
+
+    def add_routes(self, server: LocalHttpServer) -> LocalHttpServer:
+        async def profile_route(query):
+            seconds = min(float(query.get('seconds', 10)), 300)
+            try:
+                return json_response(await self.profile(seconds))
+            except RuntimeError as e:
+                return json_response({'error': str(e)}, status=400)
+
+        async def memory_route(query):
+            return json_response(await self.memory_snapshot(int(query.get('top', 25))))
+
+        server.route('/debug/profile', profile_route)
+        server.route('/debug/memory', memory_route)
+        server.route('/debug/loop', lambda query: json_response(self.loop_monitor.status()))
+        return server
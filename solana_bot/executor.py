@@ -0,0 +1,546 @@
+"""低延遲的 swap 交易執行
+
+偵測到機會之後才開始組交易，要先等 getLatestBlockhash、優先費估計
+等好幾次 RPC 往返。這裡把能提前做的事都放到背景:
+
+- 背景循環持續刷新最近的 blockhash 與優先費 (compute unit price)，
+  送單時直接從記憶體取用；刷新也讓各 RPC 的 keep-alive 連線保持溫熱
+- Raydium / Jupiter 的 swap 指令預先組好模板，送單時只填入數量
+- 本地以 solders 簽名，同一筆已簽名交易並行廣播到所有 RPC 端點
+  (skipPreflight)，確認前定期重送
+- 廣播前先 signatureSubscribe，不會漏掉很快落地的確認通知；訂閱走常駐的
+  WsMultiplexer 連線 (可與其他元件共用)，送單時不必重新建立 WebSocket
+
+查詢 (blockhash / 優先費刷新、模板所需的帳戶) 使用當前端點，失敗時依序
+換下一個端點重試 (同 RpcPool)；sendTransaction 則送到每個端點。
+
+RPC 與 WebSocket 端點都由參數傳入，可以直接指向 solana-test-validator
+或本機的替身 RPC 測試。
+"""
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import msgspec
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+from spl.token.constants import TOKEN_PROGRAM_ID, WRAPPED_SOL_MINT
+from spl.token.instructions import (
+    CloseAccountParams,
+    SyncNativeParams,
+    close_account,
+    create_idempotent_associated_token_account,
+    get_associated_token_address,
+    sync_native,
+)
+
+from solana_bot.lookup_tables import decode_lookup_table
+from solana_bot.metrics import RPC_ERRORS, RPC_LATENCY, counter, endpoint_label, histogram
+from solana_bot.ws_mux import WsMultiplexer
+
+logger = logging.getLogger(__name__)
+
+RAYDIUM_AMM_PROGRAM = Pubkey.from_string("675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8")
+RAYDIUM_AUTHORITY = Pubkey.from_string("5Q544fKrFoe6tsEbD7S8EmxGTJYAKtTVhAW5Q5pge4j1")
+SWAP_BASE_IN = 9
+
+JUPITER_API = "https://quote-api.jup.ag/v6"
+
+BROADCASTS = counter("executor_broadcasts_total", "sendTransaction results per endpoint", ["endpoint", "result"])
+EXECUTION_LATENCY = histogram("executor_stage_seconds", "Execution latency by stage", ["stage"])
+CONFIRMATIONS = counter("executor_confirmations_total", "Execution outcomes", ["result"])
+
+# 輸入交易的可寫帳戶，返回建議的 compute unit price (micro-lamports)；
+# 例如 PriorityFeeEstimator.fee_for，沒有估計時返回 None
+FeeSource = Callable[[List[str]], Optional[int]]
+
+
+def load_keypair(source: str) -> Keypair:
+    """solana-keygen 的 JSON 陣列檔案，或 base58 私鑰字串"""
+    path = Path(source).expanduser()
+    if path.is_file():
+        return Keypair.from_bytes(bytes(json.loads(path.read_text())))
+    return Keypair.from_base58_string(source.strip())
+
+
+# Serum / OpenBook 市場帳戶中 swap 需要的欄位 (前 5 bytes 為 "serum" 填充)
+_MARKET_NONCE = 45
+_MARKET_BASE_VAULT = 117
+_MARKET_QUOTE_VAULT = 165
+_MARKET_EVENT_QUEUE = 253
+_MARKET_BIDS = 285
+_MARKET_ASKS = 317
+
+
+def _pubkey_at(data: bytes, offset: int) -> Pubkey:
+    return Pubkey.from_bytes(data[offset:offset + 32])
+
+
+@dataclass(frozen=True)
+class RaydiumPoolKeys:
+    """Raydium AMM v4 swap 需要的全部帳戶"""
+    amm: Pubkey
+    open_orders: Pubkey
+    target_orders: Pubkey
+    coin_vault: Pubkey
+    pc_vault: Pubkey
+    coin_mint: Pubkey
+    pc_mint: Pubkey
+    market_program: Pubkey
+    market: Pubkey
+    market_bids: Pubkey
+    market_asks: Pubkey
+    market_event_queue: Pubkey
+    market_coin_vault: Pubkey
+    market_pc_vault: Pubkey
+    market_vault_signer: Pubkey
+
+    @classmethod
+    def from_initialize2(cls, accounts: Sequence[str], market_data: bytes) -> "RaydiumPoolKeys":
+        """由 initialize2 指令的帳戶列表與市場帳戶資料組出
+
+        initialize2 帳戶順序: 4 amm、6 open orders、7 lp mint、8/9 coin/pc mint、
+        10/11 coin/pc 金庫、12 target orders、13 amm config、14 建池費收款帳戶、
+        15 市場程式、16 市場
+        """
+        keys = [Pubkey.from_string(account) for account in accounts]
+        market_program, market = keys[15], keys[16]
+        nonce = struct.unpack_from("<Q", market_data, _MARKET_NONCE)[0]
+        vault_signer = Pubkey.create_program_address([bytes(market), struct.pack("<Q", nonce)], market_program)
+        return cls(
+            amm=keys[4], open_orders=keys[6], target_orders=keys[12],
+            coin_vault=keys[10], pc_vault=keys[11], coin_mint=keys[8], pc_mint=keys[9],
+            market_program=market_program, market=market,
+            market_bids=_pubkey_at(market_data, _MARKET_BIDS),
+            market_asks=_pubkey_at(market_data, _MARKET_ASKS),
+            market_event_queue=_pubkey_at(market_data, _MARKET_EVENT_QUEUE),
+            market_coin_vault=_pubkey_at(market_data, _MARKET_BASE_VAULT),
+            market_pc_vault=_pubkey_at(market_data, _MARKET_QUOTE_VAULT),
+            market_vault_signer=vault_signer,
+        )
+
+
+def _writable(key: Pubkey) -> AccountMeta:
+    return AccountMeta(key, is_signer=False, is_writable=True)
+
+
+def _readonly(key: Pubkey) -> AccountMeta:
+    return AccountMeta(key, is_signer=False, is_writable=False)
+
+
+class SwapTemplate:
+    """預先組好的 swap 指令，送單時補上 compute budget 與 blockhash 即可簽名"""
+
+    __slots__ = ("instructions", "lookup_tables", "compute_units")
+
+    def __init__(self, instructions: List[Instruction],
+                 lookup_tables: Sequence[AddressLookupTableAccount] = (), compute_units: int = 200_000):
+        self.instructions = instructions
+        self.lookup_tables = list(lookup_tables)
+        self.compute_units = compute_units
+
+
+class RaydiumSwapTemplate:
+    """Raydium AMM v4 swapBaseIn
+
+    帳戶部分 (池子、市場、使用者 ATA) 在建立時算好，每次送單只重新
+    打包 17 bytes 的指令資料。輸入為 WSOL 時自動包裝 / 關閉 WSOL 帳戶；
+    輸出為 WSOL 時 swap 後關閉 WSOL 帳戶，換得的 SOL 直接回到錢包。
+    """
+
+    def __init__(self, pool: RaydiumPoolKeys, owner: Pubkey, input_mint: Pubkey):
+        if input_mint not in (pool.coin_mint, pool.pc_mint):
+            raise ValueError(f"{input_mint} is not a mint of pool {pool.amm}")
+        self.pool = pool
+        self.owner = owner
+        self.input_mint = input_mint
+        self.output_mint = pool.pc_mint if input_mint == pool.coin_mint else pool.coin_mint
+        self.source = get_associated_token_address(owner, input_mint)
+        self.destination = get_associated_token_address(owner, self.output_mint)
+
+        self._accounts = [
+            _readonly(TOKEN_PROGRAM_ID),
+            _writable(pool.amm),
+            _readonly(RAYDIUM_AUTHORITY),
+            _writable(pool.open_orders),
+            _writable(pool.target_orders),
+            _writable(pool.coin_vault),
+            _writable(pool.pc_vault),
+            _readonly(pool.market_program),
+            _writable(pool.market),
+            _writable(pool.market_bids),
+            _writable(pool.market_asks),
+            _writable(pool.market_event_queue),
+            _writable(pool.market_coin_vault),
+            _writable(pool.market_pc_vault),
+            _readonly(pool.market_vault_signer),
+            _writable(self.source),
+            _writable(self.destination),
+            AccountMeta(owner, is_signer=True, is_writable=False),
+        ]
+        self._prefix = [create_idempotent_associated_token_account(owner, owner, self.output_mint)]
+        if input_mint == WRAPPED_SOL_MINT:
+            self._prefix.insert(0, create_idempotent_associated_token_account(owner, owner, WRAPPED_SOL_MINT))
+
+    def build(self, amount_in: int, min_amount_out: int, compute_units: int = 120_000) -> SwapTemplate:
+        instructions = list(self._prefix)
+        if self.input_mint == WRAPPED_SOL_MINT:
+            instructions.append(transfer(TransferParams(from_pubkey=self.owner, to_pubkey=self.source,
+                                                        lamports=amount_in)))
+            instructions.append(sync_native(SyncNativeParams(TOKEN_PROGRAM_ID, self.source)))
+        data = struct.pack("<BQQ", SWAP_BASE_IN, amount_in, min_amount_out)
+        instructions.append(Instruction(RAYDIUM_AMM_PROGRAM, data, self._accounts))
+        if self.input_mint == WRAPPED_SOL_MINT:
+            # 剩餘的 WSOL 換回 SOL
+            instructions.append(close_account(CloseAccountParams(
+                TOKEN_PROGRAM_ID, self.source, self.owner, self.owner
+            )))
+        elif self.output_mint == WRAPPED_SOL_MINT:
+            # 賣出得到的 WSOL 換回 SOL
+            instructions.append(close_account(CloseAccountParams(
+                TOKEN_PROGRAM_ID, self.destination, self.owner, self.owner
+            )))
+        return SwapTemplate(instructions, compute_units=compute_units)
+
+
+def _jupiter_instruction(raw: Dict) -> Instruction:
+    return Instruction(
+        Pubkey.from_string(raw['programId']),
+        base64.b64decode(raw['data']),
+        [
+            AccountMeta(Pubkey.from_string(account['pubkey']), account['isSigner'], account['isWritable'])
+            for account in raw['accounts']
+        ],
+    )
+
+
+class ExecutionResult:
+    __slots__ = ("signature", "endpoints", "confirmed", "error", "latency")
+
+    def __init__(self, signature: str):
+        self.signature = signature
+        self.endpoints: Dict[str, str] = {}
+        self.confirmed = False
+        self.error = None
+        self.latency: Dict[str, float] = {}
+
+    def as_dict(self) -> Dict:
+        return {
+            'signature': self.signature,
+            'endpoints': self.endpoints,
+            'confirmed': self.confirmed,
+            'error': self.error,
+            'latency': {stage: round(seconds, 4) for stage, seconds in self.latency.items()},
+        }
+
+
+class ExecutionEngine:
+    """持有熱資料 (blockhash、優先費、查找表) 並負責簽名、廣播、確認"""
+
+    def __init__(self, keypair: Keypair, rpc_endpoints: Sequence[str], ws_endpoint: str,
+                 blockhash_refresh: float = 2.0, fee_refresh: float = 10.0, fee_percentile: float = 75,
+                 max_compute_unit_price: int = 1_000_000, fee_source: Optional[FeeSource] = None,
+                 rebroadcast_interval: float = 2.0, ws: Optional[WsMultiplexer] = None):
+        if not rpc_endpoints:
+            raise ValueError("at least one RPC endpoint is required")
+        self.keypair = keypair
+        self.owner = keypair.pubkey()
+        self.rpc_endpoints = list(rpc_endpoints)
+        self._current = 0
+        self.ws_endpoint = ws_endpoint
+        self._owns_ws = ws is None
+        self.ws = ws or WsMultiplexer([ws_endpoint], reconnect_interval=1.0)
+        self.blockhash_refresh = blockhash_refresh
+        self.fee_refresh = fee_refresh
+        self.fee_percentile = fee_percentile
+        self.max_compute_unit_price = max_compute_unit_price
+        self.fee_source = fee_source
+        self.rebroadcast_interval = rebroadcast_interval
+
+        self.blockhash: Optional[Hash] = None
+        self.last_valid_block_height = 0
+        self.blockhash_updated = 0.0
+        self.compute_unit_price = 0
+        self._lookup_tables: Dict[str, AddressLookupTableAccount] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._client = httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_keepalive_connections=20))
+        # 第一次刷新要等到完成，之後才能送單
+        await self.refresh_blockhash()
+        await self.refresh_fee()
+        self._tasks = [
+            asyncio.create_task(self._refresh_loop(self.refresh_blockhash, self.blockhash_refresh)),
+            asyncio.create_task(self._refresh_loop(self.refresh_fee, self.fee_refresh)),
+        ]
+        if self._owns_ws:
+            self._tasks.append(asyncio.create_task(self.ws.run()))
+        logger.info(f"Execution engine ready: wallet={self.owner} endpoints={len(self.rpc_endpoints)}")
+
+    async def stop(self) -> None:
+        if self._owns_ws:
+            await self.ws.stop()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def _refresh_loop(self, refresh, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await refresh()
+            except Exception as e:
+                logger.warning(f"Executor refresh failed ({refresh.__name__}): {str(e)}")
+
+    @property
+    def endpoint(self) -> str:
+        return self.rpc_endpoints[self._current]
+
+    def _failed(self, endpoint: str) -> None:
+        # 其他請求可能已經換過端點，只在仍指向失敗端點時才前進
+        if self.endpoint == endpoint and len(self.rpc_endpoints) > 1:
+            self._current = (self._current + 1) % len(self.rpc_endpoints)
+            logger.warning(f"Executor RPC {endpoint_label(endpoint)} failed, switching to {endpoint_label(self.endpoint)}")
+
+    async def rpc(self, method: str, params: list, endpoint: Optional[str] = None):
+        """指定 endpoint 時只送到該端點；否則從當前端點開始，連線或 HTTP 錯誤時換下一個"""
+        if endpoint is not None:
+            return await self._post(endpoint, method, params)
+        error = None
+        for _ in range(len(self.rpc_endpoints)):
+            endpoint = self.endpoint
+            try:
+                return await self._post(endpoint, method, params)
+            except httpx.HTTPError as e:
+                self._failed(endpoint)
+                error = e
+        raise error
+
+    async def _post(self, endpoint: str, method: str, params: list):
+        labels = (method, endpoint_label(endpoint))
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        try:
+            with RPC_LATENCY.labels(*labels).time():
+                response = await self._client.post(endpoint, json=payload)
+            response.raise_for_status()
+            data = response.json()
+            if 'error' in data:
+                raise RuntimeError(data['error'])
+        except Exception:
+            RPC_ERRORS.labels(*labels).inc()
+            raise
+        return data['result']
+
+    async def refresh_blockhash(self) -> None:
+        result = await self.rpc("getLatestBlockhash", [{"commitment": "confirmed"}])
+        self.blockhash = Hash.from_string(result['value']['blockhash'])
+        self.last_valid_block_height = result['value']['lastValidBlockHeight']
+        self.blockhash_updated = time.time()
+
+    async def refresh_fee(self) -> None:
+        """最近 150 個 slot 的優先費取百分位數 (fee_source 沒有估計時的後備值)"""
+        result = await self.rpc("getRecentPrioritizationFees", [])
+        fees = sorted(entry['prioritizationFee'] for entry in result)
+        if not fees:
+            return
+        index = min(int(len(fees) * self.fee_percentile / 100), len(fees) - 1)
+        self.compute_unit_price = min(fees[index], self.max_compute_unit_price)
+
+    async def load_lookup_tables(self, addresses: Sequence[str]) -> List[AddressLookupTableAccount]:
+        missing = [address for address in addresses if address not in self._lookup_tables]
+        if missing:
+            result = await self.rpc("getMultipleAccounts", [missing, {"encoding": "base64"}])
+            for address, value in zip(missing, result['value']):
+                if value is None:
+                    raise RuntimeError(f"lookup table {address} not found")
+                table = decode_lookup_table(base64.b64decode(value['data'][0]))
+                self._lookup_tables[address] = AddressLookupTableAccount(
+                    Pubkey.from_string(address), [Pubkey.from_string(key) for key in table]
+                )
+        return [self._lookup_tables[address] for address in addresses]
+
+    async def raydium_template(self, initialize2_accounts: Sequence[str], input_mint: Pubkey) -> RaydiumSwapTemplate:
+        """新池子偵測到時就建立模板 (只需要一次市場帳戶查詢)"""
+        market = initialize2_accounts[16]
+        result = await self.rpc("getAccountInfo", [market, {"encoding": "base64"}])
+        if not result or not result.get('value'):
+            raise RuntimeError(f"market {market} not found")
+        market_data = base64.b64decode(result['value']['data'][0])
+        pool = RaydiumPoolKeys.from_initialize2(initialize2_accounts, market_data)
+        return RaydiumSwapTemplate(pool, self.owner, input_mint)
+
+    async def jupiter_template(self, input_mint: str, output_mint: str, amount: int,
+                               slippage_bps: int = 100) -> SwapTemplate:
+        """Jupiter 報價 + swap-instructions；compute budget 指令由本引擎自行加上"""
+        quote = await self._client.get(f"{JUPITER_API}/quote", params={
+            'inputMint': input_mint, 'outputMint': output_mint, 'amount': amount, 'slippageBps': slippage_bps,
+        })
+        quote.raise_for_status()
+        response = await self._client.post(f"{JUPITER_API}/swap-instructions", json={
+            'quoteResponse': quote.json(), 'userPublicKey': str(self.owner), 'wrapAndUnwrapSol': True,
+        })
+        response.raise_for_status()
+        body = response.json()
+        if 'error' in body:
+            raise RuntimeError(body['error'])
+
+        instructions = [_jupiter_instruction(raw) for raw in body.get('setupInstructions') or []]
+        instructions.append(_jupiter_instruction(body['swapInstruction']))
+        if body.get('cleanupInstruction'):
+            instructions.append(_jupiter_instruction(body['cleanupInstruction']))
+        lookup_tables = await self.load_lookup_tables(body.get('addressLookupTableAddresses') or [])
+        return SwapTemplate(instructions, lookup_tables, compute_units=body.get('computeUnitLimit') or 400_000)
+
+    def sign(self, template: SwapTemplate) -> VersionedTransaction:
+        if self.blockhash is None:
+            raise RuntimeError("execution engine not started (no blockhash)")
+        price = self.compute_unit_price
+        if self.fee_source is not None:
+            # 本地估計器按這筆交易實際寫入的帳戶出價，不經過 RPC
+            writable = list({
+                str(account.pubkey) for instruction in template.instructions
+                for account in instruction.accounts if account.is_writable
+            })
+            estimate = self.fee_source(writable)
+            if estimate is not None:
+                price = min(int(estimate), self.max_compute_unit_price)
+        instructions = [set_compute_unit_limit(template.compute_units)]
+        if price:
+            instructions.append(set_compute_unit_price(price))
+        instructions.extend(template.instructions)
+        message = MessageV0.try_compile(self.owner, instructions, template.lookup_tables, self.blockhash)
+        return VersionedTransaction(message, [self.keypair])
+
+    async def _send(self, endpoint: str, encoded: str) -> Tuple[str, str]:
+        label = endpoint_label(endpoint)
+        try:
+            await self.rpc("sendTransaction", [encoded, {
+                "encoding": "base64", "skipPreflight": True, "maxRetries": 0,
+            }], endpoint)
+            BROADCASTS.labels(label, "ok").inc()
+            return endpoint, "ok"
+        except Exception as e:
+            BROADCASTS.labels(label, "error").inc()
+            return endpoint, str(e)
+
+    async def broadcast(self, transaction: VersionedTransaction) -> Dict[str, str]:
+        """同一筆交易並行送到所有端點，返回 端點 -> ok / 錯誤訊息"""
+        encoded = base64.b64encode(bytes(transaction)).decode()
+        results = await asyncio.gather(*(self._send(endpoint, encoded) for endpoint in self.rpc_endpoints))
+        return dict(results)
+
+    async def _signature_status(self, signature: str) -> Optional[Dict]:
+        result = await self.rpc("getSignatureStatuses", [[signature], {"searchTransactionHistory": False}])
+        return result['value'][0]
+
+    async def execute(self, template: SwapTemplate, timeout: float = 30.0) -> ExecutionResult:
+        """簽名、廣播並等待 confirmed；逾時以 getSignatureStatuses 補查"""
+        started = time.perf_counter()
+        transaction = self.sign(template)
+        signature = str(transaction.signatures[0])
+        result = ExecutionResult(signature)
+        result.latency['sign'] = time.perf_counter() - started
+        EXECUTION_LATENCY.labels("sign").observe(result.latency['sign'])
+
+        # 先訂閱再廣播，避免確認通知比訂閱早到
+        subscription = await self.ws.subscribe("signatureSubscribe", [signature, {"commitment": "confirmed"}])
+        try:
+            try:
+                await asyncio.wait_for(subscription.ready.wait(), timeout=min(timeout, 5.0))
+            except asyncio.TimeoutError:
+                # WebSocket 不可用時照常送出，最後以 getSignatureStatuses 確認
+                logger.warning(f"signatureSubscribe not acknowledged for {signature}")
+
+            result.endpoints = await self.broadcast(transaction)
+            result.latency['broadcast'] = time.perf_counter() - started
+            EXECUTION_LATENCY.labels("broadcast").observe(result.latency['broadcast'])
+            if "ok" not in result.endpoints.values():
+                result.error = "all endpoints rejected the transaction"
+                CONFIRMATIONS.labels("rejected").inc()
+                return result
+
+            deadline = started + timeout
+            notified = False
+            while time.perf_counter() < deadline:
+                wait = min(self.rebroadcast_interval, deadline - time.perf_counter())
+                try:
+                    params = await asyncio.wait_for(subscription.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    # 尚未確認: 重送同一筆交易 (簽名相同，不會重複執行)
+                    await self.broadcast(transaction)
+                    continue
+                if params is None:
+                    # 訂閱被拒絕
+                    break
+                value = msgspec.json.decode(params)['result']['value']
+                result.confirmed = value.get('err') is None
+                result.error = value.get('err')
+                notified = True
+                break
+            if not notified:
+                status = await self._signature_status(signature)
+                if status and status.get('confirmationStatus') in ('confirmed', 'finalized'):
+                    result.confirmed = status.get('err') is None
+                    result.error = status.get('err')
+                else:
+                    result.error = "confirmation timeout"
+        finally:
+            await self.ws.unsubscribe(subscription)
+
+        result.latency['confirm'] = time.perf_counter() - started
+        EXECUTION_LATENCY.labels("confirm").observe(result.latency['confirm'])
+        CONFIRMATIONS.labels("confirmed" if result.confirmed else "failed").inc()
+        return result
+
+
+async def _ping(args) -> None:
+    """轉 1 lamport 給自己，量測簽名 / 廣播 / 確認延遲 (測試網或本機驗證器)"""
+    engine = ExecutionEngine(load_keypair(args.keypair), args.rpc, args.ws)
+    await engine.start()
+    try:
+        for _ in range(args.count):
+            template = SwapTemplate([transfer(TransferParams(
+                from_pubkey=engine.owner, to_pubkey=engine.owner, lamports=1
+            ))], compute_units=1_000)
+            result = await engine.execute(template, timeout=args.timeout)
+            print(json.dumps(result.as_dict()))
+            # 相同指令 + 相同 blockhash 會產生相同簽名，等下一個 blockhash
+            await engine.refresh_blockhash()
+    finally:
+        await engine.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Execution engine round-trip check")
+    parser.add_argument("--rpc", action="append", default=None, help="RPC endpoint (repeatable)")
+    parser.add_argument("--ws", default="ws://127.0.0.1:8900", help="WebSocket endpoint")
+    parser.add_argument("--keypair", default="~/.config/solana/id.json", help="keypair file or base58 key")
+    parser.add_argument("--count", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+    args.rpc = args.rpc or ["http://127.0.0.1:8899"]
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_ping(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""由掃描過的區塊估計優先費
+
+每筆交易的 compute unit price 寫在 ComputeBudget 的 SetComputeUnitPrice
+指令裡，SwapMonitor 下載的完整區塊本來就帶著。這裡逐筆取出，放進
+固定記憶體的滾動直方圖，查詢時直接在記憶體中算百分位數，送單時不必
+再調用 getRecentPrioritizationFees。
+
+- 價格按對數分桶 (每桶寬 10%)，百分位數的相對誤差約 5%
+- 每個 slot 一列，只保留最近 window 個 slot；新 slot 進來時扣掉
+  最舊一列，總計值不需要重新加總
+- 除了全體交易，也可以追蹤指定帳戶 (例如某個池子): 只統計把該帳戶
+  列為可寫的交易，也就是會跟送出的交易搶同一把寫鎖的那些
+- 投票交易不帶優先費，不計入
+"""
+import math
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from base58 import b58decode
+
+COMPUTE_BUDGET_PROGRAM = "ComputeBudget111111111111111111111111111111"
+VOTE_PROGRAM = "Vote111111111111111111111111111111111111111"
+SET_COMPUTE_UNIT_LIMIT = 2
+SET_COMPUTE_UNIT_PRICE = 3
+
+GAMMA = 1.1
+BUCKETS = 256  # 桶 0 為 0；最大約 1.1^254 micro-lamports，遠超實際出價
+_LOG_GAMMA = math.log(GAMMA)
+
+DEFAULT_PERCENTILES = (25, 50, 75, 90, 99)
+
+
+def compute_budget(message, account_keys: Sequence[str]) -> Tuple[int, Optional[int]]:
+    """返回 (compute unit price micro-lamports, compute unit limit)，未設定的價格為 0"""
+    price, limit = 0, None
+    for instruction in message.instructions:
+        index = instruction.program_id_index
+        if index >= len(account_keys) or account_keys[index] != COMPUTE_BUDGET_PROGRAM:
+            continue
+        data = b58decode(instruction.data)
+        if not data:
+            continue
+        if data[0] == SET_COMPUTE_UNIT_PRICE and len(data) >= 9:
+            price = int.from_bytes(data[1:9], "little")
+        elif data[0] == SET_COMPUTE_UNIT_LIMIT and len(data) >= 5:
+            limit = int.from_bytes(data[1:5], "little")
+    return price, limit
+
+
+def writable_accounts(message, account_keys: Sequence[str]) -> List[str]:
+    """完整帳戶列表 (靜態 + 查找表可寫 + 查找表唯讀) 中的可寫帳戶"""
+    header = message.header
+    static = len(message.account_keys)
+    signers = header.num_required_signatures
+    writable = list(account_keys[:signers - header.num_readonly_signed_accounts])
+    writable.extend(account_keys[signers:static - header.num_readonly_unsigned_accounts])
+    # 查找表載入的可寫帳戶緊接在靜態帳戶之後
+    lookups = getattr(message, 'address_table_lookups', None) or []
+    loaded_writable = sum(len(lookup.writable_indexes) for lookup in lookups)
+    writable.extend(account_keys[static:static + loaded_writable])
+    return writable
+
+
+def bucket_of(price: int) -> int:
+    if price <= 0:
+        return 0
+    return min(1 + int(math.log(price) / _LOG_GAMMA), BUCKETS - 1)
+
+
+def bucket_value(bucket: int) -> int:
+    """桶的代表值 (幾何中點)"""
+    if bucket == 0:
+        return 0
+    return max(int(GAMMA ** (bucket - 0.5)), 1)
+
+
+class RollingHistogram:
+    """最近 window 個 slot 的對數直方圖 (window x BUCKETS 個計數)"""
+
+    __slots__ = ("window", "rows", "row_slots", "totals", "newest")
+
+    def __init__(self, window: int):
+        self.window = window
+        self.rows = np.zeros((window, BUCKETS), dtype=np.int32)
+        self.row_slots = np.full(window, -1, dtype=np.int64)
+        self.totals = np.zeros(BUCKETS, dtype=np.int64)
+        self.newest = -1
+
+    def _row(self, slot: int) -> Optional[int]:
+        if slot <= self.newest - self.window:
+            return None  # 已經移出窗口
+        if slot > self.newest:
+            # 被新 slot 佔用的列先從總計中扣除 (最多清空整個窗口)
+            for skipped in range(max(self.newest + 1, slot - self.window + 1), slot + 1):
+                row = skipped % self.window
+                if self.row_slots[row] >= 0:
+                    self.totals -= self.rows[row]
+                    self.rows[row] = 0
+                self.row_slots[row] = skipped
+            self.newest = slot
+        return slot % self.window
+
+    def add(self, slot: int, bucket: int) -> None:
+        row = self._row(slot)
+        if row is None:
+            return
+        self.rows[row, bucket] += 1
+        self.totals[bucket] += 1
+
+    @property
+    def count(self) -> int:
+        return int(self.totals.sum())
+
+    def percentiles(self, percentiles: Iterable[float], include_zero: bool = True) -> Optional[Dict[float, int]]:
+        totals = self.totals if include_zero else np.concatenate(([0], self.totals[1:]))
+        cumulative = np.cumsum(totals)
+        total = int(cumulative[-1])
+        if not total:
+            return None
+        return {
+            p: bucket_value(int(np.searchsorted(cumulative, max(total * p / 100, 1))))
+            for p in percentiles
+        }
+
+
+class PriorityFeeEstimator:
+    """全體與指定帳戶的滾動優先費百分位數"""
+
+    def __init__(self, window_slots: int = 150, max_accounts: int = 64):
+        self.window_slots = window_slots
+        self.max_accounts = max_accounts
+        self.overall = RollingHistogram(window_slots)
+        self._accounts: "OrderedDict[str, RollingHistogram]" = OrderedDict()
+        self.transactions = 0
+
+    def track(self, account: str) -> None:
+        """開始統計寫入此帳戶的交易；超過上限時淘汰最早追蹤的帳戶"""
+        if account in self._accounts:
+            self._accounts.move_to_end(account)
+            return
+        self._accounts[account] = RollingHistogram(self.window_slots)
+        while len(self._accounts) > self.max_accounts:
+            self._accounts.popitem(last=False)
+
+    def untrack(self, account: str) -> None:
+        self._accounts.pop(account, None)
+
+    @property
+    def tracked(self) -> List[str]:
+        return list(self._accounts)
+
+    def observe(self, slot: int, message, account_keys: Sequence[str]) -> None:
+        """記錄一筆區塊中的交易 (account_keys 為含查找表的完整帳戶列表)"""
+        if VOTE_PROGRAM in account_keys:
+            return
+        price, _ = compute_budget(message, account_keys)
+        bucket = bucket_of(price)
+        self.transactions += 1
+        self.overall.add(slot, bucket)
+        if self._accounts:
+            for account in writable_accounts(message, account_keys):
+                histogram = self._accounts.get(account)
+                if histogram is not None:
+                    histogram.add(slot, bucket)
+
+    def estimate(self, percentile: float = 75, account: Optional[str] = None,
+                 include_zero: bool = False) -> Optional[int]:
+        """micro-lamports / CU；沒有樣本時返回 None"""
+        histogram = self.overall if account is None else self._accounts.get(account)
+        if histogram is None:
+            return None
+        result = histogram.percentiles((percentile,), include_zero)
+        return result[percentile] if result else None
+
+    def fee_for(self, accounts: Sequence[str], percentile: float = 75) -> Optional[int]:
+        """送單用: 取各個被追蹤的可寫帳戶中最高的估計，都沒有時用全體估計"""
+        estimates = [
+            estimate for estimate in (
+                self.estimate(percentile, account) for account in accounts if account in self._accounts
+            ) if estimate is not None
+        ]
+        return max(estimates) if estimates else self.estimate(percentile)
+
+    def summary(self, account: Optional[str] = None,
+                percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Optional[Dict]:
+        histogram = self.overall if account is None else self._accounts.get(account)
+        if histogram is None:
+            return None
+        nonzero = histogram.percentiles(percentiles, include_zero=False) or {}
+        return {
+            'account': account,
+            'window_slots': self.window_slots,
+            'newest_slot': histogram.newest,
+            'transactions': histogram.count,
+            'zero_fee_pct': round(int(histogram.totals[0]) / histogram.count * 100, 2) if histogram.count else None,
+            'percentiles': {f"p{p:g}": value for p, value in nonzero.items()},
+        }
@@ -0,0 +1,156 @@
+"""在同一個 asyncio 行程中運行多個監控元件
+
+    python -m solana_bot.host --components swaps,pools,social
+
+- swaps:  soltradbot.py 的 SwapMonitor (大額交易、K 線、錢包 PnL)
+- pools:  day3 的 RaydiumMonitor (新池子、儲備追蹤、安全檢查)
+- social: day2 的 TokenDetectorDaemon (Pump.fun 新代幣與 Twitter 熱度)
+
+各元件共用一個 RpcPool (RPC_ENDPOINTS，逗號分隔)、一個 WsMultiplexer
+(WS_ENDPOINTS，所有訂閱共用一條連線) 與一個 EventBus:
+RaydiumMonitor 發現的新池子立即排入社交分析，不必等下一輪掃描。
+各元件的資料庫、HTTP 端口與設定不變；指標在同一個 registry，
+任一元件的 /metrics 都能看到全部指標。
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import signal
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from solana_bot.bus import POOL_CREATED, EventBus
+from solana_bot.logging_utils import setup_logging
+from solana_bot.rpc_pool import RpcPool
+from solana_bot.ws_mux import WsMultiplexer
+
+logger = logging.getLogger("host")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 元件 -> 腳本路徑 (以檔案載入，day3 的檔名不是合法的模組名)
+SCRIPTS = {
+    'swaps': ROOT / "soltradbot.py",
+    'pools': ROOT / "day3" / "ws-raydiun-pool-non.py",
+    'social': ROOT / "day2" / "sol_twitter_scan.py",
+}
+
+
+def load_script(component: str) -> ModuleType:
+    """載入元件腳本 (不執行 __main__ 區塊)"""
+    path = SCRIPTS[component]
+    spec = importlib.util.spec_from_file_location(f"solana_bot_host_{component}", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class Host:
+    def __init__(self, components: List[str], rpc_endpoints: List[str], ws_endpoints: List[str]):
+        self.components = components
+        self.rpc = RpcPool(rpc_endpoints)
+        self.ws = WsMultiplexer(ws_endpoints)
+        self.bus = EventBus()
+        self.modules: Dict[str, ModuleType] = {component: load_script(component) for component in components}
+        # 各腳本在載入時各自設定了日誌，統一改為輸出到同一個檔案
+        setup_logging('solana_bot_host.log', level=logging.INFO, console_handler=logging.StreamHandler(sys.stdout))
+
+        self.swap_monitor = self.pool_monitor = self.daemon = None
+        if 'swaps' in self.modules:
+            self.swap_monitor = self.modules['swaps'].SwapMonitor(rpc=self.rpc, bus=self.bus)
+        if 'pools' in self.modules:
+            self.pool_monitor = self.modules['pools'].RaydiumMonitor(rpc=self.rpc, bus=self.bus, ws=self.ws)
+        if 'social' in self.modules:
+            social = self.modules['social']
+            detector = social.SolanaTokenDetector(search_limit=50, rpc=self.rpc, bus=self.bus, ws=self.ws)
+            self.daemon = social.TokenDetectorDaemon(detector)
+            self.bus.subscribe(POOL_CREATED, self.daemon.on_pool_created)
+
+    async def _supervise(self, name: str, coro) -> None:
+        """單一元件出錯只記錄，不影響其他元件"""
+        try:
+            await coro
+            logger.warning(f"{name} 已結束")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"{name} 運行錯誤")
+
+    async def run(self) -> None:
+        await self.bus.start()
+        runners = {}
+        if self.pool_monitor or self.daemon:
+            # RaydiumMonitor 與 TokenDetectorDaemon 的日誌訂閱共用同一條連線
+            runners['ws'] = self.ws.run()
+        if self.swap_monitor:
+            runners['swaps'] = self.swap_monitor.run()
+        if self.pool_monitor:
+            runners['pools'] = self.pool_monitor.monitor_pools()
+        if self.daemon:
+            runners['social'] = self.daemon.run()
+        tasks = [asyncio.create_task(self._supervise(name, coro), name=name) for name, coro in runners.items()]
+        logger.info(f"Host started: {', '.join(self.components)} "
+                    f"({len(self.rpc.endpoints)} RPC / {len(self.ws.endpoints)} WebSocket endpoints)")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows 不支持 add_signal_handler，Ctrl+C 以 KeyboardInterrupt 結束
+            pass
+
+        stop_task = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait([stop_task, asyncio.gather(*tasks)], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop_task.cancel()
+            await self.shutdown(tasks)
+
+    async def shutdown(self, tasks: List[asyncio.Task]) -> None:
+        logger.warning("Stopping host...")
+        if self.pool_monitor:
+            await self.pool_monitor.stop()
+        await self.ws.stop()
+        for task in tasks:
+            task.cancel()
+        # 各元件在 finally 中寫入剩餘的 K 線、持倉與社交資料
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.bus.stop()
+        await self.rpc.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run several monitors in one process")
+    parser.add_argument("--components", default="swaps,pools,social",
+                        help="comma separated: " + ", ".join(SCRIPTS))
+    args = parser.parse_args()
+    components = [name.strip() for name in args.components.split(",") if name.strip()]
+    unknown = [name for name in components if name not in SCRIPTS]
+    if unknown or not components:
+        parser.error(f"unknown components: {', '.join(unknown)}" if unknown else "no components given")
+
+    load_dotenv()
+    rpc_endpoints = [endpoint.strip() for endpoint in os.getenv("RPC_ENDPOINTS", "").split(",") if endpoint.strip()]
+    if not rpc_endpoints:
+        parser.error("RPC_ENDPOINTS is not set")
+    ws_endpoints = [endpoint.strip() for endpoint in os.getenv("WS_ENDPOINTS", "").split(",") if endpoint.strip()]
+    # 與 day3 相同: 未設定時從 RPC 地址推斷
+    ws_endpoints = ws_endpoints or ["ws" + endpoint[4:] for endpoint in rpc_endpoints if endpoint.startswith("http")]
+
+    try:
+        asyncio.run(Host(components, rpc_endpoints, ws_endpoints).run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""本機 HTTP 端點 (狀態、指標、診斷)
+
+只用 asyncio 標準庫實作極簡的 GET 服務，避免為了幾個本機查詢端點
+額外引入 web 框架。處理函數接收查詢參數字典，返回
+(狀態碼, Content-Type, 內容)，也可以是 coroutine。
+"""
+import asyncio
+import inspect
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+Response = Tuple[int, str, Union[str, bytes]]
+Handler = Callable[[Dict[str, str]], Union[Response, Awaitable[Response]]]
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def json_response(data, status: int = 200) -> Response:
+    """將資料序列化為 JSON 響應"""
+    return status, "application/json", json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LocalHttpServer:
+    """綁定在本機的輕量 HTTP 服務"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8000):
+        self.host = host
+        self.port = port
+        self.routes: Dict[str, Handler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def route(self, path: str, handler: Handler) -> None:
+        """註冊路徑處理函數"""
+        self.routes[path] = handler
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"HTTP endpoint listening on http://{self.host}:{self.port} ({', '.join(sorted(self.routes))})")
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # 讀掉其餘的請求標頭
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) < 2:
+                status, content_type, body = 400, "text/plain", "bad request"
+            elif parts[0] != "GET":
+                status, content_type, body = 405, "text/plain", "method not allowed"
+            else:
+                url = urlsplit(parts[1])
+                handler = self.routes.get(url.path)
+                if handler is None:
+                    status, content_type, body = 404, "text/plain", "not found"
+                else:
+                    try:
+                        result = handler(dict(parse_qsl(url.query)))
+                        if inspect.isawaitable(result):
+                            result = await result
+                        status, content_type, body = result
+                    except Exception as e:
+                        logger.error(f"HTTP handler error on {url.path}: {str(e)}")
+                        status, content_type, body = 500, "text/plain", str(e)
+
+            payload = body.encode("utf-8") if isinstance(body, str) else body
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
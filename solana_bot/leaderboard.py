@@ -0,0 +1,240 @@
+"""滑動時間窗口的熱門代幣排行榜
+
+把 swap 串流按固定寬度的時間桶累計，每個窗口 (預設 1/5/15 分鐘)
+維護各代幣的成交額與筆數累計值: 新成交直接加上，時間桶移出窗口
+時減掉，所以查詢不必重新掃描歷史。排名用 heapq 取前 K 名。
+
+獨立買家數以 HyperLogLog 近似計算: 每個時間桶每個代幣一個 HLL，
+查詢時合併窗口內的桶。活躍度低的代幣使用稀疏表示，記憶體與成交量
+成正比。
+"""
+import hashlib
+import heapq
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_WINDOWS = (60, 300, 900)
+
+
+class HyperLogLog:
+    """HyperLogLog 基數估計 (p=10: 1024 個暫存器，標準誤差約 3.3%)
+
+    暫存器數少於 dense 門檻時以 dict 存放 (稀疏)，超過才轉為 bytearray。
+    """
+
+    __slots__ = ("p", "m", "_sparse", "_dense")
+
+    def __init__(self, p: int = 10):
+        self.p = p
+        self.m = 1 << p
+        self._sparse: Optional[Dict[int, int]] = {}
+        self._dense: Optional[bytearray] = None
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+    def add(self, value: str) -> None:
+        h = self._hash(value)
+        index = h >> (64 - self.p)
+        remaining = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - remaining.bit_length() + 1
+        self._set(index, rank)
+
+    def _set(self, index: int, rank: int) -> None:
+        if self._dense is not None:
+            if rank > self._dense[index]:
+                self._dense[index] = rank
+            return
+        if rank > self._sparse.get(index, 0):
+            self._sparse[index] = rank
+            # 稀疏 dict 每項的開銷遠大於 1 byte，超過 m/16 項就轉成密集陣列
+            if len(self._sparse) > self.m // 16:
+                self._to_dense()
+
+    def _to_dense(self) -> None:
+        dense = bytearray(self.m)
+        for index, rank in self._sparse.items():
+            dense[index] = rank
+        self._dense, self._sparse = dense, None
+
+    def registers(self):
+        if self._dense is not None:
+            return enumerate(self._dense)
+        return self._sparse.items()
+
+    def merge(self, other: "HyperLogLog") -> None:
+        for index, rank in other.registers():
+            if rank:
+                self._set(index, rank)
+
+    def count(self) -> int:
+        m = self.m
+        if self._dense is not None:
+            registers = self._dense
+            zeros = registers.count(0)
+            harmonic = sum(2.0 ** -rank for rank in registers)
+        else:
+            zeros = m - len(self._sparse)
+            harmonic = zeros + sum(2.0 ** -rank for rank in self._sparse.values())
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / harmonic
+        # 小基數時改用線性計數
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class _BucketStats:
+    __slots__ = ("volume", "trades", "buyers")
+
+    def __init__(self):
+        self.volume = 0.0
+        self.trades = 0
+        self.buyers: Optional[HyperLogLog] = None
+
+
+class Leaderboard:
+    """多窗口的熱門代幣排行"""
+
+    def __init__(self, windows: Sequence[int] = DEFAULT_WINDOWS, bucket_seconds: int = 10):
+        self.bucket_seconds = bucket_seconds
+        self.windows = tuple(sorted(windows))
+        self._span = {window: max(window // bucket_seconds, 1) for window in self.windows}
+        # (桶編號, mint -> 統計)，由舊到新
+        self._buckets: Deque[Tuple[int, Dict[str, _BucketStats]]] = deque()
+        # 窗口 -> mint -> [成交額, 筆數]
+        self._totals: Dict[int, Dict[str, List[float]]] = {window: {} for window in self.windows}
+        # 窗口 -> 已從累計值中扣除的最後一個桶編號
+        self._expired_upto: Dict[int, int] = {window: -1 for window in self.windows}
+        self._current = -1
+
+    def _bucket_id(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def advance(self, now: Optional[float] = None) -> None:
+        """讓時間桶前進到 now，把移出各窗口的桶從累計值中扣除"""
+        current = self._bucket_id(time.time() if now is None else now)
+        if current <= self._current:
+            return
+        self._current = current
+        for window in self.windows:
+            cutoff = current - self._span[window]
+            totals = self._totals[window]
+            for bucket_id, stats in self._buckets:
+                if bucket_id > cutoff:
+                    break
+                if bucket_id <= self._expired_upto[window]:
+                    continue
+                for mint, bucket in stats.items():
+                    entry = totals.get(mint)
+                    if entry is None:
+                        continue
+                    entry[0] -= bucket.volume
+                    entry[1] -= bucket.trades
+                    if entry[1] <= 0:
+                        del totals[mint]
+            self._expired_upto[window] = max(self._expired_upto[window], cutoff)
+
+        oldest_kept = current - self._span[self.windows[-1]]
+        while self._buckets and self._buckets[0][0] <= oldest_kept:
+            self._buckets.popleft()
+
+    def add_trade(self, mint: str, volume: float, buyer: Optional[str] = None, ts: Optional[float] = None) -> None:
+        """記錄一筆成交；buyer 為買入方錢包 (賣出時傳 None)"""
+        ts = time.time() if ts is None else ts
+        self.advance(ts)
+        bucket_id = self._bucket_id(ts)
+        # 已經移出最長窗口的舊成交直接忽略
+        if bucket_id <= self._current - self._span[self.windows[-1]]:
+            return
+
+        stats = None
+        for existing_id, existing in reversed(self._buckets):
+            if existing_id == bucket_id:
+                stats = existing
+                break
+            if existing_id < bucket_id:
+                break
+        if stats is None:
+            stats = {}
+            # 晚到的成交可能屬於較舊的桶，按編號插入保持順序
+            position = len(self._buckets)
+            while position > 0 and self._buckets[position - 1][0] > bucket_id:
+                position -= 1
+            self._buckets.insert(position, (bucket_id, stats))
+
+        bucket = stats.get(mint)
+        if bucket is None:
+            bucket = stats[mint] = _BucketStats()
+        bucket.volume += volume
+        bucket.trades += 1
+        if buyer:
+            if bucket.buyers is None:
+                bucket.buyers = HyperLogLog()
+            bucket.buyers.add(buyer)
+
+        for window in self.windows:
+            if bucket_id > self._current - self._span[window]:
+                entry = self._totals[window].setdefault(mint, [0.0, 0])
+                entry[0] += volume
+                entry[1] += 1
+
+    def unique_buyers(self, mint: str, window: int) -> int:
+        cutoff = self._current - self._span[window]
+        merged = HyperLogLog()
+        for bucket_id, stats in reversed(self._buckets):
+            if bucket_id <= cutoff:
+                break
+            bucket = stats.get(mint)
+            if bucket is not None and bucket.buyers is not None:
+                merged.merge(bucket.buyers)
+        return merged.count()
+
+    def _top_buyers(self, window: int, k: int) -> Dict[str, int]:
+        """買家數前 k 名
+
+        獨立買家數不會超過成交筆數 (HLL 誤差另計一點餘量)，按筆數由高到低
+        估計，第 k 名的買家數已經高於剩下代幣的筆數上限時提前結束，
+        大部分冷門代幣不必合併 HLL。
+        """
+        totals = self._totals[window]
+        best: List[Tuple[int, str]] = []
+        for mint in sorted(totals, key=lambda mint: totals[mint][1], reverse=True):
+            if len(best) == k and best[0][0] >= totals[mint][1] * 1.1 + 1:
+                break
+            entry = (self.unique_buyers(mint, window), mint)
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+        return {mint: count for count, mint in best}
+
+    def top(self, window: int, k: int = 10, by: str = "volume", now: Optional[float] = None) -> List[Dict]:
+        """窗口內前 k 名；by 為 volume、trades 或 buyers"""
+        if window not in self._totals:
+            raise ValueError(f"window must be one of {self.windows}")
+        self.advance(now)
+        totals = self._totals[window]
+
+        if by == "buyers":
+            buyers = self._top_buyers(window, k)
+            ranked = sorted(buyers, key=buyers.__getitem__, reverse=True)
+        elif by in ("volume", "trades"):
+            column = 0 if by == "volume" else 1
+            ranked = heapq.nlargest(k, totals, key=lambda mint: totals[mint][column])
+            buyers = {mint: self.unique_buyers(mint, window) for mint in ranked}
+        else:
+            raise ValueError("by must be volume, trades or buyers")
+
+        return [
+            {
+                'mint': mint,
+                'volume_sol': round(totals[mint][0], 6),
+                'trades': int(totals[mint][1]),
+                'unique_buyers': buyers[mint],
+            }
+            for mint in ranked
+        ]
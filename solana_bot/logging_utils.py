@@ -0,0 +1,98 @@
+"""非阻塞日誌管線
+
+事件迴圈只把日誌記錄放進佇列 (QueueHandler)，格式化、終端輸出與
+寫檔都在背景的 QueueListener 線程中完成，終端或磁碟變慢時不會拖慢
+通知處理。DEBUG 記錄另外經過速率限制，超出配額的直接丟棄，不進佇列。
+
+    listener = setup_logging('raydium_monitor.log', console_handler=RichHandler(console=console))
+    ...
+    listener.stop()   # 程序結束前刷新佇列 (atexit 也會調用)
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Optional
+
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_MB", "20")) * 1024 * 1024
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+DEBUG_LOG_RATE = float(os.getenv("DEBUG_LOG_RATE", "20"))  # 每秒允許的 DEBUG 記錄數
+
+
+class DebugRateLimitFilter(logging.Filter):
+    """以令牌桶限制 DEBUG 記錄的輸出速率
+
+    INFO 以上的記錄一律放行。被丟棄的數量會附加在下一條放行的
+    DEBUG 記錄後面，方便判斷取樣比例。
+    """
+
+    def __init__(self, rate: float = DEBUG_LOG_RATE, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate * 2, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.dropped = 0
+        self.total_dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            self.dropped += 1
+            self.total_dropped += 1
+            return False
+
+        self.tokens -= 1
+        if self.dropped:
+            record.msg = f"{record.msg} (sampled, {self.dropped} debug records dropped)"
+            self.dropped = 0
+        return True
+
+
+def setup_logging(log_file: str, level: int = logging.INFO,
+                  console_handler: Optional[logging.Handler] = None,
+                  fmt: str = '%(asctime)s - %(levelname)s - %(message)s',
+                  max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                  debug_rate: float = DEBUG_LOG_RATE) -> logging.handlers.QueueListener:
+    """把 root logger 換成 QueueHandler，返回已啟動的背景 listener
+
+    console_handler 為終端輸出 (例如 RichHandler)，未提供時只寫檔。
+    檔案按大小輪替，保留 backup_count 份。
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter(fmt))
+    handlers = [file_handler]
+    if console_handler is not None:
+        if console_handler.formatter is None:
+            console_handler.setFormatter(logging.Formatter(fmt))
+        handlers.append(console_handler)
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(DebugRateLimitFilter(debug_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)
+    return listener
+
+
+def _stop_listener(listener: logging.handlers.QueueListener) -> None:
+    # stop() 在 listener 已停止時會因 _thread 為 None 而失敗
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,184 @@
+"""v0 交易的地址查找表 (Address Lookup Table, ALT) 解析
+
+v0 交易可以把帳戶放在查找表中，message.account_keys 只包含靜態帳戶。
+完整的帳戶列表順序為: 靜態帳戶 + 查找表可寫帳戶 + 查找表唯讀帳戶。
+
+- RPC 返回的 meta.loaded_addresses 已經是解析結果，優先使用
+- 否則使用本地快取的查找表內容，缺少的表由調用方以 prefetch 整個區塊
+  批量拉取 (getMultipleAccounts)；解析單筆交易時不發 RPC
+- 在事件循環中使用 prefetch_async: 有非同步拉取函數 (例如 RpcPool.post)
+  時直接 await，否則把同步拉取放到線程中，不阻塞其他協程
+- 查找表只會追加地址，索引超出快取長度代表表已擴充，重新拉取
+- 不存在 (已關閉) 或拉取失敗的表記入負快取，negative_ttl 秒內不再拉取
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from base58 import b58encode
+
+logger = logging.getLogger(__name__)
+
+# 查找表帳戶資料: 56 bytes 表頭，之後每 32 bytes 一個地址
+LOOKUP_TABLE_META_SIZE = 56
+# getMultipleAccounts 單次最多 100 個帳戶
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+# (查找表地址, 可寫索引, 唯讀索引)
+TableLookup = Tuple[str, Sequence[int], Sequence[int]]
+# 輸入最多 100 個帳戶地址，返回對應的帳戶資料 (不存在為 None)
+AccountFetcher = Callable[[List[str]], List[Optional[bytes]]]
+AsyncAccountFetcher = Callable[[List[str]], Awaitable[List[Optional[bytes]]]]
+
+
+def decode_lookup_table(data: bytes) -> List[str]:
+    addresses = data[LOOKUP_TABLE_META_SIZE:]
+    return [
+        b58encode(addresses[offset:offset + 32]).decode()
+        for offset in range(0, len(addresses) - len(addresses) % 32, 32)
+    ]
+
+
+def table_lookups(message) -> List[TableLookup]:
+    """從 solders message 取出 address_table_lookups"""
+    lookups = getattr(message, 'address_table_lookups', None) or []
+    return [
+        (str(lookup.account_key), list(lookup.writable_indexes), list(lookup.readonly_indexes))
+        for lookup in lookups
+    ]
+
+
+class LookupTableCache:
+    """查找表內容的本地 LRU 快取"""
+
+    def __init__(self, fetch_accounts: AccountFetcher, max_tables: int = 20000, negative_ttl: float = 60.0,
+                 fetch_accounts_async: Optional[AsyncAccountFetcher] = None):
+        self.fetch_accounts = fetch_accounts
+        self.fetch_accounts_async = fetch_accounts_async
+        self.max_tables = max_tables
+        self.negative_ttl = negative_ttl
+        self._tables: "OrderedDict[str, List[str]]" = OrderedDict()
+        # 查找表地址 -> 可以重試的時間 (monotonic)，按加入順序排列
+        self._missing: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.negative_hits = 0
+
+    def _is_missing(self, table_key: str, now: float) -> bool:
+        retry_at = self._missing.get(table_key)
+        if retry_at is None:
+            return False
+        if retry_at > now:
+            return True
+        del self._missing[table_key]
+        return False
+
+    def _mark_missing(self, table_key: str, now: float) -> None:
+        self._missing[table_key] = now + self.negative_ttl
+        self._missing.move_to_end(table_key)
+        while len(self._missing) > self.max_tables:
+            self._missing.popitem(last=False)
+
+    def _needs_fetch(self, lookup: TableLookup) -> bool:
+        table_key, writable, readonly = lookup
+        addresses = self._tables.get(table_key)
+        if addresses is None:
+            return True
+        largest = max(list(writable) + list(readonly), default=-1)
+        return largest >= len(addresses)
+
+    def _to_fetch(self, lookups: Iterable[TableLookup], now: float) -> List[List[str]]:
+        """缺少或已擴充的查找表，按每次 RPC 的上限分組"""
+        to_fetch: Dict[str, None] = {}
+        for lookup in lookups:
+            if lookup[0] in to_fetch:
+                continue
+            if self._is_missing(lookup[0], now):
+                self.negative_hits += 1
+                continue
+            if self._needs_fetch(lookup):
+                if lookup[0] in self._tables:
+                    self.refreshes += 1
+                to_fetch[lookup[0]] = None
+        keys = list(to_fetch)
+        return [keys[start:start + MAX_ACCOUNTS_PER_REQUEST]
+                for start in range(0, len(keys), MAX_ACCOUNTS_PER_REQUEST)]
+
+    def _store(self, chunk: List[str], results: Sequence[Optional[bytes]], now: float) -> None:
+        for table_key, data in zip(chunk, results):
+            if data is None:
+                self._mark_missing(table_key, now)
+                continue
+            self._tables[table_key] = decode_lookup_table(data)
+            self._tables.move_to_end(table_key)
+        while len(self._tables) > self.max_tables:
+            self._tables.popitem(last=False)
+
+    def _fetch_failed(self, chunk: List[str], now: float, error: Exception) -> None:
+        logger.error(f"拉取查找表失敗: {str(error)}")
+        for table_key in chunk:
+            self._mark_missing(table_key, now)
+
+    def prefetch(self, lookups: Iterable[TableLookup]) -> None:
+        """批量拉取缺少或已擴充的查找表 (每 100 個表一次 RPC)"""
+        now = time.monotonic()
+        for chunk in self._to_fetch(lookups, now):
+            try:
+                results = self.fetch_accounts(chunk)
+            except Exception as e:
+                self._fetch_failed(chunk, now, e)
+                continue
+            self._store(chunk, results, now)
+
+    async def prefetch_async(self, lookups: Iterable[TableLookup]) -> None:
+        """同 prefetch，在事件循環中使用"""
+        now = time.monotonic()
+        for chunk in self._to_fetch(lookups, now):
+            try:
+                if self.fetch_accounts_async is not None:
+                    results = await self.fetch_accounts_async(chunk)
+                else:
+                    results = await asyncio.to_thread(self.fetch_accounts, chunk)
+            except Exception as e:
+                self._fetch_failed(chunk, now, e)
+                continue
+            self._store(chunk, results, now)
+
+    def resolve(self, lookups: Sequence[TableLookup]) -> Optional[Tuple[List[str], List[str]]]:
+        """返回 (可寫地址, 唯讀地址)；任一查找表無法解析時返回 None"""
+        writable_addresses: List[str] = []
+        readonly_addresses: List[str] = []
+        for table_key, writable, readonly in lookups:
+            addresses = self._tables.get(table_key)
+            if addresses is None or max(list(writable) + list(readonly), default=-1) >= len(addresses):
+                self.misses += 1
+                return None
+            self._tables.move_to_end(table_key)
+            writable_addresses.extend(addresses[index] for index in writable)
+            readonly_addresses.extend(addresses[index] for index in readonly)
+        self.hits += 1
+        return writable_addresses, readonly_addresses
+
+    def full_account_keys(self, static_keys: Sequence[str], message, loaded_addresses=None) -> List[str]:
+        """組出 v0 交易的完整帳戶列表，無法解析查找表時只返回靜態帳戶
+
+        只查本地快取，不發 RPC: 查找表需先以 prefetch 拉取 (例如整個區塊一次)。
+        """
+        keys = list(static_keys)
+        if loaded_addresses is not None:
+            keys.extend(str(key) for key in loaded_addresses.writable)
+            keys.extend(str(key) for key in loaded_addresses.readonly)
+            return keys
+
+        lookups = table_lookups(message)
+        if not lookups:
+            return keys
+
+        resolved = self.resolve(lookups)
+        if resolved is not None:
+            keys.extend(resolved[0])
+            keys.extend(resolved[1])
+        return keys
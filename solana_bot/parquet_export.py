@@ -0,0 +1,200 @@
+"""把 SQLite 中已結束的日期分區匯出為 Parquet
+
+分析查詢 (每小時各代幣成交量、池子上線速度 ...) 直接掃 swaps / pools
+會長時間佔住資料庫並拖慢寫入。這裡定期把已經結束的 UTC 日期 (今天
+之前) 按天匯出成 zstd 壓縮的 Parquet:
+
+    <out>/<表名>/date=YYYY-MM-DD/part-0.parquet
+
+- 以唯讀方式開啟資料庫，每次只讀一天 (走時間欄位索引)，分批取出
+- 每個表的匯出進度 (最後一個完成的日期) 記在 <out>/_watermarks.json，
+  重複執行只會匯出新結束的日期，外加最近 reexport_days 天: 重連回補會在
+  日期結束後才補寫前一天的池子與成交，已匯出的分區需要整天重新匯出
+- 先寫入暫存檔再改名，查詢端不會讀到寫了一半的檔案
+
+用法:
+    python -m solana_bot.parquet_export --out data/parquet
+    python -m solana_bot.parquet_export --out data/parquet --interval 3600
+查詢見 solana_bot.analytics。
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS = 100_000
+
+
+class ExportTable(NamedTuple):
+    name: str
+    db_path: str
+    table: str
+    ts_column: str
+    # epoch: REAL 秒數；text: 'YYYY-MM-DD HH:MM:SS UTC' 字串 (字典序即時間序)
+    ts_kind: str
+
+
+# 資料庫路徑與各監控腳本相同 (相對於執行目錄)
+TABLES = {
+    'swaps': ExportTable('swaps', "solana_swaps.db", "swaps", "timestamp", "epoch"),
+    'pools': ExportTable('pools', os.getenv("DB_PATH", "raydium_pools.db"), "pools", "timestamp", "text"),
+}
+
+
+# SQLite 宣告型別 -> Arrow 型別 (依 SQLite 的型別親和性規則)
+def _arrow_type(declared: str) -> pa.DataType:
+    declared = declared.upper()
+    if "INT" in declared:
+        return pa.int64()
+    if any(name in declared for name in ("CHAR", "CLOB", "TEXT")):
+        return pa.string()
+    if any(name in declared for name in ("REAL", "FLOA", "DOUB")):
+        return pa.float64()
+    return pa.string()
+
+
+def _bound(table: ExportTable, day: date):
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    if table.ts_kind == "epoch":
+        return start.timestamp()
+    return start.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _to_date(table: ExportTable, value) -> Optional[date]:
+    if value is None:
+        return None
+    if table.ts_kind == "epoch":
+        return datetime.fromtimestamp(value, tz=timezone.utc).date()
+    return date.fromisoformat(str(value)[:10])
+
+
+class ParquetExporter:
+    def __init__(self, out_dir: str, tables: Optional[Dict[str, ExportTable]] = None, reexport_days: int = 2):
+        self.out_dir = Path(out_dir)
+        self.tables = tables or TABLES
+        self.reexport_days = reexport_days
+        self.watermark_path = self.out_dir / "_watermarks.json"
+
+    def _load_watermarks(self) -> Dict[str, str]:
+        if self.watermark_path.exists():
+            return json.loads(self.watermark_path.read_text())
+        return {}
+
+    def _save_watermarks(self, watermarks: Dict[str, str]) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.watermark_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(watermarks, indent=2))
+        os.replace(tmp, self.watermark_path)
+
+    def export_all(self, today: Optional[date] = None) -> Dict[str, int]:
+        """匯出所有表中新結束的日期，返回 表名 -> 匯出的行數"""
+        today = today or datetime.now(timezone.utc).date()
+        watermarks = self._load_watermarks()
+        exported = {}
+        for name, table in self.tables.items():
+            if not Path(table.db_path).exists():
+                logger.debug(f"{table.db_path} 不存在，跳過 {name}")
+                continue
+            try:
+                exported[name] = self.export_table(table, watermarks, today)
+            except sqlite3.Error as e:
+                logger.error(f"匯出 {name} 失敗: {str(e)}")
+        return exported
+
+    def export_table(self, table: ExportTable, watermarks: Dict[str, str], today: date) -> int:
+        conn = sqlite3.connect(f"file:{table.db_path}?mode=ro", uri=True)
+        try:
+            if table.name in watermarks:
+                day = date.fromisoformat(watermarks[table.name]) + timedelta(days=1)
+                # 最近幾天可能有晚到 (回補) 的記錄，覆蓋重寫
+                day = min(day, today - timedelta(days=self.reexport_days))
+            else:
+                first = conn.execute(f"SELECT MIN({table.ts_column}) FROM {table.table}").fetchone()[0]
+                day = _to_date(table, first)
+            total = 0
+            # 只匯出已經結束的日期 (今天還在寫入)
+            while day is not None and day < today:
+                total += self._export_day(conn, table, day)
+                watermarks[table.name] = day.isoformat()
+                self._save_watermarks(watermarks)
+                day += timedelta(days=1)
+            return total
+        finally:
+            conn.close()
+
+    def _export_day(self, conn: sqlite3.Connection, table: ExportTable, day: date) -> int:
+        cursor = conn.execute(
+            f"SELECT * FROM {table.table} WHERE {table.ts_column} >= ? AND {table.ts_column} < ? "
+            f"ORDER BY {table.ts_column}",
+            (_bound(table, day), _bound(table, day + timedelta(days=1)))
+        )
+        columns = [description[0] for description in cursor.description]
+        # 以表的宣告型別建立 schema，避免每批各自推斷 (整欄為 NULL 的批次等)
+        declared = {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table.table})")}
+        schema = pa.schema([(column, _arrow_type(declared.get(column, ""))) for column in columns])
+        partition = self.out_dir / table.name / f"date={day.isoformat()}"
+        tmp_path = partition / "part-0.parquet.tmp"
+        writer: Optional[pq.ParquetWriter] = None
+        rows_written = 0
+        try:
+            while True:
+                rows = cursor.fetchmany(BATCH_ROWS)
+                if not rows:
+                    break
+                batch = pa.Table.from_arrays(
+                    [pa.array([row[i] for row in rows], type=field.type) for i, field in enumerate(schema)],
+                    schema=schema
+                )
+                if writer is None:
+                    partition.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+                writer.write_table(batch)
+                rows_written += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+        if rows_written:
+            os.replace(tmp_path, partition / "part-0.parquet")
+            logger.info(f"{table.name} {day}: {rows_written} rows -> {partition}")
+        return rows_written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export closed daily partitions to Parquet")
+    parser.add_argument("--out", default="data/parquet")
+    parser.add_argument("--tables", default=",".join(TABLES), help="comma separated: " + ", ".join(TABLES))
+    parser.add_argument("--swaps-db", default=TABLES['swaps'].db_path)
+    parser.add_argument("--pools-db", default=TABLES['pools'].db_path)
+    parser.add_argument("--interval", type=float, default=0, help="seconds between runs (0 = run once)")
+    parser.add_argument("--reexport-days", type=int, default=2,
+                        help="closed days re-exported on every run to pick up backfilled rows")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    selected: List[str] = [name.strip() for name in args.tables.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in TABLES]
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(unknown)}")
+    paths = {'swaps': args.swaps_db, 'pools': args.pools_db}
+    exporter = ParquetExporter(args.out, {name: TABLES[name]._replace(db_path=paths[name]) for name in selected},
+                               reexport_days=args.reexport_days)
+    while True:
+        exported = exporter.export_all()
+        logger.info(f"匯出完成: {exported}")
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""各 DEX 建池指令的解碼表
+
+每個程序的建池指令以 (程序 ID, 指令判別碼) 查表，再按該指令的帳戶
+順序取出池子、兩邊代幣的 mint 與金庫、LP mint:
+
+- Raydium AMM v4 initialize2: 指令資料首 byte 為 1
+- Anchor 程序 (Raydium CPMM / CLMM、Meteora DLMM、PumpSwap): 資料前 8 bytes
+  為 sha256("global:<指令名>")[:8]，同名指令在不同程序的判別碼相同，
+  所以一定要連同程序 ID 一起查
+
+Pump.fun 代幣畢業時由遷移程序以 CPI 調用 PumpSwap create_pool，所以除了
+頂層指令也要掃 innerInstructions。新增程序只需要在 LAUNCH_DECODERS 加一項。
+
+斷線回補以 getSignaturesForAddress 翻頁，翻程序 ID 等於把所有 swap 都拉一遍；
+建池指令有固定帳戶 (建池費接收帳戶等) 只在建池時出現的程序，改翻這些帳戶
+(backfill_accounts)，沒有的才退回程序 ID。
+
+    registry = LaunchRegistry(decoders_for(["raydium_amm_v4", "pumpswap"]))
+    launch = registry.find(tx)     # getTransaction (jsonParsed) 的 result
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from base58 import b58decode
+
+
+@dataclass(frozen=True)
+class LaunchDecoder:
+    """一個建池指令: 判別碼與帳戶索引"""
+    name: str
+    program_id: str
+    instruction: str
+    discriminator: bytes
+    pool: int
+    base_mint: int
+    quote_mint: int
+    base_vault: int
+    quote_vault: int
+    lp_mint: Optional[int] = None
+    # 直播通知的預篩: 有日誌行 (小寫) 等於標記或以「標記:」開頭才拉取交易；
+    # 整行比對，避免 Token 程序的 "Instruction: InitializeAccount3" 等誤中
+    log_markers: Tuple[str, ...] = ()
+    # 集中流動性池的金庫餘額不是報價用的儲備，不能用恆定乘積報價
+    constant_product: bool = True
+    # 只出現在建池交易中的固定帳戶，回補時代替程序 ID 翻頁
+    backfill_accounts: Tuple[str, ...] = ()
+
+    @property
+    def min_accounts(self) -> int:
+        indexes = (self.pool, self.base_mint, self.quote_mint, self.base_vault, self.quote_vault, self.lp_mint)
+        return max(index for index in indexes if index is not None) + 1
+
+    def decode(self, accounts: Sequence[str]) -> Optional["PoolLaunch"]:
+        if len(accounts) < self.min_accounts:
+            return None
+        return PoolLaunch(
+            decoder=self,
+            pool=accounts[self.pool],
+            base_mint=accounts[self.base_mint],
+            quote_mint=accounts[self.quote_mint],
+            base_vault=accounts[self.base_vault],
+            quote_vault=accounts[self.quote_vault],
+            lp_mint=accounts[self.lp_mint] if self.lp_mint is not None else "",
+        )
+
+
+@dataclass
+class PoolLaunch:
+    """從建池指令解出的池子"""
+    decoder: LaunchDecoder
+    pool: str
+    base_mint: str
+    quote_mint: str
+    base_vault: str
+    quote_vault: str
+    lp_mint: str = ""
+
+    @property
+    def program(self) -> str:
+        return self.decoder.name
+
+    @property
+    def program_id(self) -> str:
+        return self.decoder.program_id
+
+
+LAUNCH_DECODERS: List[LaunchDecoder] = [
+    # 帳戶: 4 amm, 7 lp mint, 8 coin mint, 9 pc mint, 10 coin vault, 11 pc vault,
+    # 14 create fee destination (收取建池費)
+    LaunchDecoder(
+        "raydium_amm_v4", "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8", "initialize2", bytes([1]),
+        pool=4, base_mint=8, quote_mint=9, base_vault=10, quote_vault=11, lp_mint=7,
+        log_markers=("program log: initialize2",),
+        backfill_accounts=("7YttLkHDoNj9wyDur5pM1ejNaAvT9X4eqaYcHQqtj2G5",),
+    ),
+    # 帳戶: 3 pool_state, 4/5 token_0/1 mint, 6 lp_mint, 10/11 token_0/1 vault, create_pool_fee
+    LaunchDecoder(
+        "raydium_cpmm", "CPMMoo8L3F4NbTegBCKVNunggL7H1ZpdTHKxQB5qKP8", "initialize",
+        bytes([175, 175, 109, 31, 13, 152, 155, 237]),
+        pool=3, base_mint=4, quote_mint=5, base_vault=10, quote_vault=11, lp_mint=6,
+        log_markers=("program log: instruction: initialize",),
+        backfill_accounts=("DNXgeM9EiiaAbaWvwjHj9fQQLAX5ZsfHyvmYUNRAdNC8",),
+    ),
+    # 帳戶: 2 pool_state, 3/4 token_mint_0/1, 5/6 token_vault_0/1
+    LaunchDecoder(
+        "raydium_clmm", "CAMMCzo5YL8w4VFF8KVHrK22GGUsp5VTaW7grrKgrWqK", "create_pool",
+        bytes([233, 146, 209, 142, 207, 104, 64, 188]),
+        pool=2, base_mint=3, quote_mint=4, base_vault=5, quote_vault=6,
+        log_markers=("program log: instruction: createpool",), constant_product=False,
+    ),
+    # 帳戶: 0 lb_pair, 2/3 token_mint_x/y, 4/5 reserve_x/y
+    LaunchDecoder(
+        "meteora_dlmm", "LBUZKhRxPF3XUpBCjp4YzTKgLccjZhTSDM9t2xXDgRo", "initialize_lb_pair",
+        bytes([45, 154, 237, 210, 221, 15, 166, 92]),
+        pool=0, base_mint=2, quote_mint=3, base_vault=4, quote_vault=5,
+        log_markers=("program log: instruction: initializelbpair",), constant_product=False,
+    ),
+    # Pump.fun 畢業遷移的目標 AMM
+    # 帳戶: 0 pool, 3 base_mint, 4 quote_mint, 5 lp_mint, 9/10 pool_base/quote_token_account
+    LaunchDecoder(
+        "pumpswap", "pAMMBay6oceH9fJKBRHGP5D4bD4sWpmSwMn52FMfXEA", "create_pool",
+        bytes([233, 146, 209, 142, 207, 104, 64, 188]),
+        pool=0, base_mint=3, quote_mint=4, base_vault=9, quote_vault=10, lp_mint=5,
+        log_markers=("program log: instruction: createpool",),
+    ),
+]
+
+LAUNCH_DECODER_NAMES = [decoder.name for decoder in LAUNCH_DECODERS]
+
+
+def decoders_for(names: Optional[Iterable[str]] = None) -> List[LaunchDecoder]:
+    """按名稱選取解碼器，None 為全部；未知名稱拋出 ValueError"""
+    if names is None:
+        return list(LAUNCH_DECODERS)
+    names = list(names)
+    unknown = [name for name in names if name not in LAUNCH_DECODER_NAMES]
+    if unknown:
+        raise ValueError(f"unknown pool programs: {', '.join(unknown)} (known: {', '.join(LAUNCH_DECODER_NAMES)})")
+    return [decoder for decoder in LAUNCH_DECODERS if decoder.name in names]
+
+
+class LaunchRegistry:
+    def __init__(self, decoders: Sequence[LaunchDecoder]):
+        if not decoders:
+            raise ValueError("at least one pool program is required")
+        self.decoders = list(decoders)
+        # 程序 ID -> 解碼器，判別碼長的優先比對
+        self._by_program: Dict[str, List[LaunchDecoder]] = {}
+        for decoder in self.decoders:
+            self._by_program.setdefault(decoder.program_id, []).append(decoder)
+        for candidates in self._by_program.values():
+            candidates.sort(key=lambda decoder: len(decoder.discriminator), reverse=True)
+
+    @property
+    def program_ids(self) -> List[str]:
+        return list(self._by_program)
+
+    @property
+    def backfill_addresses(self) -> List[str]:
+        """回補翻頁的地址: 各解碼器的 backfill_accounts，沒有的用程序 ID"""
+        addresses: List[str] = []
+        for decoder in self.decoders:
+            for address in decoder.backfill_accounts or (decoder.program_id,):
+                if address not in addresses:
+                    addresses.append(address)
+        return addresses
+
+    def name(self, program_id: str) -> str:
+        return self._by_program[program_id][0].name
+
+    def log_matches(self, program_id: str, logs: Sequence[str]) -> bool:
+        """日誌中是否出現該程序建池指令的標記"""
+        markers = [marker for decoder in self._by_program.get(program_id, ()) for marker in decoder.log_markers]
+        for log in logs:
+            line = log.lower()
+            if any(line == marker or line.startswith(marker + ":") for marker in markers):
+                return True
+        return False
+
+    def decode_instruction(self, program_id: str, data: Optional[str],
+                           accounts: Sequence[str]) -> Optional[PoolLaunch]:
+        """jsonParsed 中未解析的指令: data 為 base58，accounts 為地址列表"""
+        candidates = self._by_program.get(program_id)
+        if not candidates or not data:
+            return None
+        try:
+            raw = b58decode(data)
+        except ValueError:
+            return None
+        for decoder in candidates:
+            if raw.startswith(decoder.discriminator):
+                return decoder.decode(accounts)
+        return None
+
+    def find(self, tx) -> Optional[PoolLaunch]:
+        """交易中第一個建池指令，頂層指令優先，其次 innerInstructions (CPI)"""
+        instructions = list(tx.transaction.message.instructions)
+        for inner in getattr(tx.meta, 'inner_instructions', None) or []:
+            instructions.extend(inner.instructions)
+        for instruction in instructions:
+            launch = self.decode_instruction(instruction.program_id, instruction.data, instruction.accounts)
+            if launch is not None:
+                return launch
+        return None
@@ -0,0 +1,190 @@
+"""新池子的即時儲備追蹤
+
+對每個新池子的 coin / pc 金庫帳戶 accountSubscribe (經由 WsMultiplexer
+與 logsSubscribe 共用同一條 WebSocket)，直接從通知中的帳戶資料解出
+SPL Token 餘額，在記憶體中維護儲備、價格與流動性變化率。
+
+- 同時追蹤的池子數有上限，超過時淘汰最久沒有更新的池子 (LRU)
+- 每個池子只追蹤 window 秒，過期後取消訂閱
+- 重新連線後的重新訂閱由 WsMultiplexer 處理
+"""
+import base64
+import logging
+import struct
+import time
+from collections import OrderedDict, deque
+from functools import partial
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import msgspec
+
+from solana_bot.rpc_types import account_params_decoder
+from solana_bot.ws_mux import Subscription, WsMultiplexer
+
+logger = logging.getLogger(__name__)
+
+# SPL Token 帳戶: mint(32) owner(32) amount(u64) ...
+TOKEN_ACCOUNT_AMOUNT_OFFSET = 64
+
+# 儲備變化 / 停止追蹤時的回調 (例如同步到 QuoteEngine)
+UpdateFunc = Callable[["PoolReserves"], None]
+RemoveFunc = Callable[[str], None]
+
+
+def decode_token_amount(data: bytes) -> Optional[int]:
+    if len(data) < TOKEN_ACCOUNT_AMOUNT_OFFSET + 8:
+        return None
+    return struct.unpack_from("<Q", data, TOKEN_ACCOUNT_AMOUNT_OFFSET)[0]
+
+
+class PoolReserves:
+    """單一池子的儲備狀態"""
+
+    __slots__ = ("pool", "coin_mint", "pc_mint", "coin_vault", "pc_vault", "coin_decimals", "pc_decimals",
+                 "coin_amount", "pc_amount", "initial_pc", "started", "updated", "updates", "history")
+
+    def __init__(self, pool: str, coin_mint: str, pc_mint: str, coin_vault: str, pc_vault: str,
+                 coin_decimals: int, pc_decimals: int, coin_amount: int = 0, pc_amount: int = 0):
+        self.pool = pool
+        self.coin_mint = coin_mint
+        self.pc_mint = pc_mint
+        self.coin_vault = coin_vault
+        self.pc_vault = pc_vault
+        self.coin_decimals = coin_decimals
+        self.pc_decimals = pc_decimals
+        self.coin_amount = coin_amount
+        self.pc_amount = pc_amount
+        self.initial_pc = pc_amount
+        self.started = time.time()
+        self.updated = self.started
+        self.updates = 0
+        # (時間, pc 端儲備) 用於計算流動性變化率
+        self.history: Deque[Tuple[float, int]] = deque(maxlen=240)
+        self.history.append((self.started, pc_amount))
+
+    @property
+    def coin_reserve(self) -> float:
+        return self.coin_amount / 10 ** self.coin_decimals
+
+    @property
+    def pc_reserve(self) -> float:
+        return self.pc_amount / 10 ** self.pc_decimals
+
+    @property
+    def price(self) -> Optional[float]:
+        """每單位 coin 的 pc 價格"""
+        coin = self.coin_reserve
+        return self.pc_reserve / coin if coin else None
+
+    def liquidity_change_rate(self, lookback: float = 60.0) -> Optional[float]:
+        """pc 端儲備在最近 lookback 秒內的變化 (%/分鐘)"""
+        now = time.time()
+        base = None
+        for ts, amount in self.history:
+            if now - ts <= lookback:
+                break
+            base = (ts, amount)
+        if base is None:
+            base = self.history[0]
+        elapsed = now - base[0]
+        # 時間太短時外推出的速率沒有意義
+        if elapsed < 10 or not base[1]:
+            return None
+        return (self.pc_amount - base[1]) / base[1] * 100 * 60 / elapsed
+
+    def as_dict(self) -> Dict:
+        rate = self.liquidity_change_rate()
+        return {
+            'pool': self.pool,
+            'coin_mint': self.coin_mint,
+            'pc_mint': self.pc_mint,
+            'coin_reserve': self.coin_reserve,
+            'pc_reserve': self.pc_reserve,
+            'price': self.price,
+            'pc_change_since_start_pct': (
+                round((self.pc_amount - self.initial_pc) / self.initial_pc * 100, 2) if self.initial_pc else None
+            ),
+            'liquidity_change_pct_per_min': round(rate, 3) if rate is not None else None,
+            'updates': self.updates,
+            'tracked_seconds': round(time.time() - self.started),
+        }
+
+
+class ReserveTracker:
+    """以 accountSubscribe 追蹤多個池子的金庫餘額"""
+
+    def __init__(self, ws: WsMultiplexer, max_pools: int = 200, window: float = 3600,
+                 on_update: Optional[UpdateFunc] = None, on_remove: Optional[RemoveFunc] = None):
+        self.ws = ws
+        self.on_update = on_update
+        self.on_remove = on_remove
+        self.max_pools = max_pools
+        self.window = window
+        self.pools: "OrderedDict[str, PoolReserves]" = OrderedDict()
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self.notifications = 0
+
+    async def track(self, reserves: PoolReserves) -> None:
+        if reserves.pool in self.pools:
+            return
+        while len(self.pools) >= self.max_pools:
+            oldest = next(iter(self.pools))
+            logger.debug(f"Reserve tracker full, evicting {oldest}")
+            await self.untrack(oldest)
+        self.pools[reserves.pool] = reserves
+        if self.on_update:
+            self.on_update(reserves)
+        await self._subscribe(reserves)
+
+    async def _subscribe(self, reserves: PoolReserves) -> None:
+        subscriptions = self._subscriptions[reserves.pool] = []
+        for side, vault in (("coin", reserves.coin_vault), ("pc", reserves.pc_vault)):
+            subscriptions.append(await self.ws.subscribe(
+                "accountSubscribe",
+                [vault, {"encoding": "base64", "commitment": "confirmed"}],
+                handler=partial(self._on_account, reserves.pool, side),
+            ))
+
+    async def untrack(self, pool: str) -> None:
+        if self.pools.pop(pool, None) is not None and self.on_remove:
+            self.on_remove(pool)
+        for subscription in self._subscriptions.pop(pool, []):
+            await self.ws.unsubscribe(subscription)
+
+    def _on_account(self, pool: str, side: str, params: msgspec.Raw) -> None:
+        value = account_params_decoder.decode(params).result.value
+        if value and value.data:
+            self.handle_notification(pool, side, value.data[0])
+
+    def handle_notification(self, pool: str, side: str, data_base64: str) -> None:
+        reserves = self.pools.get(pool)
+        if reserves is None:
+            return
+        amount = decode_token_amount(base64.b64decode(data_base64))
+        if amount is None:
+            return
+
+        self.notifications += 1
+        if side == "coin":
+            reserves.coin_amount = amount
+        else:
+            reserves.pc_amount = amount
+            reserves.history.append((time.time(), amount))
+        reserves.updated = time.time()
+        reserves.updates += 1
+        if self.on_update:
+            self.on_update(reserves)
+        # 最近有更新的池子排到最後，淘汰時從最前面開始
+        self.pools.move_to_end(pool)
+
+    async def expire(self) -> None:
+        cutoff = time.time() - self.window
+        for pool in [pool for pool, reserves in self.pools.items() if reserves.started < cutoff]:
+            await self.untrack(pool)
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict]:
+        """最近更新的池子在前"""
+        pools = list(reversed(self.pools.values()))
+        if limit is not None:
+            pools = pools[:limit]
+        return [reserves.as_dict() for reserves in pools]
@@ -0,0 +1,125 @@
+"""不可變 RPC 響應的本地快取
+
+已最終確認 (finalized) 的 getTransaction 與 getBlock 結果不會再改變，
+重試、重啟與回補時不必重新向付費 RPC 請求。
+
+- 鍵: sha256(method + 參數 JSON + commitment)
+- 值: zlib 壓縮後的原始 JSON-RPC 響應，存放在 SQLite 檔案
+- 總大小超過上限時按最後存取時間淘汰最舊的記錄
+- 只快取有結果的響應 (result 為 null 代表交易還沒被 RPC 看到，不能快取)
+
+confirmed 級別的結果不快取: 分叉回滾時交易可能被丟棄或在另一個 slot 以
+不同的結果重新執行，slot、blockTime、err 與餘額變化都可能改變。
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("RPC_CACHE_PATH", "rpc_cache.db")
+CACHE_MAX_BYTES = int(os.getenv("RPC_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# method -> 允許快取的 commitment
+CACHEABLE = {
+    "getTransaction": {"finalized"},
+    "getBlock": {"finalized"},
+}
+
+
+def cache_key(method: str, params: Any, commitment: str) -> str:
+    raw = json.dumps([method, params, commitment], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class RpcResponseCache:
+    """以 SQLite 為存儲、大小有上限的 RPC 響應快取"""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    method TEXT,
+                    size INTEGER,
+                    last_access REAL,
+                    data BLOB
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.evictions = 0
+
+    @staticmethod
+    def cacheable(method: str, commitment: str) -> bool:
+        return commitment in CACHEABLE.get(method, ())
+
+    def get(self, method: str, params: Any, commitment: str = "finalized") -> Optional[bytes]:
+        """返回快取中的原始響應 JSON，未命中返回 None"""
+        if not self.cacheable(method, commitment):
+            return None
+        key = cache_key(method, params, commitment)
+        row = self.conn.execute("SELECT data FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses[method] += 1
+            return None
+        self.hits[method] += 1
+        with self.conn:
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+        return zlib.decompress(row[0])
+
+    def put(self, method: str, params: Any, commitment: str, payload: bytes) -> None:
+        if not self.cacheable(method, commitment):
+            return
+        data = zlib.compress(payload, 6)
+        key = cache_key(method, params, commitment)
+        with self.conn:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, method, size, last_access, data) VALUES (?, ?, ?, ?, ?)",
+                (key, method, len(data), time.time(), data)
+            )
+        self.total_bytes += len(data) - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        # 淘汰到上限的 90%，避免每次寫入都觸發
+        target = int(self.max_bytes * 0.9)
+        with self.conn:
+            victims = []
+            for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                if self.total_bytes <= target:
+                    break
+                victims.append((key,))
+                self.total_bytes -= size
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+        logger.info(f"RPC cache evicted {len(victims)} entries ({self.total_bytes / 1024 / 1024:.1f} MB kept)")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            'hits': dict(self.hits),
+            'misses': dict(self.misses),
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'evictions': self.evictions,
+            'size_mb': round(self.total_bytes / 1024 / 1024, 2),
+        }
+
+    def close(self) -> None:
+        self.conn.close()
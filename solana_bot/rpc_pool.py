@@ -0,0 +1,96 @@
+"""多個元件共用的 RPC 連線池
+
+同一行程中的監控元件共用一組 keep-alive 連線 (非同步與同步各一個
+httpx 連線池)，不再各自建立 requests / httpx / solana Client 連到同一個
+RPC 供應商。請求失敗時依序換下一個端點重試。
+
+返回原始響應 bytes，由調用方用 solana_bot.rpc_types 的解碼器直接解碼。
+"""
+import json
+import logging
+from typing import List, Sequence, Union
+
+import httpx
+
+from solana_bot.metrics import RPC_ERRORS, RPC_LATENCY, endpoint_label
+
+logger = logging.getLogger(__name__)
+
+# 大多數方法為位置參數列表，DAS 方法 (getAsset 等) 為具名參數
+Params = Union[list, dict]
+
+
+def _payload(method: str, params: Params) -> dict:
+    return {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+
+
+class RpcPool:
+    def __init__(self, endpoints: Sequence[str], timeout: float = 30, max_connections: int = 64):
+        self.endpoints: List[str] = [endpoint for endpoint in endpoints if endpoint]
+        if not self.endpoints:
+            raise ValueError("at least one RPC endpoint is required")
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._async = httpx.AsyncClient(timeout=timeout, limits=limits)
+        # 同步調用 (區塊掃描等既有的同步程式碼) 使用另一個連線池
+        self._sync = httpx.Client(timeout=timeout, limits=limits)
+        self._current = 0
+
+    @property
+    def endpoint(self) -> str:
+        return self.endpoints[self._current]
+
+    def _failed(self, endpoint: str) -> None:
+        # 其他請求可能已經換過端點，只在仍指向失敗端點時才前進
+        if self.endpoint == endpoint and len(self.endpoints) > 1:
+            self._current = (self._current + 1) % len(self.endpoints)
+            logger.warning(f"RPC endpoint {endpoint_label(endpoint)} failed, switching to {endpoint_label(self.endpoint)}")
+
+    async def post(self, method: str, params: Params) -> bytes:
+        """非同步請求，返回響應 bytes；所有端點都失敗時拋出最後一個錯誤"""
+        error = None
+        for _ in range(len(self.endpoints)):
+            endpoint = self.endpoint
+            labels = (method, endpoint_label(endpoint))
+            try:
+                with RPC_LATENCY.labels(*labels).time():
+                    response = await self._async.post(endpoint, json=_payload(method, params))
+                response.raise_for_status()
+                return response.content
+            except httpx.HTTPError as e:
+                RPC_ERRORS.labels(*labels).inc()
+                self._failed(endpoint)
+                error = e
+        raise error
+
+    def post_sync(self, method: str, params: Params) -> bytes:
+        error = None
+        for _ in range(len(self.endpoints)):
+            endpoint = self.endpoint
+            labels = (method, endpoint_label(endpoint))
+            try:
+                with RPC_LATENCY.labels(*labels).time():
+                    response = self._sync.post(endpoint, json=_payload(method, params))
+                response.raise_for_status()
+                return response.content
+            except httpx.HTTPError as e:
+                RPC_ERRORS.labels(*labels).inc()
+                self._failed(endpoint)
+                error = e
+        raise error
+
+    async def call(self, method: str, params: Params):
+        """返回 JSON 的 result 欄位，RPC 錯誤時拋出 RuntimeError"""
+        data = json.loads(await self.post(method, params))
+        if data.get('error'):
+            raise RuntimeError(f"{method}: {data['error']}")
+        return data.get('result')
+
+    def call_sync(self, method: str, params: Params):
+        data = json.loads(self.post_sync(method, params))
+        if data.get('error'):
+            raise RuntimeError(f"{method}: {data['error']}")
+        return data.get('result')
+
+    async def aclose(self) -> None:
+        await self._async.aclose()
+        self._sync.close()
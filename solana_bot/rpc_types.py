@@ -0,0 +1,244 @@
+"""RPC 響應的型別化解碼 (msgspec)
+
+直接從響應 bytes 解碼成 Struct，只宣告實際用到的欄位；未宣告的子樹
+(例如完整的 innerInstructions、rewards) 在解碼時直接跳過，不會建立
+Python 物件。欄位使用 rename="camel"，屬性名與 solders 物件一致
+(tx.meta.log_messages、message.account_keys ...)，原本走 solders 的
+程式碼可以直接換用。
+"""
+from typing import Any, List, Optional
+
+import msgspec
+
+
+class _Base(msgspec.Struct, rename="camel"):
+    pass
+
+
+# ---------- 共用 ----------
+
+class UiTokenAmount(_Base):
+    amount: str = "0"
+    decimals: int = 0
+    ui_amount: Optional[float] = None
+
+
+class TokenBalance(_Base):
+    account_index: int = 0
+    mint: str = ""
+    owner: Optional[str] = None
+    ui_token_amount: UiTokenAmount = msgspec.field(default_factory=UiTokenAmount)
+
+
+class LoadedAddresses(_Base):
+    writable: List[str] = []
+    readonly: List[str] = []
+
+
+class AddressTableLookup(_Base):
+    account_key: str = ""
+    writable_indexes: List[int] = []
+    readonly_indexes: List[int] = []
+
+
+# ---------- getTransaction (encoding=jsonParsed) ----------
+
+class ParsedInstruction(_Base):
+    """jsonParsed 指令: 未知程序帶 accounts/data，已解析的帶 parsed (此處不需要)"""
+    program_id: str = ""
+    accounts: List[str] = []
+    data: Optional[str] = None
+
+
+class ParsedAccountKey(_Base):
+    pubkey: str = ""
+    signer: bool = False
+    writable: bool = False
+
+
+class ParsedMessage(_Base):
+    account_keys: List[ParsedAccountKey] = []
+    instructions: List[ParsedInstruction] = []
+
+
+class ParsedTransaction(_Base):
+    signatures: List[str] = []
+    message: ParsedMessage = msgspec.field(default_factory=ParsedMessage)
+
+
+class TransactionMeta(_Base):
+    err: Any = None
+    log_messages: Optional[List[str]] = None
+    pre_token_balances: Optional[List[TokenBalance]] = None
+    post_token_balances: Optional[List[TokenBalance]] = None
+
+
+class InnerInstructions(_Base):
+    index: int = 0
+    instructions: List[ParsedInstruction] = []
+
+
+class TransactionMetaWithInner(TransactionMeta):
+    inner_instructions: Optional[List[InnerInstructions]] = None
+
+
+class TransactionResult(_Base):
+    """跳過 innerInstructions，只看頂層指令與日誌"""
+    slot: int = 0
+    block_time: Optional[int] = None
+    transaction: ParsedTransaction = msgspec.field(default_factory=ParsedTransaction)
+    meta: Optional[TransactionMeta] = None
+
+
+class TransactionWithInnerResult(_Base):
+    """需要 CPI 內部指令時使用 (例如經由其他程序調用的 Pump.fun create)"""
+    slot: int = 0
+    block_time: Optional[int] = None
+    transaction: ParsedTransaction = msgspec.field(default_factory=ParsedTransaction)
+    meta: Optional[TransactionMetaWithInner] = None
+
+
+class TransactionResponse(_Base):
+    result: Optional[TransactionResult] = None
+    error: Any = None
+
+
+class TransactionWithInnerResponse(_Base):
+    result: Optional[TransactionWithInnerResult] = None
+    error: Any = None
+
+
+# ---------- getBlock (encoding=json) ----------
+
+class CompiledInstruction(_Base):
+    program_id_index: int = 0
+    accounts: List[int] = []
+    data: str = ""
+
+
+class MessageHeader(_Base):
+    """帳戶順序: 可寫簽名者、唯讀簽名者、可寫非簽名者、唯讀非簽名者"""
+    num_required_signatures: int = 0
+    num_readonly_signed_accounts: int = 0
+    num_readonly_unsigned_accounts: int = 0
+
+
+class RawMessage(_Base):
+    header: MessageHeader = msgspec.field(default_factory=MessageHeader)
+    account_keys: List[str] = []
+    instructions: List[CompiledInstruction] = []
+    address_table_lookups: Optional[List[AddressTableLookup]] = None
+
+
+class RawTransaction(_Base):
+    signatures: List[str] = []
+    message: RawMessage = msgspec.field(default_factory=RawMessage)
+
+
+class BlockTransactionMeta(_Base):
+    err: Any = None
+    fee: int = 0
+    pre_balances: List[int] = []
+    post_balances: List[int] = []
+    log_messages: Optional[List[str]] = None
+    pre_token_balances: Optional[List[TokenBalance]] = None
+    post_token_balances: Optional[List[TokenBalance]] = None
+    loaded_addresses: Optional[LoadedAddresses] = None
+
+
+class BlockTransaction(_Base):
+    transaction: RawTransaction = msgspec.field(default_factory=RawTransaction)
+    meta: Optional[BlockTransactionMeta] = None
+
+
+class BlockResult(_Base):
+    block_height: Optional[int] = None
+    block_time: Optional[int] = None
+    parent_slot: int = 0
+    transactions: List[BlockTransaction] = []
+
+
+class BlockResponse(_Base):
+    result: Optional[BlockResult] = None
+    error: Any = None
+
+
+# ---------- getSignaturesForAddress ----------
+
+class SignatureInfo(_Base):
+    """按時間由新到舊排列"""
+    signature: str = ""
+    slot: int = 0
+    err: Any = None
+    block_time: Optional[int] = None
+
+
+class SignaturesResponse(_Base):
+    result: Optional[List[SignatureInfo]] = None
+    error: Any = None
+
+
+# ---------- WebSocket ----------
+
+class NotificationContext(_Base):
+    slot: int = 0
+
+
+class LogsValue(_Base):
+    signature: str = ""
+    err: Any = None
+    logs: List[str] = []
+
+
+class LogsResult(_Base):
+    context: NotificationContext = msgspec.field(default_factory=NotificationContext)
+    value: LogsValue = msgspec.field(default_factory=LogsValue)
+
+
+class LogsParams(_Base):
+    result: LogsResult = msgspec.field(default_factory=LogsResult)
+    subscription: int = 0
+
+
+class AccountValue(_Base):
+    """encoding=base64 時 data 為 [base64 字串, "base64"]"""
+    data: List[str] = []
+    lamports: int = 0
+
+
+class AccountResult(_Base):
+    context: NotificationContext = msgspec.field(default_factory=NotificationContext)
+    value: Optional[AccountValue] = None
+
+
+class AccountParams(_Base):
+    result: AccountResult = msgspec.field(default_factory=AccountResult)
+    subscription: int = 0
+
+
+class SubscriptionParams(_Base):
+    """任何 *Notification 的 params，只取訂閱 id 用於分派"""
+    subscription: int = 0
+
+
+class WsMessage(_Base):
+    """WebSocket 訊息外層: 訂閱回覆 (id/result) 或通知 (method/params)
+
+    params 保留為 Raw，依 method 再用對應的型別解碼；沒有 params 時為空的
+    Raw (布林值為假)。msgspec 不支援 Optional[Raw]，那樣只接受 null。
+    """
+    method: Optional[str] = None
+    params: msgspec.Raw = msgspec.Raw()
+    id: Any = None
+    result: Any = None
+    error: Any = None
+
+
+transaction_decoder = msgspec.json.Decoder(TransactionResponse)
+transaction_with_inner_decoder = msgspec.json.Decoder(TransactionWithInnerResponse)
+block_decoder = msgspec.json.Decoder(BlockResponse)
+signatures_decoder = msgspec.json.Decoder(SignaturesResponse)
+ws_message_decoder = msgspec.json.Decoder(WsMessage)
+logs_params_decoder = msgspec.json.Decoder(LogsParams)
+account_params_decoder = msgspec.json.Decoder(AccountParams)
+subscription_params_decoder = msgspec.json.Decoder(SubscriptionParams)
@@ -0,0 +1,120 @@
+"""新池子的批量安全檢查
+
+一批池子需要的代幣 mint 與 LP mint 帳戶用一次 getMultipleAccounts
+拉取 (每 100 個帳戶一個請求)，在本地解 SPL Mint 結構，計算:
+
+- mint authority / freeze authority 是否仍存在 (可增發 / 可凍結)
+- 供應量與小數位
+- LP 銷毀比例: 1 - 目前 LP 供應量 / 初始化時鑄造的 LP 數量
+
+初始 LP 數量取自初始化交易的 postTokenBalances，不需要額外請求。
+"""
+import base64
+import logging
+import struct
+from typing import Callable, Dict, List, Optional, Sequence
+
+from base58 import b58encode
+
+logger = logging.getLogger(__name__)
+
+# SPL Mint: mint_authority COption<Pubkey>(36) supply u64 decimals u8 is_initialized bool
+#           freeze_authority COption<Pubkey>(36)，共 82 bytes (Token-2022 之後帶擴充資料)
+MINT_SIZE = 82
+MAX_ACCOUNTS_PER_REQUEST = 100
+
+# 輸入最多 100 個帳戶地址，返回對應的帳戶資料 (不存在為 None)
+AccountFetcher = Callable[[List[str]], List[Optional[bytes]]]
+
+
+def _read_coption_pubkey(data: bytes, offset: int) -> Optional[str]:
+    tag = struct.unpack_from("<I", data, offset)[0]
+    if tag == 0:
+        return None
+    return b58encode(data[offset + 4:offset + 36]).decode()
+
+
+def decode_mint(data: bytes) -> Optional[Dict]:
+    if data is None or len(data) < MINT_SIZE:
+        return None
+    return {
+        'mint_authority': _read_coption_pubkey(data, 0),
+        'supply': struct.unpack_from("<Q", data, 36)[0],
+        'decimals': data[44],
+        'is_initialized': bool(data[45]),
+        'freeze_authority': _read_coption_pubkey(data, 46),
+    }
+
+
+def risk_score(token_mint: Optional[Dict], lp_burn_ratio: Optional[float], has_lp: bool = True) -> int:
+    """0 (較安全) ~ 100 (高風險)
+
+    可增發 40 分、可凍結 30 分、LP 未銷毀部分最多 30 分；無法解析代幣
+    帳戶時直接視為最高風險。沒有 LP mint 的池子 (CLMM、DLMM 以倉位而非
+    LP 代幣記帳) 不計 LP 分數。
+    """
+    if token_mint is None:
+        return 100
+    score = 0
+    if token_mint['mint_authority']:
+        score += 40
+    if token_mint['freeze_authority']:
+        score += 30
+    if not has_lp:
+        return score
+    burned = lp_burn_ratio if lp_burn_ratio is not None else 0.0
+    score += round(30 * (1 - min(max(burned, 0.0), 1.0)))
+    return score
+
+
+class SafetyCheck:
+    """單一池子的檢查輸入，lp_mint 為空字串表示池子沒有 LP 代幣"""
+
+    __slots__ = ("pool", "token_mint", "lp_mint", "initial_lp")
+
+    def __init__(self, pool: str, token_mint: str, lp_mint: str, initial_lp: Optional[int]):
+        self.pool = pool
+        self.token_mint = token_mint
+        self.lp_mint = lp_mint
+        self.initial_lp = initial_lp
+
+
+class SafetyChecker:
+    def __init__(self, fetch_accounts: AccountFetcher):
+        self.fetch_accounts = fetch_accounts
+
+    def fetch_mints(self, addresses: Sequence[str]) -> Dict[str, Optional[Dict]]:
+        unique = list(dict.fromkeys(address for address in addresses if address))
+        mints: Dict[str, Optional[Dict]] = {}
+        for start in range(0, len(unique), MAX_ACCOUNTS_PER_REQUEST):
+            chunk = unique[start:start + MAX_ACCOUNTS_PER_REQUEST]
+            for address, data in zip(chunk, self.fetch_accounts(chunk)):
+                mints[address] = decode_mint(data)
+        return mints
+
+    def check(self, checks: Sequence[SafetyCheck]) -> Dict[str, Dict]:
+        """返回 池子地址 -> 檢查結果"""
+        mints = self.fetch_mints([address for check in checks for address in (check.token_mint, check.lp_mint)])
+        results = {}
+        for check in checks:
+            token = mints.get(check.token_mint)
+            lp = mints.get(check.lp_mint)
+            burn_ratio = None
+            if lp is not None and check.initial_lp:
+                burn_ratio = max(0.0, 1 - lp['supply'] / check.initial_lp)
+            results[check.pool] = {
+                'mint_authority': token['mint_authority'] if token else None,
+                'freeze_authority': token['freeze_authority'] if token else None,
+                'supply': token['supply'] if token else None,
+                'decimals': token['decimals'] if token else None,
+                'lp_burn_pct': round(burn_ratio * 100, 2) if burn_ratio is not None else None,
+                'risk_score': risk_score(token, burn_ratio, has_lp=bool(check.lp_mint)),
+            }
+        return results
+
+
+def decode_account_data(value) -> Optional[bytes]:
+    """getMultipleAccounts (encoding=base64) 的單個帳戶結果"""
+    if not value or not value.get('data'):
+        return None
+    return base64.b64decode(value['data'][0])
@@ -0,0 +1,124 @@
+"""情感分數快取
+
+放在情感模型前面: 以正規化文字雜湊為鍵，先查記憶體 LRU，再查 SQLite
+中的 sentiment_cache 表，都沒有才跑模型推論。新結果批量寫回資料庫，
+重啟後仍可命中。
+"""
+import sqlite3
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .text_utils import text_hash
+
+# 輸入一批文字，返回同樣長度的情感分數 (0~1，越高越正面)
+Scorer = Callable[[List[str]], List[float]]
+
+
+class SentimentCache:
+    """正規化文字雜湊 -> 情感分數 的兩級快取"""
+
+    def __init__(self, scorer: Scorer, conn: Optional[sqlite3.Connection] = None,
+                 max_entries: int = 20000, flush_size: int = 100):
+        self.scorer = scorer
+        self.conn = conn
+        self.max_entries = max_entries
+        self.flush_size = flush_size
+        self._lru: "OrderedDict[str, float]" = OrderedDict()
+        self._pending: Dict[str, float] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, score: float) -> None:
+        self._lru[key] = score
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def _lookup_disk(self, keys: Sequence[str]) -> Dict[str, float]:
+        if self.conn is None or not keys:
+            return {}
+        found = {}
+        # SQLite 單條語句的參數數量有上限，分批查詢
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT text_hash, score FROM sentiment_cache WHERE text_hash IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update(rows)
+        return found
+
+    def score(self, text: str) -> float:
+        return self.score_batch([text])[0]
+
+    def score_batch(self, texts: Sequence[str]) -> List[float]:
+        """對一批文字評分，重複內容 (含同批次內) 只推論一次"""
+        keys = [text_hash(text) for text in texts]
+        scores: Dict[str, float] = {}
+
+        missing: Dict[str, None] = {}
+        for key in keys:
+            if key in scores:
+                self.memory_hits += 1
+            elif key in self._lru:
+                scores[key] = self._lru[key]
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+            elif key in self._pending:
+                scores[key] = self._pending[key]
+                self.memory_hits += 1
+            elif key not in missing:
+                missing[key] = None
+            else:
+                self.memory_hits += 1
+
+        if missing:
+            for key, score in self._lookup_disk(list(missing)).items():
+                scores[key] = score
+                self._remember(key, score)
+                self.disk_hits += 1
+
+            to_infer = [key for key in missing if key not in scores]
+            if to_infer:
+                first_text = {}
+                for key, text in zip(keys, texts):
+                    first_text.setdefault(key, text)
+                results = self.scorer([first_text[key] for key in to_infer])
+                for key, score in zip(to_infer, results):
+                    scores[key] = score
+                    self._remember(key, score)
+                    self._pending[key] = score
+                self.misses += len(to_infer)
+                if len(self._pending) >= self.flush_size:
+                    self.flush()
+
+        return [scores[key] for key in keys]
+
+    def flush(self) -> None:
+        if self.conn is None or not self._pending:
+            self._pending.clear()
+            return
+        rows, self._pending = list(self._pending.items()), {}
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (text_hash, score) VALUES (?, ?)", rows
+            )
+
+    @property
+    def lookups(self) -> int:
+        return self.memory_hits + self.disk_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.memory_hits + self.disk_hits) / self.lookups if self.lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'lookups': self.lookups,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate, 4),
+            'lru_size': len(self._lru),
+        }
@@ -0,0 +1,25 @@
+"""推文文字正規化與雜湊
+
+機器人常貼出只差網址、@提及、合約地址或空白的相同喊單文字，
+正規化後再雜湊可以把這些推文視為同一內容。
+"""
+import hashlib
+import re
+
+_URL_RE = re.compile(r"https?://\S+")
+_MENTION_RE = re.compile(r"@\w+")
+# 合約地址 (base58, 32~44 字元): 同一模板的喊單只差地址
+_ADDRESS_RE = re.compile(r"\b[1-9A-HJ-NP-Za-km-z]{32,44}\b")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    text = _ADDRESS_RE.sub(" <addr> ", text)
+    text = _URL_RE.sub(" ", text.lower())
+    text = _MENTION_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def text_hash(text: str) -> str:
+    """正規化文字的 SHA-1 (十六進位)"""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
@@ -0,0 +1,284 @@
+"""solana_tokens.db 的存取層 (Pump.fun 新代幣與社交數據)
+
+- 以 PRAGMA user_version 記錄 schema 版本，啟動時依序套用遷移
+- WAL 模式，讀取報告時不阻塞寫入
+- 寫入先累積在記憶體中，由 flush() 在單一交易內批量提交
+"""
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+WRITE_LATENCY = histogram("token_store_write_seconds", "solana_tokens.db write transaction latency", ["operation"])
+
+DB_PATH = "solana_tokens.db"
+
+TOKEN_COLUMNS = (
+    'mint_address', 'program_id', 'first_seen', 'transaction_signature',
+    'bonding_curve', 'creator', 'name', 'symbol', 'uri',
+)
+
+
+def adapt_datetime(ts):
+    return ts.isoformat()
+
+
+sqlite3.register_adapter(datetime, adapt_datetime)
+
+
+def _migration_base_tables(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tokens (
+            mint_address TEXT PRIMARY KEY,
+            program_id TEXT DEFAULT '',
+            first_seen DATETIME,
+            transaction_signature TEXT DEFAULT '',
+            social_analyzed INTEGER DEFAULT 0,
+            bonding_curve TEXT DEFAULT '',
+            creator TEXT DEFAULT '',
+            name TEXT DEFAULT '',
+            symbol TEXT DEFAULT '',
+            uri TEXT DEFAULT ''
+        )
+    """)
+    # 舊資料庫補上 create 指令解碼出的欄位
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tokens)")}
+    for column in ('bonding_curve', 'creator', 'name', 'symbol', 'uri'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE tokens ADD COLUMN {column} TEXT DEFAULT ''")
+
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS social_data (
+            mint_address TEXT,
+            timestamp DATETIME,
+            mentions INTEGER,
+            sentiment REAL,
+            FOREIGN KEY(mint_address) REFERENCES tokens(mint_address)
+        )
+    """)
+
+
+def _migration_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tokens_analyzed_first_seen
+        ON tokens(social_analyzed, first_seen)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_social_data_mint_timestamp
+        ON social_data(mint_address, timestamp)
+    """)
+
+
+def _migration_tweets(conn: sqlite3.Connection) -> None:
+    # 逐條推文記錄，重新掃描時只需對沒見過的推文做情感分析
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS tweets (
+            mint_address TEXT,
+            tweet_id TEXT,
+            author TEXT DEFAULT '',
+            text_hash TEXT,
+            sentiment REAL,
+            tweet_time TEXT DEFAULT '',
+            first_seen DATETIME,
+            PRIMARY KEY (mint_address, tweet_id)
+        ) WITHOUT ROWID
+    """)
+    # 按代幣增量累計，避免每次都對 tweets 全表聚合
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS social_totals (
+            mint_address TEXT PRIMARY KEY,
+            tweet_count INTEGER DEFAULT 0,
+            sentiment_sum REAL DEFAULT 0,
+            updated_at DATETIME
+        )
+    """)
+
+
+def _migration_sentiment_cache(conn: sqlite3.Connection) -> None:
+    # 正規化文字雜湊 -> 情感分數 (見 solana_bot/sentiment_cache.py)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            text_hash TEXT PRIMARY KEY,
+            score REAL
+        ) WITHOUT ROWID
+    """)
+
+
+# 依序套用，新遷移只能追加在最後
+MIGRATIONS = [
+    _migration_base_tables,
+    _migration_indexes,
+    _migration_tweets,
+    _migration_sentiment_cache,
+]
+
+
+class TokenStore:
+    """tokens / social_data / tweets 表的讀寫"""
+
+    def __init__(self, db_path: str = DB_PATH, flush_size: int = 50):
+        self.db_path = db_path
+        self.flush_size = flush_size
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.migrate()
+        self._pending_social: List[Tuple[str, datetime, int, float]] = []
+
+    def migrate(self) -> None:
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for index in range(version, len(MIGRATIONS)):
+            with self.conn:
+                MIGRATIONS[index](self.conn)
+                self.conn.execute(f"PRAGMA user_version = {index + 1}")
+            logger.info(f"{self.db_path} schema 已遷移到版本 {index + 1}")
+
+    def add_tokens(self, tokens: Sequence[Dict]) -> List[str]:
+        """在單一交易內寫入代幣，返回之前不存在的 Mint 地址"""
+        if not tokens:
+            return []
+
+        mints = [str(token['mint_address']) for token in tokens]
+        with WRITE_LATENCY.labels("add_tokens").time(), self.conn:
+            existing = {
+                row[0] for row in self.conn.execute(
+                    "SELECT mint_address FROM tokens WHERE mint_address IN (SELECT value FROM json_each(?))",
+                    (json.dumps(mints),)
+                )
+            }
+            now = datetime.now()
+            self.conn.executemany(f"""
+                INSERT OR IGNORE INTO tokens ({', '.join(TOKEN_COLUMNS)})
+                VALUES ({', '.join('?' * len(TOKEN_COLUMNS))})
+            """, [
+                tuple(now if column == 'first_seen' else str(token.get(column, '')) for column in TOKEN_COLUMNS)
+                for token in tokens
+            ])
+
+        new_mints = []
+        for mint in mints:
+            if mint not in existing:
+                existing.add(mint)
+                new_mints.append(mint)
+        return new_mints
+
+    def record_social_data(self, mint_address: str, mentions: int, sentiment: float,
+                           timestamp: Optional[datetime] = None) -> None:
+        """暫存一筆分析結果，累積到 flush_size 筆時批量寫入"""
+        self._pending_social.append((mint_address, timestamp or datetime.now(), mentions, sentiment))
+        if len(self._pending_social) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending_social:
+            return
+        rows, self._pending_social = self._pending_social, []
+        with WRITE_LATENCY.labels("social_data").time(), self.conn:
+            self.conn.executemany("""
+                INSERT INTO social_data (mint_address, timestamp, mentions, sentiment)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            self.conn.executemany("""
+                UPDATE tokens SET social_analyzed = 1 WHERE mint_address = ?
+            """, [(row[0],) for row in rows])
+
+    def seen_tweet_ids(self, mint_address: str) -> Set[str]:
+        return {
+            row[0] for row in self.conn.execute(
+                "SELECT tweet_id FROM tweets WHERE mint_address = ?", (mint_address,)
+            )
+        }
+
+    def add_tweets(self, mint_address: str, tweets: Sequence[Dict]) -> Tuple[int, float]:
+        """寫入新推文並增量更新累計值，返回 (累計推文數, 累計平均情緒)
+
+        tweets 中每項需有 tweet_id, author, text_hash, sentiment, tweet_time。
+        已存在的推文會被忽略，不會重複計入累計值。
+        """
+        now = datetime.now()
+        with WRITE_LATENCY.labels("tweets").time(), self.conn:
+            added = 0
+            sentiment_sum = 0.0
+            for tweet in tweets:
+                cur = self.conn.execute("""
+                    INSERT OR IGNORE INTO tweets
+                    (mint_address, tweet_id, author, text_hash, sentiment, tweet_time, first_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (mint_address, tweet['tweet_id'], tweet.get('author', ''), tweet['text_hash'],
+                      tweet['sentiment'], tweet.get('tweet_time', ''), now))
+                if cur.rowcount:
+                    added += 1
+                    sentiment_sum += tweet['sentiment']
+
+            self.conn.execute("""
+                INSERT INTO social_totals (mint_address, tweet_count, sentiment_sum, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(mint_address) DO UPDATE SET
+                    tweet_count = tweet_count + excluded.tweet_count,
+                    sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+                    updated_at = excluded.updated_at
+            """, (mint_address, added, sentiment_sum, now))
+
+            tweet_count, total_sentiment = self.conn.execute(
+                "SELECT tweet_count, sentiment_sum FROM social_totals WHERE mint_address = ?",
+                (mint_address,)
+            ).fetchone()
+
+        return tweet_count, (total_sentiment / tweet_count if tweet_count else 0.0)
+
+    def unanalyzed_tokens(self, limit: Optional[int] = None) -> List[str]:
+        # 暫存中的結果也算已分析，避免重複排程
+        pending = {row[0] for row in self._pending_social}
+        query = """
+            SELECT mint_address
+            FROM tokens
+            WHERE social_analyzed = 0
+            ORDER BY first_seen DESC
+        """
+        params: Tuple = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            params = (limit + len(pending),)
+        mints = [row[0] for row in self.conn.execute(query, params) if row[0] not in pending]
+        return mints[:limit] if limit is not None else mints
+
+    def social_summary(self, mint_addresses: Iterable[str]) -> List[Tuple[str, str, str, int, float]]:
+        """一次查詢多個代幣的累計提及量與平均情緒: (mint, name, symbol, mentions, sentiment)
+
+        social_data.mentions 記錄的是每次掃描新增的推文數，加總即為不重複推文總數。
+        """
+        mints = [str(mint) for mint in mint_addresses]
+        if not mints:
+            return []
+
+        self.flush()
+        rows = self.conn.execute("""
+            SELECT
+                t.mint_address,
+                t.name,
+                t.symbol,
+                COALESCE(SUM(s.mentions), 0) AS total_mentions,
+                COALESCE(
+                    st.sentiment_sum / NULLIF(st.tweet_count, 0),
+                    AVG(s.sentiment),
+                    0.0
+                ) AS avg_sentiment
+            FROM tokens t
+            LEFT JOIN social_data s ON t.mint_address = s.mint_address
+            LEFT JOIN social_totals st ON t.mint_address = st.mint_address
+            WHERE t.mint_address IN (SELECT value FROM json_each(?))
+            GROUP BY t.mint_address
+        """, (json.dumps(mints),)).fetchall()
+
+        # 保持調用方給定的順序
+        by_mint = {row[0]: row for row in rows}
+        return [by_mint[mint] for mint in mints if mint in by_mint]
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,395 @@
+"""錢包持倉與 PnL 的增量索引
+
+每筆偵測到的 swap 進來時更新簽名者在該代幣上的持倉 (平均成本法):
+
+- 買入: 數量與成本 (SOL) 直接累加
+- 賣出: 按平均成本扣除賣出部分的成本，差額計入已實現 PnL；
+  賣出數量超過已知持倉 (在開始監控前買入) 的部分沒有成本資料，不計 PnL
+- 未實現 PnL = 持倉數量 x 該代幣最新成交價 - 剩餘成本
+
+另外統計「早期買入」: 在代幣第一次被觀察到後 early_window 秒內的買入。
+持倉以 __slots__ 物件存放在記憶體中，變動過的持倉累積後批量 UPSERT
+到 wallet_positions 表。
+
+記憶體有上限:
+
+- 錢包按最近一次成交做 LRU，超過 max_wallets 時淘汰最久沒有成交的錢包
+  (未寫入的持倉在下次 drain 時寫出)；淘汰後再出現的錢包由 loader 從
+  wallet_positions 讀回
+- 代幣的最新價格與首次出現時間同樣按 LRU 保留 max_mints 個
+- 重啟時只載入最近活躍的錢包 (SELECT_POSITIONS_SQL 帶 LIMIT)，代幣首次
+  出現時間以各代幣持倉的 MIN(first_ts) 回填 (SELECT_MINT_FIRST_SEEN_SQL)
+
+每個錢包維護已實現 / 未實現 PnL 的累計值，top() 只在累計值上取前 k 名。
+成交只把代幣標記為價格已變動，top() 之前才按新價格重估持有該代幣的持倉。
+"""
+import heapq
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+WALLET_POSITIONS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS wallet_positions (
+        wallet TEXT NOT NULL,
+        mint_address TEXT NOT NULL,
+        quantity REAL,
+        cost_sol REAL,
+        realized_sol REAL,
+        buys INTEGER,
+        sells INTEGER,
+        early_buys INTEGER,
+        first_ts REAL,
+        last_ts REAL,
+        PRIMARY KEY (wallet, mint_address)
+    ) WITHOUT ROWID
+"""
+
+UPSERT_POSITION_SQL = """
+    INSERT OR REPLACE INTO wallet_positions
+    (wallet, mint_address, quantity, cost_sol, realized_sol, buys, sells, early_buys, first_ts, last_ts)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# 參數: 載入的錢包數上限，最近有成交的錢包優先
+SELECT_POSITIONS_SQL = """
+    SELECT wallet, mint_address, quantity, cost_sol, realized_sol, buys, sells, early_buys, first_ts, last_ts
+    FROM wallet_positions
+    WHERE wallet IN (
+        SELECT wallet FROM wallet_positions GROUP BY wallet ORDER BY MAX(last_ts) DESC LIMIT ?
+    )
+"""
+
+# 參數: 錢包地址 (主鍵前綴查詢)
+SELECT_WALLET_POSITIONS_SQL = """
+    SELECT wallet, mint_address, quantity, cost_sol, realized_sol, buys, sells, early_buys, first_ts, last_ts
+    FROM wallet_positions
+    WHERE wallet = ?
+"""
+
+# 參數: 載入的代幣數上限，最近有成交的代幣優先
+SELECT_MINT_FIRST_SEEN_SQL = """
+    SELECT mint_address, MIN(first_ts)
+    FROM wallet_positions
+    GROUP BY mint_address
+    ORDER BY MAX(last_ts) DESC
+    LIMIT ?
+"""
+
+# (wallet, mint, quantity, cost_sol, realized_sol, buys, sells, early_buys, first_ts, last_ts)
+PositionRow = Tuple[str, str, float, float, float, int, int, int, float, float]
+
+# 淘汰後再出現的錢包: 錢包地址 -> 已保存的持倉
+PositionLoader = Callable[[str], Iterable[PositionRow]]
+
+# 浮點誤差造成的殘餘持倉視為已清倉
+_DUST = 1e-9
+
+
+class Position:
+    # mark: 計入錢包未實現 PnL 累計值時使用的價格
+    __slots__ = ("quantity", "cost", "realized", "buys", "sells", "early_buys", "first_ts", "last_ts", "mark")
+
+    def __init__(self, ts: float):
+        self.quantity = 0.0
+        self.cost = 0.0
+        self.realized = 0.0
+        self.buys = 0
+        self.sells = 0
+        self.early_buys = 0
+        self.first_ts = ts
+        self.last_ts = ts
+        self.mark: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: PositionRow) -> "Position":
+        _, _, quantity, cost, realized, buys, sells, early_buys, first_ts, last_ts = row
+        position = cls(first_ts)
+        position.quantity, position.cost, position.realized = quantity, cost, realized
+        position.buys, position.sells, position.early_buys = buys, sells, early_buys
+        position.last_ts = last_ts
+        return position
+
+    def row(self, wallet: str, mint: str) -> PositionRow:
+        return (wallet, mint, self.quantity, self.cost, self.realized, self.buys, self.sells, self.early_buys,
+                self.first_ts, self.last_ts)
+
+    def unrealized_at_mark(self) -> float:
+        if not self.quantity or self.mark is None:
+            return 0.0
+        return self.quantity * self.mark - self.cost
+
+
+class WalletTotals:
+    """一個錢包的持倉與增量維護的累計值"""
+    __slots__ = ("positions", "realized", "unrealized", "trades", "early_buys")
+
+    def __init__(self):
+        self.positions: Dict[str, Position] = {}
+        self.realized = 0.0
+        self.unrealized = 0.0
+        self.trades = 0
+        self.early_buys = 0
+
+    def add(self, position: Position, sign: float = 1.0) -> None:
+        """把持倉計入 (sign=1) 或移出 (sign=-1) 累計值"""
+        self.realized += sign * position.realized
+        self.unrealized += sign * position.unrealized_at_mark()
+        self.trades += int(sign) * (position.buys + position.sells)
+        self.early_buys += int(sign) * position.early_buys
+
+
+class MintState:
+    __slots__ = ("price", "first_seen")
+
+    def __init__(self, price: Optional[float], first_seen: float):
+        self.price = price
+        self.first_seen = first_seen
+
+
+class WalletIndex:
+    """錢包 -> 代幣 -> 持倉"""
+
+    def __init__(self, early_window: float = 300, max_wallets: int = 200_000, max_mints: int = 100_000,
+                 loader: Optional[PositionLoader] = None):
+        self.early_window = early_window
+        self.max_wallets = max_wallets
+        self.max_mints = max_mints
+        self.loader = loader
+        self._wallets: "OrderedDict[str, WalletTotals]" = OrderedDict()
+        self._mints: "OrderedDict[str, MintState]" = OrderedDict()
+        # 代幣 -> 持有中 (quantity > 0) 的錢包，價格變動時只重估這些持倉
+        self._holders: Dict[str, Dict[str, None]] = {}
+        # 價格變動、尚未重估的代幣
+        self._stale: Dict[str, None] = {}
+        self._dirty: Dict[Tuple[str, str], None] = {}
+        # 淘汰時還沒寫入的持倉: 錢包 -> 代幣 -> 列
+        self._evicted: Dict[str, Dict[str, PositionRow]] = {}
+        self.swaps = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._wallets)
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty) + sum(len(rows) for rows in self._evicted.values())
+
+    def observe_price(self, mint: str, price: float, ts: float) -> None:
+        """任何一筆成交都更新最新價格 (不論簽名者是否為追蹤中的錢包)"""
+        state = self._mints.get(mint)
+        if state is None:
+            self._mints[mint] = MintState(price, ts)
+            while len(self._mints) > self.max_mints:
+                evicted, _ = self._mints.popitem(last=False)
+                self._stale.pop(evicted, None)
+        else:
+            state.price = price
+            state.first_seen = min(state.first_seen, ts)
+            self._mints.move_to_end(mint)
+        if mint in self._holders:
+            self._stale[mint] = None
+
+    def _hold(self, wallet: str, mint: str, holding: bool) -> None:
+        if holding:
+            self._holders.setdefault(mint, {})[wallet] = None
+            return
+        holders = self._holders.get(mint)
+        if holders is not None:
+            holders.pop(wallet, None)
+            if not holders:
+                del self._holders[mint]
+
+    def _insert(self, wallet: str, rows: Iterable[PositionRow]) -> WalletTotals:
+        totals = self._wallets[wallet] = WalletTotals()
+        for row in rows:
+            position = totals.positions[row[1]] = Position.from_row(row)
+            totals.add(position)
+            self._hold(wallet, row[1], bool(position.quantity))
+        while len(self._wallets) > self.max_wallets:
+            self._evict()
+        return totals
+
+    def _evict(self) -> None:
+        wallet, totals = self._wallets.popitem(last=False)
+        self.evictions += 1
+        for mint, position in totals.positions.items():
+            if (wallet, mint) in self._dirty:
+                del self._dirty[(wallet, mint)]
+                self._evicted.setdefault(wallet, {})[mint] = position.row(wallet, mint)
+            if position.quantity:
+                self._hold(wallet, mint, False)
+
+    def _wallet(self, wallet: str, create: bool) -> Optional[WalletTotals]:
+        """記憶體中的錢包，不在時讀回淘汰前的持倉；create (有成交) 時更新 LRU 順序，
+        沒有記錄也建立"""
+        totals = self._wallets.get(wallet)
+        if totals is not None:
+            if create:
+                self._wallets.move_to_end(wallet)
+            return totals
+        rows = {row[1]: row for row in self.loader(wallet)} if self.loader else {}
+        # 尚未寫出的淘汰持倉比資料庫中的新，讀回後重新標記為待寫入
+        pending = self._evicted.pop(wallet, {})
+        rows.update(pending)
+        if not rows and not create:
+            return None
+        totals = self._insert(wallet, rows.values())
+        for mint in pending:
+            self._dirty[(wallet, mint)] = None
+        return totals
+
+    def add_swap(self, wallet: str, mint: str, is_buy: bool, token_amount: float, sol_amount: float,
+                 ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        if token_amount <= 0:
+            return
+        price = sol_amount / token_amount
+        self.observe_price(mint, price, ts)
+        totals = self._wallet(wallet, create=True)
+        position = totals.positions.get(mint)
+        if position is None:
+            position = totals.positions[mint] = Position(ts)
+        totals.add(position, -1.0)
+        position.last_ts = max(position.last_ts, ts)
+        self.swaps += 1
+
+        if is_buy:
+            position.quantity += token_amount
+            position.cost += sol_amount
+            position.buys += 1
+            if ts - self._mints[mint].first_seen <= self.early_window:
+                position.early_buys += 1
+        else:
+            position.sells += 1
+            matched = min(token_amount, position.quantity)
+            if matched > 0:
+                cost_basis = position.cost * matched / position.quantity
+                position.realized += sol_amount * matched / token_amount - cost_basis
+                position.cost -= cost_basis
+                position.quantity -= matched
+                if position.quantity <= _DUST:
+                    position.quantity = position.cost = 0.0
+        position.mark = price
+        totals.add(position)
+        self._hold(wallet, mint, bool(position.quantity))
+        self._dirty[(wallet, mint)] = None
+
+    def _remark(self) -> None:
+        """按最新價格重估價格變動過的代幣的持倉"""
+        for mint in self._stale:
+            state = self._mints.get(mint)
+            if state is None or state.price is None:
+                continue
+            for wallet in self._holders.get(mint, ()):
+                totals = self._wallets[wallet]
+                position = totals.positions[mint]
+                totals.unrealized -= position.unrealized_at_mark()
+                position.mark = state.price
+                totals.unrealized += position.unrealized_at_mark()
+        self._stale.clear()
+
+    def drain(self) -> List[PositionRow]:
+        """取出變動過的持倉 (批量寫入 wallet_positions)"""
+        rows = [self._wallets[wallet].positions[mint].row(wallet, mint) for wallet, mint in self._dirty]
+        for pending in self._evicted.values():
+            rows.extend(pending.values())
+        self._dirty.clear()
+        self._evicted.clear()
+        return rows
+
+    def load(self, rows: Iterable[PositionRow]) -> int:
+        """載入 wallet_positions 的內容 (SELECT_POSITIONS_SQL)，返回載入的持倉數"""
+        by_wallet: Dict[str, List[PositionRow]] = {}
+        for row in rows:
+            by_wallet.setdefault(row[0], []).append(row)
+        for wallet, wallet_rows in by_wallet.items():
+            self._insert(wallet, wallet_rows)
+            for row in wallet_rows:
+                self._seed_first_seen(row[1], row[8])
+        return sum(len(wallet_rows) for wallet_rows in by_wallet.values())
+
+    def load_mints(self, rows: Iterable[Tuple[str, float]]) -> int:
+        """以 (代幣, 最早 first_ts) 回填代幣首次出現時間 (SELECT_MINT_FIRST_SEEN_SQL)"""
+        count = 0
+        for mint, first_seen in rows:
+            self._seed_first_seen(mint, first_seen)
+            count += 1
+        return count
+
+    def _seed_first_seen(self, mint: str, first_seen: float) -> None:
+        state = self._mints.get(mint)
+        if state is None:
+            if len(self._mints) >= self.max_mints:
+                return
+            self._mints[mint] = MintState(None, first_seen)
+            # 載入的順序由新到舊，較新的留在 LRU 尾端
+            self._mints.move_to_end(mint, last=False)
+        elif first_seen < state.first_seen:
+            state.first_seen = first_seen
+
+    def _unrealized(self, mint: str, position: Position) -> Optional[float]:
+        state = self._mints.get(mint)
+        price = state.price if state is not None and state.price is not None else position.mark
+        if price is None or not position.quantity:
+            return None if position.quantity else 0.0
+        return position.quantity * price - position.cost
+
+    def summary(self, wallet: str) -> Optional[Dict]:
+        totals = self._wallet(wallet, create=False)
+        if totals is None:
+            return None
+        positions = totals.positions
+        realized = unrealized = 0.0
+        buys = sells = early_buys = closed_wins = closed = 0
+        for mint, position in positions.items():
+            realized += position.realized
+            unrealized += self._unrealized(mint, position) or 0.0
+            buys += position.buys
+            sells += position.sells
+            early_buys += position.early_buys
+            if position.sells and not position.quantity:
+                closed += 1
+                closed_wins += position.realized > 0
+        return {
+            'wallet': wallet,
+            'realized_sol': round(realized, 6),
+            'unrealized_sol': round(unrealized, 6),
+            'pnl_sol': round(realized + unrealized, 6),
+            'tokens': len(positions),
+            'buys': buys,
+            'sells': sells,
+            'early_buys': early_buys,
+            'win_rate': round(closed_wins / closed, 4) if closed else None,
+        }
+
+    def positions(self, wallet: str) -> List[Dict]:
+        totals = self._wallet(wallet, create=False)
+        if totals is None:
+            return []
+        return [
+            {
+                'mint': mint,
+                'quantity': position.quantity,
+                'cost_sol': round(position.cost, 6),
+                'realized_sol': round(position.realized, 6),
+                'unrealized_sol': self._unrealized(mint, position),
+                'last_price': self._mints[mint].price if mint in self._mints else position.mark,
+                'buys': position.buys,
+                'sells': position.sells,
+                'early_buys': position.early_buys,
+            }
+            for mint, position in sorted(totals.positions.items(), key=lambda item: item[1].last_ts, reverse=True)
+        ]
+
+    def top(self, k: int = 20, by: str = "pnl", min_trades: int = 1) -> List[Dict]:
+        """記憶體中前 k 名錢包；by 為 pnl、realized 或 early_buys"""
+        if by not in ("pnl", "realized", "early_buys"):
+            raise ValueError("by must be pnl, realized or early_buys")
+        self._remark()
+        key = {
+            'pnl': lambda totals: totals.realized + totals.unrealized,
+            'realized': lambda totals: totals.realized,
+            'early_buys': lambda totals: totals.early_buys,
+        }[by]
+        candidates = ((wallet, totals) for wallet, totals in self._wallets.items() if totals.trades >= min_trades)
+        return [self.summary(wallet) for wallet, _ in heapq.nlargest(k, candidates, key=lambda item: key(item[1]))]
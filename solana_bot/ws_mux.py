@@ -0,0 +1,296 @@
+"""單一 WebSocket 連線上多工多個訂閱
+
+RPC 供應商限制每個帳號的 WebSocket 連線數，每多一種訂閱 (其他程序的
+日誌、金庫帳戶、交易確認) 就開一條連線很快會碰到上限。這裡讓任意數量的
+logsSubscribe / accountSubscribe / signatureSubscribe 共用一條連線:
+
+- 訂閱回覆按請求 id 對應到訂閱，通知按服務端的訂閱 id 分派
+- 每個訂閱可以用佇列 (async for) 或同步回調 (在讀取循環中調用) 接收通知
+- 斷線後自動重連 (輪換端點)，所有仍有效的訂閱在新連線上重新訂閱，
+  訂閱物件不變，消費端不需要處理重連
+- signatureSubscribe 收到通知後服務端會自動取消，不會被重新訂閱
+
+    mux = WsMultiplexer(WS_ENDPOINTS)
+    asyncio.create_task(mux.run())
+    logs = await mux.subscribe("logsSubscribe", [{"mentions": [program]}, {"commitment": "confirmed"}])
+    async for params in logs:     # msgspec.Raw，按方法用 rpc_types 的解碼器解碼
+        ...
+"""
+import asyncio
+import itertools
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+import msgspec
+import websockets
+
+from solana_bot.metrics import counter, endpoint_label
+from solana_bot.rpc_types import subscription_params_decoder, ws_message_decoder
+
+logger = logging.getLogger(__name__)
+
+# 收到第一個通知後服務端自動取消的訂閱
+ONE_SHOT = {"signatureSubscribe"}
+
+NotificationHandler = Callable[[msgspec.Raw], None]
+ConnectHook = Callable[[], Awaitable[None]]
+
+WS_CONNECTS = counter("ws_connects_total", "WebSocket connections established", ["endpoint"])
+WS_NOTIFICATIONS = counter("ws_notifications_total", "Notifications routed by the multiplexer", ["method"])
+WS_DROPPED = counter("ws_notifications_dropped_total", "Notifications dropped because a consumer queue was full",
+                     ["method"])
+WS_SUBSCRIBE_ERRORS = counter("ws_subscribe_errors_total", "Subscribe requests rejected by the server", ["method"])
+WS_DECODE_ERRORS = counter("ws_decode_errors_total", "Malformed WebSocket frames skipped", ["endpoint"])
+
+# 佇列中的結束標記，喚醒正在等待的消費端
+_CLOSED = object()
+
+
+class Subscription:
+    """一個訂閱，跨重連保持不變 (server_id 每次連線會變)"""
+
+    __slots__ = ("method", "params", "handler", "queue", "ready", "server_id", "closed", "error")
+
+    def __init__(self, method: str, params: list, handler: Optional[NotificationHandler], max_pending: int):
+        self.method = method
+        self.params = params
+        self.handler = handler
+        self.queue: Optional[asyncio.Queue] = None if handler else asyncio.Queue(maxsize=max_pending)
+        # 當前連線上已收到訂閱回覆
+        self.ready = asyncio.Event()
+        self.server_id: Optional[int] = None
+        self.closed = False
+        self.error: Any = None
+
+    def _deliver(self, params: msgspec.Raw) -> None:
+        if self.handler is not None:
+            self.handler(params)
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            WS_DROPPED.labels(self.method).inc()
+        self.queue.put_nowait(params)
+
+    def _close(self) -> None:
+        self.closed = True
+        self.ready.set()
+        if self.queue is not None:
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSED)
+
+    async def get(self) -> Optional[msgspec.Raw]:
+        """下一個通知的 params；訂閱結束後返回 None"""
+        if self.queue is None:
+            raise RuntimeError("subscription uses a handler")
+        item = await self.queue.get()
+        if item is _CLOSED:
+            # 留給其他等待中的消費端
+            self.queue.put_nowait(_CLOSED)
+            return None
+        return item
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> msgspec.Raw:
+        item = await self.get()
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+
+class WsMultiplexer:
+    def __init__(self, endpoints: Sequence[str], reconnect_interval: float = 5.0, max_attempts: int = 0,
+                 max_pending: int = 10000, ping_interval: float = 20):
+        self.endpoints: List[str] = [endpoint for endpoint in endpoints if endpoint]
+        if not self.endpoints:
+            raise ValueError("at least one WebSocket endpoint is required")
+        self.reconnect_interval = reconnect_interval
+        # 連續重連失敗達到次數後 run() 返回，0 為不限
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.ping_interval = ping_interval
+        self.connected = asyncio.Event()
+        self.connected_since: Optional[float] = None
+        self.connects = 0
+        self._index = 0
+        self._websocket = None
+        self._running = False
+        self._ids = itertools.count(1)
+        # 有效的訂閱 (dict 保持插入順序，重連時按原順序重新訂閱)
+        self._subscriptions: Dict[Subscription, None] = {}
+        # 請求 id -> 等待回覆的訂閱；服務端訂閱 id -> 訂閱
+        self._requests: Dict[int, Subscription] = {}
+        self._routes: Dict[int, Subscription] = {}
+        self._connect_hooks: List[ConnectHook] = []
+        self._background: Set[asyncio.Task] = set()
+
+    @property
+    def endpoint(self) -> str:
+        return self.endpoints[self._index]
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def add_connect_hook(self, hook: ConnectHook) -> None:
+        """每次 (重新) 連線並送出所有訂閱後，在背景執行 hook()"""
+        self._connect_hooks.append(hook)
+
+    async def subscribe(self, method: str, params: list,
+                        handler: Optional[NotificationHandler] = None) -> Subscription:
+        """建立訂閱；未連線時會在連線後送出"""
+        subscription = Subscription(method, params, handler, self.max_pending)
+        self._subscriptions[subscription] = None
+        if self._websocket is not None:
+            await self._send_subscribe(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        if subscription.closed:
+            return
+        server_id = subscription.server_id
+        self._discard(subscription)
+        if server_id is not None:
+            await self._send_unsubscribe(subscription.method, server_id)
+
+    def _discard(self, subscription: Subscription) -> None:
+        self._subscriptions.pop(subscription, None)
+        if subscription.server_id is not None:
+            self._routes.pop(subscription.server_id, None)
+        subscription._close()
+
+    async def _send(self, message: Dict) -> None:
+        websocket = self._websocket
+        if websocket is None:
+            return
+        try:
+            await websocket.send(json.dumps(message))
+        except websockets.exceptions.ConnectionClosed:
+            # 讀取循環會發現斷線並重連，重連後重新訂閱
+            pass
+
+    async def _send_subscribe(self, subscription: Subscription) -> None:
+        request_id = next(self._ids)
+        self._requests[request_id] = subscription
+        subscription.server_id = None
+        subscription.ready.clear()
+        await self._send({"jsonrpc": "2.0", "id": request_id, "method": subscription.method,
+                          "params": subscription.params})
+
+    async def _send_unsubscribe(self, method: str, server_id: int) -> None:
+        if method in ONE_SHOT:
+            return
+        await self._send({"jsonrpc": "2.0", "id": next(self._ids),
+                          "method": method.replace("Subscribe", "Unsubscribe"), "params": [server_id]})
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def _dispatch(self, message) -> None:
+        # 單個格式錯誤的訊息只跳過，不中斷連線 (ValidationError 是 DecodeError 的子類)
+        try:
+            envelope = ws_message_decoder.decode(message)
+            route = (subscription_params_decoder.decode(envelope.params).subscription
+                     if envelope.method is not None and envelope.params else None)
+        except msgspec.DecodeError as e:
+            WS_DECODE_ERRORS.labels(endpoint_label(self.endpoint)).inc()
+            logger.warning(f"Skipping malformed WebSocket message: {str(e)} ({message[:200]!r})")
+            return
+        if envelope.method is not None:
+            if not envelope.params:
+                return
+            subscription = self._routes.get(route)
+            if subscription is None:
+                return
+            WS_NOTIFICATIONS.labels(envelope.method).inc()
+            try:
+                subscription._deliver(envelope.params)
+            except Exception as e:
+                logger.error(f"{subscription.method} handler failed: {str(e)}")
+            if subscription.method in ONE_SHOT:
+                self._discard(subscription)
+            return
+
+        subscription = self._requests.pop(envelope.id, None) if isinstance(envelope.id, int) else None
+        if subscription is None:
+            # 取消訂閱等其他請求的回覆
+            return
+        if envelope.error is not None or not isinstance(envelope.result, int):
+            WS_SUBSCRIBE_ERRORS.labels(subscription.method).inc()
+            logger.warning(f"{subscription.method} rejected: {envelope.error or envelope.result}")
+            subscription.error = envelope.error or envelope.result
+            self._discard(subscription)
+        elif subscription.closed:
+            # 回覆到達前已取消
+            self._spawn(self._send_unsubscribe(subscription.method, envelope.result))
+        else:
+            subscription.server_id = envelope.result
+            self._routes[envelope.result] = subscription
+            subscription.ready.set()
+
+    async def _on_connect(self, websocket) -> None:
+        # 設定連線與取出訂閱清單之間沒有 await: 之後新增的訂閱由 subscribe() 自己送出
+        self._websocket = websocket
+        self._requests.clear()
+        self._routes.clear()
+        pending = list(self._subscriptions)
+        for subscription in pending:
+            await self._send_subscribe(subscription)
+        self.connected.set()
+        logger.info(f"WebSocket connected to {endpoint_label(self.endpoint)}, {len(pending)} subscriptions restored")
+        for hook in self._connect_hooks:
+            self._spawn(hook())
+
+    async def run(self) -> None:
+        """連線並分派訊息直到 stop()，斷線時重連"""
+        self._running = True
+        attempts = 0
+        while self._running:
+            endpoint = self.endpoint
+            try:
+                async with websockets.connect(endpoint, ping_interval=self.ping_interval,
+                                              ping_timeout=self.ping_interval, close_timeout=5,
+                                              max_size=None) as websocket:
+                    attempts = 0
+                    self.connects += 1
+                    self.connected_since = time.time()
+                    WS_CONNECTS.labels(endpoint_label(endpoint)).inc()
+                    await self._on_connect(websocket)
+                    async for message in websocket:
+                        self._dispatch(message)
+                    logger.warning("WebSocket connection closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket connection error ({endpoint_label(endpoint)}): {str(e)}")
+            finally:
+                self._websocket = None
+                self.connected.clear()
+                self.connected_since = None
+
+            if not self._running:
+                break
+            attempts += 1
+            if self.max_attempts and attempts >= self.max_attempts:
+                logger.error("Max reconnection attempts reached")
+                break
+            self._index = (self._index + 1) % len(self.endpoints)
+            logger.warning(f"Reconnect attempt {attempts}, waiting {self.reconnect_interval}s "
+                           f"(next endpoint {endpoint_label(self.endpoint)})")
+            await asyncio.sleep(self.reconnect_interval)
+        self._running = False
+
+    async def stop(self) -> None:
+        """取消所有訂閱並關閉連線，run() 隨後返回"""
+        self._running = False
+        for subscription in list(self._subscriptions):
+            await self.unsubscribe(subscription)
+        for task in list(self._background):
+            task.cancel()
+        if self._websocket is not None:
+            await self._websocket.close()
@@ -5,7 +5,6 @@ import time
 import re
 from datetime import datetime
 from typing import List, Optional, Dict
-from collections import defaultdict
 import requests
 import pandas as pd
 from sqlalchemy import create_engine, text
@@ -14,14 +13,33 @@ import traceback
 from solana.rpc.api import Client
 from solders.pubkey import Pubkey
 
-# 日誌設置
-logging.basicConfig(
+from solana_bot.bus import LARGE_SWAP, EventBus
+from solana_bot.candles import CANDLES_TABLE_SQL, UPSERT_CANDLE_SQL, CandleAggregator, swap_price
+from solana_bot.diagnostics import Diagnostics
+from solana_bot.fee_estimator import PriorityFeeEstimator
+from solana_bot.http_server import LocalHttpServer, json_response
+from solana_bot.leaderboard import Leaderboard
+from solana_bot.logging_utils import setup_logging
+from solana_bot.lookup_tables import LookupTableCache, table_lookups
+from solana_bot.metrics import RPC_ERRORS, RPC_LATENCY, add_metrics_route, counter, endpoint_label, gauge, histogram
+from solana_bot.rpc_cache import RpcResponseCache
+from solana_bot.rpc_pool import RpcPool
+from solana_bot.rpc_types import block_decoder
+from solana_bot.safety import decode_account_data
+from solana_bot.wallet_index import (
+    SELECT_MINT_FIRST_SEEN_SQL,
+    SELECT_POSITIONS_SQL,
+    SELECT_WALLET_POSITIONS_SQL,
+    UPSERT_POSITION_SQL,
+    WALLET_POSITIONS_TABLE_SQL,
+    WalletIndex,
+)
+
+# 日誌設置: 區塊掃描只把記錄放入佇列，終端與檔案輸出在背景線程完成
+setup_logging(
+    'solana_monitor.log',
     level=logging.WARNING,  # 設置基礎日誌級別為 WARNING
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('solana_monitor.log', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    console_handler=logging.StreamHandler(sys.stdout)
 )
 
 # 創建自定義日誌過濾器
@@ -59,14 +77,157 @@ class Config:
     # Token API
     JUPITER_TOKEN_API = "https://token.jup.ag/all"
 
+    # /metrics 與 /debug/* 端口，0 為關閉
+    METRICS_PORT = 9101
+
+    # K 線: 累積到這麼多根或距上次寫入超過這麼多秒時批量寫入
+    CANDLE_FLUSH_ROWS = 500
+    CANDLE_FLUSH_INTERVAL = 5
+
+    # 排行榜只計入不低於此金額的成交 (SOL)，過濾掉粉塵與刷量小單
+    LEADERBOARD_MIN_SWAP = 1
+
+    # 記憶體中保留的錢包數與代幣數 (LRU)，淘汰的錢包再出現時從 wallet_positions 讀回
+    WALLET_INDEX_MAX_WALLETS = 200_000
+    WALLET_INDEX_MAX_MINTS = 100_000
+
+    # 區塊掃描是同步調用，每輪都會佔住事件迴圈數秒；門檻以上才視為卡住
+    LOOP_STALL_THRESHOLD = 10
+
+    # 優先費估計: 滾動窗口 (slot 數) 與預設追蹤的可寫帳戶 (例如常用的池子)
+    PRIORITY_FEE_WINDOW = 150
+    PRIORITY_FEE_ACCOUNTS: List[str] = []
+
+
+# 運行指標
+BLOCKS_PROCESSED = counter("swap_blocks_processed_total", "Blocks fetched and scanned")
+TRANSACTIONS_SCANNED = counter("swap_transactions_scanned_total", "Transactions scanned")
+SWAPS_RECORDED = counter("swap_swaps_recorded_total", "Large swaps written to the database")
+SLOT_LAG = gauge("swap_slot_lag", "Slots between the chain tip and the last processed block")
+DB_WRITE_LATENCY = histogram("swap_db_write_seconds", "Swap insert latency")
+BLOCK_PROCESS_LATENCY = histogram("swap_block_process_seconds", "Fetch and scan time per block")
+CANDLE_TRADES = counter("swap_candle_trades_total", "Priced swaps fed into the candle aggregator")
+CANDLE_FLUSH_LATENCY = histogram("swap_candle_flush_seconds", "Closed candle bulk write latency")
+WALLET_FLUSH_LATENCY = histogram("swap_wallet_flush_seconds", "Changed wallet position bulk write latency")
+
+
+def rpc_call(method: str, func, *args, **kwargs):
+    """調用同步 RPC 函數並記錄延遲與錯誤"""
+    labels = (method, endpoint_label(Config.RPC_ENDPOINT))
+    try:
+        with RPC_LATENCY.labels(*labels).time():
+            return func(*args, **kwargs)
+    except Exception:
+        RPC_ERRORS.labels(*labels).inc()
+        raise
+
+
+def block_params(slot: int) -> list:
+    return [slot, {
+        "encoding": "json",
+        "maxSupportedTransactionVersion": 0,
+        "transactionDetails": "full",
+        "rewards": False,
+        "commitment": "finalized"
+    }]
+
 
 class SwapMonitor:
-    def __init__(self):
+    """大額交易監控
+
+    rpc / bus 由 solana_bot.host 傳入時，RPC 請求走共用連線池 (區塊以非同步
+    請求獲取，不佔住同一事件迴圈上的其他元件)，大額交易同時發布到事件匯流排。
+    """
+
+    def __init__(self, rpc: Optional[RpcPool] = None, bus: Optional[EventBus] = None):
+        self.rpc = rpc
+        self.bus = bus
         self.client = Client(Config.RPC_ENDPOINT)
         self.token_cache = {}
         self.engine = create_engine(Config.DB_URL)
-        self.stats = defaultdict(int)
         self.last_cache_refresh = 0
+        self.lookup_tables = LookupTableCache(self.fetch_account_data, fetch_accounts_async=self.load_account_data)
+        self.rpc_cache = RpcResponseCache()
+        # 所有偵測到的 DEX 交易都轉成 K 線，不受 MIN_SWAP_AMOUNT 限制
+        self.candles = CandleAggregator()
+        self.last_candle_flush = time.time()
+        gauge("swap_candles_pending", "Closed candles waiting to be written",
+              callback=lambda: self.candles.pending)
+        gauge("swap_candles_memory_bytes", "Memory held by the in-memory candle rings",
+              callback=lambda: self.candles.nbytes)
+        # 1/5/15 分鐘熱門代幣，只在記憶體中維護
+        self.leaderboard = Leaderboard()
+        # 已處理區塊的最新 block_time: 排行的時間桶按鏈上時間劃分，查詢時以此為當前時間
+        self.last_block_time: Optional[float] = None
+        # 區塊中每筆交易的 compute unit price，供送單時在本地查詢優先費
+        self.fee_estimator = PriorityFeeEstimator(Config.PRIORITY_FEE_WINDOW)
+        for account in Config.PRIORITY_FEE_ACCOUNTS:
+            self.fee_estimator.track(account)
+        # 簽名者錢包的持倉與 PnL，隨每筆 swap 增量更新
+        self.wallets = WalletIndex(max_wallets=Config.WALLET_INDEX_MAX_WALLETS,
+                                   max_mints=Config.WALLET_INDEX_MAX_MINTS, loader=self.load_wallet_positions)
+        gauge("swap_wallets_tracked", "Wallets with at least one observed swap", callback=lambda: len(self.wallets))
+        gauge("swap_priority_fee_p75", "75th percentile compute unit price (micro-lamports) over the window",
+              callback=lambda: self.fee_estimator.estimate(75) or 0)
+
+    def get_block(self, slot: int):
+        """獲取已最終確認的區塊，優先讀本地快取
+
+        直接從響應 bytes 解碼用到的欄位 (solana_bot.rpc_types)，
+        屬性名與 solders 物件相同。
+        """
+        params = block_params(slot)
+        cached = self.rpc_cache.get("getBlock", params, "finalized")
+        if cached is not None:
+            return block_decoder.decode(cached).result
+
+        response = rpc_call(
+            "getBlock", requests.post,
+            Config.RPC_ENDPOINT,
+            json={"jsonrpc": "2.0", "id": 1, "method": "getBlock", "params": params},
+            timeout=30
+        )
+        response.raise_for_status()
+        return self._decode_block(slot, params, response.content)
+
+    async def load_block(self, slot: int):
+        """共用連線池時以非同步請求獲取區塊，否則同 get_block"""
+        if self.rpc is None:
+            return self.get_block(slot)
+        params = block_params(slot)
+        cached = self.rpc_cache.get("getBlock", params, "finalized")
+        if cached is not None:
+            return block_decoder.decode(cached).result
+        return self._decode_block(slot, params, await self.rpc.post("getBlock", params))
+
+    def _decode_block(self, slot: int, params: list, content: bytes):
+        decoded = block_decoder.decode(content)
+        if decoded.error:
+            endpoint = self.rpc.endpoint if self.rpc else Config.RPC_ENDPOINT
+            RPC_ERRORS.labels("getBlock", endpoint_label(endpoint)).inc()
+            raise RuntimeError(f"getBlock {slot}: {decoded.error}")
+        if decoded.result:
+            self.rpc_cache.put("getBlock", params, "finalized", content)
+        return decoded.result
+
+    def fetch_account_data(self, addresses: List[str]) -> List[Optional[bytes]]:
+        """批量獲取帳戶原始資料 (getMultipleAccounts)"""
+        if self.rpc:
+            result = self.rpc.call_sync("getMultipleAccounts", [addresses, {"encoding": "base64"}])
+            return [decode_account_data(value) for value in result['value']]
+        response = rpc_call(
+            "getMultipleAccounts", self.client.get_multiple_accounts,
+            [Pubkey.from_string(address) for address in addresses],
+            encoding="base64"
+        )
+        return [account.data if account else None for account in response.value]
+
+    async def load_account_data(self, addresses: List[str]) -> List[Optional[bytes]]:
+        """同 fetch_account_data，共用連線池時非同步請求，否則在線程中執行"""
+        if self.rpc is None:
+            return await asyncio.to_thread(self.fetch_account_data, addresses)
+        result = await self.rpc.call("getMultipleAccounts", [addresses, {"encoding": "base64"}])
+        return [decode_account_data(value) for value in result['value']]
 
     def refresh_token_cache(self):
         """刷新代幣緩存"""
@@ -145,20 +306,125 @@ class SwapMonitor:
                     input_token_symbol TEXT,
                     output_token_address TEXT,
                     output_token_symbol TEXT,
-                    timestamp REAL
+                    timestamp REAL,
+                    signer TEXT
                 )
             """))
+            # 舊資料庫沒有 signer 欄位
+            columns = {row[1] for row in conn.execute(text("PRAGMA table_info(swaps)"))}
+            if "signer" not in columns:
+                conn.execute(text("ALTER TABLE swaps ADD COLUMN signer TEXT"))
+            # 匯出 Parquet 時按天範圍讀取
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_swaps_timestamp ON swaps (timestamp)"))
+            conn.execute(text(CANDLES_TABLE_SQL))
+            conn.execute(text(WALLET_POSITIONS_TABLE_SQL))
             conn.commit()
 
     def save_swap(self, swap_data: dict):
         """保存交易記錄"""
         df = pd.DataFrame([swap_data])
-        df.to_sql('swaps', self.engine, if_exists='append', index=False)
+        with DB_WRITE_LATENCY.time():
+            df.to_sql('swaps', self.engine, if_exists='append', index=False)
+        SWAPS_RECORDED.inc()
         logger.info(
             f"保存交易: {swap_data['swap_amount']:.2f} SOL - "
             f"{swap_data['input_token_symbol']} -> {swap_data['output_token_symbol']}"
         )
 
+    def flush_candles(self, include_open: bool = False):
+        """把收盤的 K 線批量寫入 candles 表"""
+        rows = self.candles.drain(include_open)
+        self.last_candle_flush = time.time()
+        if not rows:
+            return
+        with CANDLE_FLUSH_LATENCY.time(), self.engine.begin() as conn:
+            conn.exec_driver_sql(UPSERT_CANDLE_SQL, rows)
+
+    def flush_wallets(self):
+        """把變動過的錢包持倉批量寫入 wallet_positions 表"""
+        rows = self.wallets.drain()
+        if not rows:
+            return
+        with WALLET_FLUSH_LATENCY.time(), self.engine.begin() as conn:
+            conn.exec_driver_sql(UPSERT_POSITION_SQL, rows)
+
+    def load_wallets(self):
+        """啟動時載入最近活躍錢包的持倉與代幣首次出現時間"""
+        with self.engine.connect() as conn:
+            count = self.wallets.load(conn.exec_driver_sql(SELECT_POSITIONS_SQL, (Config.WALLET_INDEX_MAX_WALLETS,)))
+            mints = self.wallets.load_mints(
+                conn.exec_driver_sql(SELECT_MINT_FIRST_SEEN_SQL, (Config.WALLET_INDEX_MAX_MINTS,))
+            )
+        logger.info(f"載入 {count} 筆錢包持倉、{mints} 個代幣")
+
+    def load_wallet_positions(self, wallet: str):
+        """被淘汰後再出現的錢包，從 wallet_positions 讀回持倉"""
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql(SELECT_WALLET_POSITIONS_SQL, (wallet,)).fetchall()
+
+    def wallets_response(self, query: Dict[str, str]):
+        """GET /wallets?k=20&by=pnl|realized|early_buys&min_trades=3"""
+        try:
+            rows = self.wallets.top(
+                min(int(query.get('k', 20)), 200),
+                query.get('by', 'pnl'),
+                int(query.get('min_trades', 3))
+            )
+        except ValueError as e:
+            return json_response({'error': str(e)}, status=400)
+        return json_response(rows)
+
+    def wallet_response(self, query: Dict[str, str]):
+        """GET /wallet?address=...，單一錢包的匯總與各代幣持倉"""
+        summary = self.wallets.summary(query.get('address', ''))
+        if summary is None:
+            return json_response({'error': 'wallet not found'}, status=404)
+        summary['positions'] = self.wallets.positions(summary['wallet'])
+        return json_response(summary)
+
+    def candles_response(self, query: Dict[str, str]):
+        """GET /candles?mint=...&resolution=60&count=100，直接讀記憶體中的環形緩衝區"""
+        mint = query.get('mint')
+        if not mint:
+            return json_response({'error': 'mint is required'}, status=400)
+        resolution = int(query.get('resolution', self.candles.resolutions[0]))
+        if resolution not in self.candles.resolutions:
+            return json_response({'error': f"resolution must be one of {self.candles.resolutions}"}, status=400)
+        history = self.candles.history(mint, resolution, int(query.get('count', 100)))
+        return json_response({
+            'mint': mint,
+            'resolution': resolution,
+            'last_price': self.candles.last_price(mint),
+            'columns': ['start_ts', 'open', 'high', 'low', 'close', 'volume_sol', 'trades'],
+            'candles': history.tolist(),
+        })
+
+    def leaderboard_response(self, query: Dict[str, str]):
+        """GET /leaderboard?window=300&k=10&by=volume|trades|buyers
+
+        窗口截止於最新處理區塊的 block_time，而不是牆上時間: finalized 區塊落後
+        數十秒，以牆上時間計算會把最近的成交提前移出 1 分鐘窗口。
+        """
+        try:
+            rows = self.leaderboard.top(
+                int(query.get('window', 300)),
+                min(int(query.get('k', 10)), 100),
+                query.get('by', 'volume'),
+                now=self.last_block_time
+            )
+        except ValueError as e:
+            return json_response({'error': str(e)}, status=400)
+        for row in rows:
+            row['symbol'] = self.get_token_info(row['mint'])['symbol']
+        return json_response(rows)
+
+    def fees_response(self, query: Dict[str, str]):
+        """GET /fees?account=...，未追蹤的帳戶從現在開始追蹤"""
+        account = query.get('account')
+        if account:
+            self.fee_estimator.track(account)
+        return json_response(self.fee_estimator.summary(account))
+
     def find_token_transfers(self, tx, account_keys) -> List[dict]:
         """分析代幣轉賬"""
         if not (tx.meta and tx.meta.log_messages):
@@ -220,7 +486,10 @@ class SwapMonitor:
 
         while True:
             try:
-                current_slot = self.client.get_slot().value
+                if self.rpc:
+                    current_slot = await self.rpc.call("getSlot", [{"commitment": "finalized"}])
+                else:
+                    current_slot = (await asyncio.to_thread(rpc_call, "getSlot", self.client.get_slot)).value
                 if last_processed_slot is None:
                     start_slot = current_slot - 5
                 else:
@@ -230,13 +499,24 @@ class SwapMonitor:
 
                 for slot in range(start_slot, end_slot + 1):
                     try:
-                        block = self.client.get_block(
-                            slot,
-                            max_supported_transaction_version=0
-                        ).value
+                        block_start = time.perf_counter()
+                        block = await self.load_block(slot)
 
                         if not block or not hasattr(block, 'transactions'):
                             continue
+                        BLOCKS_PROCESSED.inc()
+                        TRANSACTIONS_SCANNED.inc(len(block.transactions))
+                        if block.block_time:
+                            self.last_block_time = max(self.last_block_time or 0, block.block_time)
+
+                        # RPC 未返回 loaded_addresses 的 v0 交易，整個區塊的查找表一次批量拉取
+                        await self.lookup_tables.prefetch_async(
+                            lookup
+                            for tx in block.transactions
+                            if tx.transaction and tx.transaction.message
+                            and not (tx.meta and tx.meta.loaded_addresses)
+                            for lookup in table_lookups(tx.transaction.message)
+                        )
 
                         # 只在發現重要事件時輸出日誌
                         for tx_index, tx in enumerate(block.transactions):
@@ -244,15 +524,38 @@ class SwapMonitor:
                                 if not (tx.transaction and tx.transaction.message):
                                     continue
 
-                                account_keys = [
-                                    str(key) for key in tx.transaction.message.account_keys]
-                                is_dex = (
-                                    any(id in account_keys for id in Config.JUPITER_PROGRAM_IDS) or
-                                    Config.RAYDIUM_PROGRAM_ID in account_keys
+                                # v0 交易的池子與代幣帳戶常在查找表中
+                                account_keys = self.lookup_tables.full_account_keys(
+                                    [str(key) for key in tx.transaction.message.account_keys],
+                                    tx.transaction.message,
+                                    tx.meta.loaded_addresses if tx.meta else None
+                                )
+                                self.fee_estimator.observe(slot, tx.transaction.message, account_keys)
+                                dex_program = next(
+                                    (
+                                        program for program in (*Config.JUPITER_PROGRAM_IDS, Config.RAYDIUM_PROGRAM_ID)
+                                        if program in account_keys
+                                    ),
+                                    None
                                 )
 
-                                if not is_dex:
+                                if dex_program is None:
                                     continue
+                                signer = account_keys[0]
+
+                                # 以簽名者 (account_keys[0]) 的餘額變化推出成交價
+                                if tx.meta:
+                                    trade = swap_price(tx.meta, signer)
+                                    if trade:
+                                        mint, price, volume, is_buy = trade
+                                        trade_time = block.block_time or time.time()
+                                        self.candles.add_trade(mint, price, volume, trade_time)
+                                        CANDLE_TRADES.inc()
+                                        self.wallets.add_swap(signer, mint, is_buy, volume / price, volume, trade_time)
+                                        if volume >= Config.LEADERBOARD_MIN_SWAP:
+                                            self.leaderboard.add_trade(
+                                                mint, volume, signer if is_buy else None, trade_time
+                                            )
 
                                 if tx.meta and tx.meta.post_balances and tx.meta.pre_balances:
                                     sol_change = max(
@@ -269,7 +572,8 @@ class SwapMonitor:
                                         if tokens and len(tokens) >= 2:
                                             swap_data = {
                                                 "slot": slot,
-                                                "program_id": str(account_keys[0]),
+                                                "program_id": dex_program,
+                                                "signer": signer,
                                                 "swap_amount": sol_change,
                                                 "input_token_address": tokens[0]["address"],
                                                 "input_token_symbol": tokens[0]["symbol"],
@@ -278,6 +582,8 @@ class SwapMonitor:
                                                 "timestamp": time.time()
                                             }
                                             self.save_swap(swap_data)
+                                            if self.bus:
+                                                self.bus.publish(LARGE_SWAP, swap_data)
                                             logger.info(
                                                 f"代幣交換: {tokens[0]['symbol']} -> {tokens[-1]['symbol']}"
                                             )
@@ -286,6 +592,13 @@ class SwapMonitor:
                                 logger.error(f"交易處理錯誤: {str(tx_error)}")
 
                         last_processed_slot = slot
+                        SLOT_LAG.set(current_slot - slot)
+                        BLOCK_PROCESS_LATENCY.observe(time.perf_counter() - block_start)
+
+                        if (self.candles.pending >= Config.CANDLE_FLUSH_ROWS or
+                                time.time() - self.last_candle_flush >= Config.CANDLE_FLUSH_INTERVAL):
+                            self.flush_candles()
+                            self.flush_wallets()
 
                     except Exception as block_error:
                         logger.error(f"區塊處理錯誤: {str(block_error)}")
@@ -301,14 +614,40 @@ class SwapMonitor:
         """運行監控"""
         logger.info("啟動 Solana 交易監控...")
         self.create_tables()
+        self.load_wallets()
         self.refresh_token_cache()
 
+        # SIGUSR1 或 /debug/* 端點觸發 profile 與記憶體快照
+        diagnostics = Diagnostics(stall_threshold=Config.LOOP_STALL_THRESHOLD)
+        await diagnostics.start()
+
+        # 區塊掃描期間是同步調用，抓取請求會在每輪的 sleep 期間得到響應
+        metrics_server = None
+        if Config.METRICS_PORT:
+            metrics_server = add_metrics_route(LocalHttpServer(port=Config.METRICS_PORT))
+            metrics_server.route('/candles', self.candles_response)
+            metrics_server.route('/leaderboard', self.leaderboard_response)
+            metrics_server.route('/fees', self.fees_response)
+            metrics_server.route('/wallets', self.wallets_response)
+            metrics_server.route('/wallet', self.wallet_response)
+            diagnostics.add_routes(metrics_server)
+            await metrics_server.start()
+
         try:
             await self.monitor_transactions()
         except KeyboardInterrupt:
             logger.info("監控已停止")
         except Exception as e:
             logger.error(f"運行錯誤: {traceback.format_exc()}")
+        finally:
+            try:
+                self.flush_candles(include_open=True)
+                self.flush_wallets()
+            except Exception as e:
+                logger.error(f"寫入 K 線 / 錢包持倉失敗: {str(e)}")
+            if metrics_server:
+                await metrics_server.stop()
+            await diagnostics.stop()
 
 
 async def main():
@@ -0,0 +1,87 @@
+import base64
+import itertools
+import struct
+
+import numpy as np
+import pytest
+
+from solana_bot.amm_quote import (DIRECTION_COIN2PC, DIRECTION_PC2COIN, QuoteEngine, parse_swap_base_in,
+                                  quote_event, quote_exact, swap_events)
+
+RESERVES = [1_000, 123_457, 10**9, 3 * 10**11 + 7, 10**15]
+AMOUNTS = [1, 2, 399, 400, 401, 12_345, 10**6, 10**9 + 3, 10**12]
+
+# 主網 swapBaseIn 交易的 ray_log: (amount_in, direction, pool_coin, pool_pc, out_amount)
+# 用 `python -m solana_bot.amm_quote --rpc <RPC> <簽名> ...` 取得，原樣貼上；
+# 不要手寫或由 quote_exact 反推。
+# TODO: 尚未錄入 (開發環境連不到 RPC)。在此之前 quote 與鏈上實際輸出的核對
+# 沒有覆蓋，只有上面與 quote_exact 的對照 (quote_exact 本身未經鏈上驗證)
+RAY_LOG_VECTORS = [
+]
+
+
+def _ray_log(amount_in, minimum_out, direction, user_source, pool_coin, pool_pc, out_amount):
+    raw = struct.pack("<B7Q", 3, amount_in, minimum_out, direction, user_source, pool_coin, pool_pc, out_amount)
+    return "Program log: ray_log: " + base64.b64encode(raw).decode()
+
+
+@pytest.mark.parametrize("coin_to_pc", [True, False])
+def test_quote_matches_exact_on_grid(coin_to_pc):
+    engine = QuoteEngine(capacity=4)
+    pools = []
+    for coin, pc in itertools.product(RESERVES, RESERVES):
+        pool = f"{coin}/{pc}"
+        engine.update(pool, coin, pc, 6, 9)
+        pools.append((pool, coin, pc))
+
+    result = engine.quote([pool for pool, _, _ in pools], np.tile(AMOUNTS, (len(pools), 1)), coin_to_pc)
+
+    for row, (pool, coin, pc) in enumerate(pools):
+        reserve_in, reserve_out = (coin, pc) if coin_to_pc else (pc, coin)
+        for column, amount in enumerate(AMOUNTS):
+            out, fee = quote_exact(reserve_in, reserve_out, amount)
+            assert result['fee'][row, column] == fee
+            got = int(result['amount_out'][row, column])
+            if reserve_out * (amount - fee) < 2**53:
+                assert got == out, (pool, amount)
+            else:
+                assert abs(got - out) <= 1, (pool, amount)
+
+
+def test_quote_exact_fee_rounds_up():
+    assert quote_exact(10**9, 10**9, 1) == (0, 1)
+    assert quote_exact(10**9, 10**9, 400) == (398, 1)
+    assert quote_exact(10**9, 10**9, 401) == (398, 2)
+    assert quote_exact(0, 10**9, 0) == (0, 0)
+
+
+def test_parse_swap_base_in_round_trip():
+    line = _ray_log(10**9, 5, DIRECTION_COIN2PC, 10**10, 7 * 10**12, 3 * 10**11, 42)
+    assert parse_swap_base_in(line) == {
+        'amount_in': 10**9, 'minimum_out': 5, 'direction': DIRECTION_COIN2PC, 'user_source': 10**10,
+        'pool_coin': 7 * 10**12, 'pool_pc': 3 * 10**11, 'out_amount': 42,
+    }
+    assert parse_swap_base_in(line.split("ray_log: ")[1]) == parse_swap_base_in(line)
+
+
+def test_parse_swap_base_in_ignores_other_events():
+    # log_type 4 為 SwapBaseOut，長度相同
+    raw = struct.pack("<B7Q", 4, *range(7))
+    assert parse_swap_base_in("ray_log: " + base64.b64encode(raw).decode()) is None
+    assert parse_swap_base_in("ray_log: not-base64!") is None
+    assert parse_swap_base_in("ray_log: " + base64.b64encode(b"\x03short").decode()) is None
+    logs = ["Program log: Instruction: Transfer", _ray_log(1, 0, DIRECTION_PC2COIN, 1, 2, 3, 0)]
+    assert [event['pool_pc'] for event in swap_events(logs)] == [3]
+
+
+@pytest.mark.skipif(not RAY_LOG_VECTORS,
+                    reason="尚未錄入主網 ray_log 向量，quote 與鏈上輸出的核對未覆蓋 (見 RAY_LOG_VECTORS)")
+@pytest.mark.parametrize("amount_in, direction, pool_coin, pool_pc, out_amount", RAY_LOG_VECTORS)
+def test_quote_matches_recorded_swaps(amount_in, direction, pool_coin, pool_pc, out_amount):
+    event = {'amount_in': amount_in, 'direction': direction, 'pool_coin': pool_coin, 'pool_pc': pool_pc}
+    assert quote_event(event) == out_amount
+
+    engine = QuoteEngine(capacity=1)
+    engine.update("pool", pool_coin, pool_pc, 6, 9)
+    out = engine.quote(["pool"], amount_in, direction == DIRECTION_COIN2PC)['amount_out']
+    assert abs(int(out[0]) - out_amount) <= 1
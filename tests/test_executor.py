@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import struct
+
+import httpx
+from solders.hash import Hash
+from solders.instruction import AccountMeta
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+from spl.token.constants import TOKEN_PROGRAM_ID, WRAPPED_SOL_MINT
+from spl.token.instructions import get_associated_token_address
+
+from solana_bot.executor import (RAYDIUM_AMM_PROGRAM, RAYDIUM_AUTHORITY, SWAP_BASE_IN, ExecutionEngine,
+                                 RaydiumPoolKeys, RaydiumSwapTemplate)
+from solana_bot.ws_mux import Subscription
+
+PRIMARY = "http://primary.invalid"
+BACKUP = "http://backup.invalid"
+BLOCKHASH = Hash.new_unique()
+
+
+class StandInWs:
+    """替代 WsMultiplexer: 訂閱立即就緒，由替身 RPC 收到交易時推送確認通知"""
+
+    def __init__(self):
+        self.subscriptions = []
+
+    async def subscribe(self, method, params, handler=None):
+        subscription = Subscription(method, params, handler, 16)
+        subscription.ready.set()
+        self.subscriptions.append(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        subscription._close()
+
+
+class StandInRpc:
+    """主端點全部返回 503，備用端點模擬節點並記錄送出的交易"""
+
+    def __init__(self, ws: StandInWs):
+        self.ws = ws
+        self.requests = []
+        self.sent = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        endpoint = f"{request.url.scheme}://{request.url.host}"
+        self.requests.append((endpoint, body['method']))
+        if endpoint == PRIMARY:
+            return httpx.Response(503)
+        method = body['method']
+        if method == "getLatestBlockhash":
+            result = {"context": {"slot": 1}, "value": {"blockhash": str(BLOCKHASH), "lastValidBlockHeight": 150}}
+        elif method == "getRecentPrioritizationFees":
+            result = [{"slot": slot, "prioritizationFee": slot * 100} for slot in range(1, 11)]
+        elif method == "sendTransaction":
+            transaction = VersionedTransaction.from_bytes(base64.b64decode(body['params'][0]))
+            self.sent.append(transaction)
+            result = str(transaction.signatures[0])
+            notification = {"result": {"context": {"slot": 2}, "value": {"err": None}}, "subscription": 1}
+            for subscription in self.ws.subscriptions:
+                if subscription.params[0] == result:
+                    subscription._deliver(json.dumps(notification).encode())
+        else:
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "error": {"code": -32601}})
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "result": result})
+
+
+def _pool() -> RaydiumPoolKeys:
+    fields = {name: Pubkey.new_unique() for name in RaydiumPoolKeys.__dataclass_fields__}
+    fields['pc_mint'] = WRAPPED_SOL_MINT
+    return RaydiumPoolKeys(**fields)
+
+
+def _expected_metas(pool: RaydiumPoolKeys, owner: Pubkey):
+    def writable(key):
+        return AccountMeta(key, is_signer=False, is_writable=True)
+
+    def readonly(key):
+        return AccountMeta(key, is_signer=False, is_writable=False)
+
+    return [
+        readonly(TOKEN_PROGRAM_ID), writable(pool.amm), readonly(RAYDIUM_AUTHORITY),
+        writable(pool.open_orders), writable(pool.target_orders),
+        writable(pool.coin_vault), writable(pool.pc_vault),
+        readonly(pool.market_program), writable(pool.market),
+        writable(pool.market_bids), writable(pool.market_asks), writable(pool.market_event_queue),
+        writable(pool.market_coin_vault), writable(pool.market_pc_vault), readonly(pool.market_vault_signer),
+        writable(get_associated_token_address(owner, WRAPPED_SOL_MINT)),
+        writable(get_associated_token_address(owner, pool.coin_mint)),
+        AccountMeta(owner, is_signer=True, is_writable=False),
+    ]
+
+
+def test_raydium_swap_signed_and_sent_with_failover():
+    keypair = Keypair()
+    pool = _pool()
+    amount_in, min_out = 50_000_000, 1_234_567
+
+    async def run():
+        ws = StandInWs()
+        rpc = StandInRpc(ws)
+        engine = ExecutionEngine(keypair, [PRIMARY, BACKUP], "ws://unused.invalid", ws=ws)
+        engine._client = httpx.AsyncClient(transport=httpx.MockTransport(rpc))
+        try:
+            await engine.refresh_blockhash()
+            await engine.refresh_fee()
+            template = RaydiumSwapTemplate(pool, keypair.pubkey(), WRAPPED_SOL_MINT).build(amount_in, min_out)
+            result = await engine.execute(template, timeout=5)
+        finally:
+            await engine._client.aclose()
+        return engine, rpc, template, result
+
+    engine, rpc, template, result = asyncio.run(run())
+
+    # 主端點失敗後換到備用端點，之後的查詢不再打主端點
+    assert engine.endpoint == BACKUP
+    assert rpc.requests[:3] == [(PRIMARY, "getLatestBlockhash"), (BACKUP, "getLatestBlockhash"),
+                                (BACKUP, "getRecentPrioritizationFees")]
+    assert engine.blockhash == BLOCKHASH
+    assert engine.compute_unit_price == 800
+    # sendTransaction 仍送到每個端點
+    assert result.endpoints[BACKUP] == "ok" and result.endpoints[PRIMARY] != "ok"
+    assert result.confirmed and result.error is None
+
+    swap = next(ix for ix in template.instructions if ix.program_id == RAYDIUM_AMM_PROGRAM)
+    assert swap.data == struct.pack("<BQQ", SWAP_BASE_IN, amount_in, min_out)
+    assert list(swap.accounts) == _expected_metas(pool, keypair.pubkey())
+
+    assert len(rpc.sent) == 1
+    transaction = rpc.sent[0]
+    assert str(transaction.signatures[0]) == result.signature
+    assert transaction.verify_with_results() == [True]
+    message = transaction.message
+    assert message.recent_blockhash == BLOCKHASH
+    assert message.account_keys[0] == keypair.pubkey()
+    compiled = next(ix for ix in message.instructions
+                    if message.account_keys[ix.program_id_index] == RAYDIUM_AMM_PROGRAM)
+    assert bytes(compiled.data) == swap.data
+    assert [message.account_keys[index] for index in compiled.accounts] == [meta.pubkey for meta in swap.accounts]
+    for index, meta in zip(compiled.accounts, swap.accounts):
+        if meta.is_writable:
+            assert message.is_maybe_writable(index)